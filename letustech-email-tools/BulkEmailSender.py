@@ -7,26 +7,27 @@ Themes + Help section update
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import csv, smtplib, ssl, threading, time, json, re, sys, os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+import csv, smtplib, ssl, threading, queue, re, sys, os, itertools
+import importlib.util
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
+from email_engine import (
+    CONFIG_STORE, MAX_POOL_SIZE, TRANSPORTS, load_config, save_config,
+    personalise, CSVContactSource, RecipientValidator, check_mx_enabled,
+    SendJournal, SMTPPool, Campaign, MessageBuilder, export_eml,
+    SUPPRESSIONS, SUPPRESS_REASONS, Scheduler, parse_when,
+)
+
 try:
     from spellchecker import SpellChecker
     _SPELL_AVAILABLE = True
 except ImportError:
     _SPELL_AVAILABLE = False
 
-try:
-    from cryptography.fernet import Fernet
-    import hashlib, base64
-    _CRYPTO_AVAILABLE = True
-except ImportError:
-    _CRYPTO_AVAILABLE = False
+# encryption itself lives in email_engine; the GUI only reports whether it's on
+_CRYPTO_AVAILABLE = importlib.util.find_spec("cryptography") is not None
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("green")
@@ -389,57 +390,6 @@ FONT_MONO  = ("Courier New", 13)
 FONT_SMALL = ("Courier New", 12)
 FONT_LABEL = ("Courier New", 13, "bold")
 
-CONFIG_FILE  = Path.home() / ".letustech_email_config.enc"
-CONFIG_FILE_LEGACY = Path.home() / ".letustech_email_config.json"
-
-# ── Encryption helpers ──────────────────────────────────────────────────────
-# Key is derived from a machine-specific value so config can't just be
-# copied to another machine and read. Nothing is stored in plain text.
-SENSITIVE_KEYS = {"pass", "user", "host"}  # fields to always encrypt
-
-def _get_key() -> bytes:
-    """Derive a stable Fernet key from a machine identifier."""
-    import uuid
-    machine_id = str(uuid.getnode()).encode()
-    digest = hashlib.sha256(machine_id + b"letustech-v1").digest()
-    return base64.urlsafe_b64encode(digest)
-
-def load_config() -> dict:
-    # Migrate legacy plain-text config if it exists
-    if CONFIG_FILE_LEGACY.exists() and not CONFIG_FILE.exists():
-        try:
-            data = json.loads(CONFIG_FILE_LEGACY.read_text())
-            save_config(data)
-            CONFIG_FILE_LEGACY.unlink()  # remove old plain-text file
-        except Exception:
-            pass
-
-    if not CONFIG_FILE.exists():
-        return {}
-    try:
-        raw = CONFIG_FILE.read_bytes()
-        if _CRYPTO_AVAILABLE:
-            f    = Fernet(_get_key())
-            data = json.loads(f.decrypt(raw).decode())
-        else:
-            # Fallback: base64 only (obfuscation, not true encryption)
-            data = json.loads(base64.b64decode(raw).decode())
-        return data
-    except Exception:
-        return {}
-
-def save_config(data: dict):
-    try:
-        payload = json.dumps(data, indent=2).encode()
-        if _CRYPTO_AVAILABLE:
-            f   = Fernet(_get_key())
-            out = f.encrypt(payload)
-        else:
-            out = base64.b64encode(payload)
-        CONFIG_FILE.write_bytes(out)
-    except Exception:
-        pass
-
 HELP_CONTENT = {
     "Getting Started": """
 WELCOME TO BULK EMAIL SENDER
@@ -605,40 +555,97 @@ STILL STUCK?
 """,
 }
 
-# ── Helpers ─────────────────────────────────────────────────────────────────
-def validate_email(email):
-    return bool(re.match(r"[^@]+@[^@]+\.[^@]+", email.strip()))
-
-def personalise(template, row, config=None):
-    # Build a case-insensitive lookup of the row
-    row_lower = {k.lower().strip(): v for k, v in row.items()}
-
-    # Inject app settings as built-in tags
-    if config:
-        builtins = {
-            "company_name":    config.get("company_name", ""),
-            "sender_name":     config.get("sender_name", ""),
-            "sender_role":     config.get("sender_role", ""),
-            "signature":       config.get("sender_sig", ""),
-            "company_website": config.get("company_website", ""),
-            "company_phone":   config.get("company_phone", ""),
-            "company_address": config.get("company_address", ""),
-        }
-        row_lower.update(builtins)
-        # Auto-append footer if configured
-        footer = config.get("email_footer", "").strip()
-        if footer and footer not in template:
-            template = template.rstrip() + f"\n\n--\n{footer}"
-
-    def replace_tag(match):
-        tag = match.group(1).strip()
-        if tag in row:
-            return row[tag]
-        if tag.lower() in row_lower:
-            return row_lower[tag.lower()]
-        return match.group(0)
-
-    return re.sub(r"\{\{([^}]+)\}\}", replace_tag, template)
+# ── Composer ────────────────────────────────────────────────────────────────
+SPELL_CACHE_SIZE = 20000   # words whose spelling verdict is remembered
+SPELL_SKIP_RE = re.compile(r"\{\{[^}]*\}\}|\[[^\]]*\]")   # {{tags}}, [placeholders]
+SPELL_WORD_RE = re.compile(r"\b[a-zA-Z']+\b")
+
+# {{tags}} and [placeholders] in one pass. The lookaheads let a match start
+# at every {{ or [ so overlapping ones are both found, exactly as two
+# separate searches would.
+HIGHLIGHT_RE  = re.compile(r"(?=(\{\{[^}\n]+\}\})|(\[[^\]\n]+\]))")
+
+# ── UI events ───────────────────────────────────────────────────────────────
+LOG_DIR   = Path.home() / ".letustech_logs"
+LOG_LINES = 2000   # lines kept in the on-screen log; the rest live on disk
+
+class EventBus:
+    """Hands log lines, progress and callbacks from worker threads to Tk.
+
+    Any thread may call log(), progress() or call(). Only the Tk thread
+    calls drain(), once per TICK, so the UI does a fixed amount of work
+    however fast a campaign sends: progress keeps only its latest value,
+    back-to-back identical lines collapse into one with a count, and at
+    most MAX_LINES lines reach the widget per tick. Every line is also
+    appended to a spill file, which holds the full log.
+    """
+
+    TICK      = 100   # ms between drains
+    MAX_LINES = 200   # lines handed to the widget per tick
+
+    def __init__(self, spill_path=None):
+        self.spill_path = spill_path or (
+            LOG_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        self._events   = queue.SimpleQueue()
+        self._lock     = threading.Lock()
+        self._progress = None
+        self._spill    = None
+
+    def log(self, msg, tag="info"):
+        self._events.put((datetime.now().strftime("%H:%M:%S"), msg, tag))
+
+    def progress(self, fraction, text):
+        with self._lock:
+            self._progress = (fraction, text)
+
+    def call(self, fn, *args):
+        """Run ``fn(*args)`` on the Tk thread at the next tick."""
+        self._events.put((None, fn, args))
+
+    def drain(self):
+        """Collect everything posted since the last drain.
+
+        Returns ``(lines, dropped, progress, calls)`` — ``lines`` is a list
+        of ``[ts, msg, tag, repeats]`` capped at MAX_LINES (newest kept),
+        ``dropped`` how many more went to the spill file only, and
+        ``progress`` the latest ``(fraction, text)`` or None.
+        """
+        lines, calls = [], []
+        while True:
+            try:
+                ts, msg, tag = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if ts is None:
+                calls.append((msg, tag))
+            elif lines and lines[-1][1] == msg and lines[-1][2] == tag:
+                lines[-1][3] += 1
+            else:
+                lines.append([ts, msg, tag, 1])
+        if lines:
+            self._write_spill(lines)
+        with self._lock:
+            progress, self._progress = self._progress, None
+        dropped = max(0, len(lines) - self.MAX_LINES)
+        return lines[dropped:], dropped, progress, calls
+
+    def _write_spill(self, lines):
+        try:
+            if self._spill is None:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                self._spill = open(self.spill_path, "a", encoding="utf-8")
+            self._spill.writelines(
+                f"[{ts}] {tag.upper():4} {msg}" +
+                (f"  (x{n})" if n > 1 else "") + "\n"
+                for ts, msg, tag, n in lines)
+            self._spill.flush()
+        except OSError:
+            pass
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
 
 # ══════════════════════════════════════════════════════════════════════════
 class BulkEmailApp(ctk.CTk):
@@ -652,9 +659,13 @@ class BulkEmailApp(ctk.CTk):
         self._config      = load_config()
         self._contacts    = []
         self._csv_headers = []
-        self._attachment  = None
+        self._temp_csv    = None
+        self._attachments = []
         self._sending     = False
         self._stop_flag   = threading.Event()
+        self._events      = EventBus()
+        self._scheduler   = Scheduler(log=self._log_line,
+                                      suppressions=SUPPRESSIONS)
 
         saved_theme = self._config.get("theme", "LetUsTech (Green)")
         self._theme_name = saved_theme if saved_theme in THEMES else "LetUsTech (Green)"
@@ -663,6 +674,9 @@ class BulkEmailApp(ctk.CTk):
         self.configure(fg_color=self._t["bg_main"])
         self._build_ui()
         self._restore_smtp()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(EventBus.TICK, self._pump_events)
+        self._scheduler.start()
 
         # Auto-load CSV if launched from CSV Maker with --load-csv path
         args = sys.argv[1:]
@@ -1233,6 +1247,9 @@ class BulkEmailApp(ctk.CTk):
         self._body.bind("<Control-z>", lambda e: self._body.edit_undo())
         self._body.bind("<Control-y>", lambda e: self._body.edit_redo())
         self._body.bind("<KeyRelease>", self._on_key_release)
+        self._body.bind("<<Modified>>", self._on_body_modified)
+        for ev in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Configure>"):
+            self._body.bind(ev, lambda e: self._schedule_spellcheck(150), add="+")
         self._body.bind("<Button-3>",   self._show_spell_menu)   # right-click
         self._body.bind("<Button-1>",   self._on_left_click)     # left-click on red words
 
@@ -1242,6 +1259,9 @@ class BulkEmailApp(ctk.CTk):
         else:
             self._spell = None
         self._spell_after_id = None
+        self._spell_cache    = OrderedDict()   # word -> misspelled? (LRU)
+        self._spell_checked  = {}              # line -> text last checked
+        self._spell_dirty    = set()           # lines edited since
 
         self._body.insert("1.0",
             "Hi {{first_name}},\n\n"
@@ -1270,12 +1290,33 @@ class BulkEmailApp(ctk.CTk):
                                         state="disabled")
         self._stop_btn.pack(side="right", padx=(0, 6), pady=8)
 
+        self._resume_btn = ctk.CTkButton(bar, text="⟳ Resume", font=FONT_SMALL,
+                                          fg_color="transparent",
+                                          border_color=t["border"],
+                                          border_width=1,
+                                          text_color=t["text_dim"],
+                                          hover_color=t["bg_input"], width=90,
+                                          command=lambda: self._start_send(resume=True))
+        self._resume_btn.pack(side="right", padx=(0, 6), pady=8)
+
         ctk.CTkButton(bar, text="Preview", font=FONT_SMALL,
                       fg_color="transparent", border_color=t["border"],
                       border_width=1, text_color=t["text_dim"],
                       hover_color=t["bg_input"], width=90,
                       command=self._preview).pack(side="left", padx=(14,4), pady=8)
 
+        ctk.CTkButton(bar, text="Dry Run", font=FONT_SMALL,
+                      fg_color="transparent", border_color=t["border"],
+                      border_width=1, text_color=t["text_dim"],
+                      hover_color=t["bg_input"], width=90,
+                      command=self._start_dry_run).pack(side="left", padx=4, pady=8)
+
+        ctk.CTkButton(bar, text="🕑 Schedule", font=FONT_SMALL,
+                      fg_color="transparent", border_color=t["border"],
+                      border_width=1, text_color=t["text_dim"],
+                      hover_color=t["bg_input"], width=100,
+                      command=self._open_scheduler).pack(side="left", padx=4, pady=8)
+
         ctk.CTkButton(bar, text="🔍 Tag Inspector", font=FONT_SMALL,
                       fg_color="transparent", border_color=t["accent"],
                       border_width=1, text_color=t["accent"],
@@ -1416,6 +1457,33 @@ class BulkEmailApp(ctk.CTk):
 
         hint(f_smtp, "For Gmail: use an App Password (myaccount.google.com → Security → App Passwords).")
 
+        ctk.CTkLabel(f_smtp, text="Transport", font=FONT_LABEL,
+                     text_color=t["text_dim"]).pack(anchor="w", padx=20, pady=(10, 2))
+        transport_row = ctk.CTkFrame(f_smtp, fg_color="transparent")
+        transport_row.pack(fill="x", padx=20)
+        v_transport = ctk.StringVar(value=self._config.get("transport", "smtplib"))
+        ctk.CTkOptionMenu(transport_row, variable=v_transport,
+                          values=list(TRANSPORTS),
+                          fg_color=t["bg_input"], button_color=t["accent_dim"],
+                          dropdown_fg_color=t["bg_card"],
+                          font=FONT_MONO, width=160).pack(side="left")
+        hint(f_smtp, "asyncio runs every connection on one event loop and pipelines "
+                     "commands when the server supports it. smtplib is the safe default.")
+
+        v_pool = fld(f_smtp, "Parallel Connections", "pool_size", "1")
+        hint(f_smtp, f"How many SMTP connections send at once (1–{MAX_POOL_SIZE}). "
+                     "Only raise this if your provider allows it.")
+        v_depth = fld(f_smtp, "Send Queue Depth", "queue_depth",
+                      str(SMTPPool.LOOKAHEAD))
+        hint(f_smtp, "Emails built ahead of the connections. Lower it if large "
+                     "attachments use too much memory.")
+        v_domain_rate = fld(f_smtp, "Per-Domain Limit (emails/min)",
+                            "domain_rate", "0 = no limit")
+        v_domain_over = fld(f_smtp, "Domain Overrides", "domain_overrides",
+                            "e.g. gmail.com=20, outlook.com=10")
+        hint(f_smtp, "Caps how fast any one recipient domain is sent to. Other "
+                     "domains keep sending while a busy one waits.")
+
         # Common providers reference
         ctk.CTkLabel(f_smtp, text="COMMON PROVIDERS", font=FONT_LABEL,
                      text_color=t["text_dim"]).pack(anchor="w", padx=20, pady=(16, 6))
@@ -1478,11 +1546,11 @@ class BulkEmailApp(ctk.CTk):
                             s.ehlo()
                     s.login(user, pwd)
                     s.quit()
-                    win.after(0, lambda: test_result.configure(
+                    self._events.call(lambda: test_result.configure(
                         text=f"✓  Connected to {host} as {user}",
                         text_color=t["accent"]))
                 except Exception as e:
-                    win.after(0, lambda err=e: test_result.configure(
+                    self._events.call(lambda err=e: test_result.configure(
                         text=f"✗  {type(err).__name__}: {err}",
                         text_color=RED))
             _th.Thread(target=_run, daemon=True).start()
@@ -1505,7 +1573,19 @@ class BulkEmailApp(ctk.CTk):
                            "e.g. Unsubscribe: [link] | letustech.uk")
         hint(f_defaults, "Auto-appended to every email. Leave blank to disable.")
         v_delay     = fld(f_defaults, "Default Send Delay (seconds)", "default_delay", "1")
-        hint(f_defaults, "Seconds to wait between each email. Helps avoid spam filters.")
+        hint(f_defaults, "Minimum gap between emails across the whole campaign. Helps avoid spam filters.")
+
+        ctk.CTkLabel(f_defaults, text="Check Recipient Domains", font=FONT_LABEL,
+                     text_color=t["text_dim"]).pack(anchor="w", padx=20, pady=(10, 2))
+        mx_row = ctk.CTkFrame(f_defaults, fg_color="transparent")
+        mx_row.pack(fill="x", padx=20)
+        v_check_mx = ctk.StringVar(value=self._config.get("check_mx", "On"))
+        ctk.CTkOptionMenu(mx_row, variable=v_check_mx, values=["On", "Off"],
+                          fg_color=t["bg_input"], button_color=t["accent_dim"],
+                          dropdown_fg_color=t["bg_card"],
+                          font=FONT_MONO, width=160).pack(side="left")
+        hint(f_defaults, "Looks up each domain once when a list is imported and skips "
+                         "addresses whose domain can't receive email.")
 
         # ── Tab: Branding ─────────────────────────────────────────────────
         f_branding = make_scroll(content_area)
@@ -1557,9 +1637,15 @@ class BulkEmailApp(ctk.CTk):
                 "user":              v_user.get().strip(),
                 "pass":              v_pass.get(),
                 "tls":               v_tls.get(),
+                "transport":         v_transport.get(),
+                "pool_size":         v_pool.get().strip(),
+                "queue_depth":       v_depth.get().strip(),
+                "domain_rate":       v_domain_rate.get().strip(),
+                "domain_overrides":  v_domain_over.get().strip(),
                 "default_from_name": v_from_name.get().strip(),
                 "email_footer":      v_footer.get().strip(),
                 "default_delay":     v_delay.get().strip(),
+                "check_mx":          v_check_mx.get(),
                 "brand_colour":      v_colour.get().strip(),
             }
             self._config.update(updates)
@@ -1625,6 +1711,53 @@ class BulkEmailApp(ctk.CTk):
              "Your app password and settings are stored encrypted on your machine. "
              "The config file cannot be read without your machine's unique ID.")
 
+        sec(f_privacy, "⛔  SUPPRESSION LIST")
+        hint(f_privacy,
+             "Addresses whose mail server rejected them for good (5xx), or that "
+             "failed temporarily (4xx) 3 campaigns in a row, are skipped in "
+             "every later campaign.")
+        supp_lbl = ctk.CTkLabel(f_privacy, text="Loading…", font=FONT_MONO,
+                                text_color=t["text_dim"], anchor="w")
+        supp_lbl.pack(anchor="w", padx=20, pady=(4, 6))
+
+        def show_suppressions():
+            counts = SUPPRESSIONS.counts()   # reads the file the first time
+            text = (", ".join(f"{n:,} {SUPPRESS_REASONS.get(r, r)}"
+                              for r, n in counts.most_common())
+                    if counts else "No suppressed addresses.")
+            self._events.call(lambda: supp_lbl.winfo_exists() and
+                              supp_lbl.configure(text=text))
+        threading.Thread(target=show_suppressions, daemon=True).start()
+
+        def export_suppressions():
+            path = filedialog.asksaveasfilename(
+                parent=win, defaultextension=".csv",
+                filetypes=[("CSV", "*.csv")], initialfile="suppressed.csv")
+            if path:
+                n = SUPPRESSIONS.export(path)
+                self._log_line(f"Exported {n:,} suppressed addresses to {path}", "ok")
+
+        def clear_suppressions():
+            if messagebox.askyesno("Clear suppression list",
+                "Forget every suppressed address?\n\n"
+                "Addresses that bounced will be tried again next campaign."):
+                SUPPRESSIONS.clear()
+                supp_lbl.configure(text="No suppressed addresses.")
+                self._log_line("Suppression list cleared.", "warn")
+
+        supp_row = ctk.CTkFrame(f_privacy, fg_color="transparent")
+        supp_row.pack(anchor="w", padx=20)
+        ctk.CTkButton(supp_row, text="Export…", font=FONT_SMALL,
+                      fg_color="transparent", border_color=t["border"],
+                      border_width=1, text_color=t["text_dim"],
+                      hover_color=t["bg_input"], width=100,
+                      command=export_suppressions).pack(side="left", padx=(0, 8))
+        ctk.CTkButton(supp_row, text="Clear List", font=FONT_SMALL,
+                      fg_color="transparent", border_color=ORANGE,
+                      border_width=1, text_color=ORANGE,
+                      hover_color="#1a0f00", width=100,
+                      command=clear_suppressions).pack(side="left")
+
         sec(f_privacy, "🗑️  CLEAR SAVED DATA")
         hint(f_privacy, "Use these buttons to remove saved data from your machine.")
 
@@ -1649,11 +1782,7 @@ class BulkEmailApp(ctk.CTk):
                 "This will remove ALL saved settings including company info, "
                 "credentials and preferences.\n\nAre you sure?"):
                 self._config.clear()
-                save_config({})
-                try:
-                    CONFIG_FILE.unlink()
-                except Exception:
-                    pass
+                CONFIG_STORE.clear()
                 self._log_line("All saved data cleared.", "warn")
                 messagebox.showinfo("Done",
                     "All data cleared.\n\nRestart the app to start fresh.")
@@ -1801,9 +1930,34 @@ class BulkEmailApp(ctk.CTk):
         return entry
 
     def _log_line(self, msg, tag="info"):
-        ts = datetime.now().strftime("%H:%M:%S")
+        """Queue a log line — safe to call from any thread."""
+        self._events.log(msg, tag)
+
+    def _pump_events(self):
+        """Apply everything worker threads posted since the last tick."""
+        self.after(EventBus.TICK, self._pump_events)
+        lines, dropped, progress, calls = self._events.drain()
+        if lines:
+            self._write_log(lines, dropped)
+        if progress:
+            self._progress_var.set(progress[0])
+            self._prog_label.configure(text=progress[1])
+        for fn, args in calls:
+            fn(*args)
+
+    def _write_log(self, lines, dropped):
+        chunks = []
+        if dropped:
+            chunks += [f"… {dropped} more lines — full log: "
+                       f"{self._events.spill_path}\n", "info"]
+        for ts, msg, tag, n in lines:
+            repeat = f"  (×{n})" if n > 1 else ""
+            chunks += [f"[{ts}] {msg}{repeat}\n", tag]
         self._log.configure(state="normal")
-        self._log.insert("end", f"[{ts}] {msg}\n", tag)
+        self._log.insert("end", *chunks)
+        excess = int(self._log.index("end-1c").split(".")[0]) - LOG_LINES
+        if excess > 0:
+            self._log.delete("1.0", f"{excess + 1}.0")
         self._log.see("end")
         self._log.configure(state="disabled")
 
@@ -1956,38 +2110,16 @@ class BulkEmailApp(ctk.CTk):
     def _load_csv_path(self, path):
         """Load a CSV directly from a file path — used by --load-csv arg."""
         try:
-            with open(path, newline="", encoding="utf-8-sig") as f:
-                reader = csv.DictReader(f)
-                rows    = list(reader)
-                headers = reader.fieldnames or []
-            if not rows:
+            source = CSVContactSource(path)
+            if not source or not source.email_col:
                 return
-            email_col = next(
-                (h for h in headers if "email" in h.lower()), None)
-            if not email_col:
-                return
-            self._contacts    = rows
-            self._csv_headers = headers
-            valid = sum(1 for r in rows if validate_email(r.get(email_col, "")))
-            self._contact_info.configure(
-                text=f"{valid} valid / {len(rows)} total",
-                text_color=self._t["accent"])
-            self._contacts_status_label.configure(
-                text=f"{valid} contacts loaded",
-                text_color=self._t["accent"])
+            self._temp_csv = path   # streamed from disk — removed on close
+            tags_str = ", ".join("{{" + h + "}}" for h in source.headers)
+            self._use_contacts(source, lambda total:
+                f"Auto-loaded {total} contacts from CSV Maker — tags: {tags_str}")
             # Open contacts accordion so user sees it
             if not self._contacts_open:
                 self._toggle_contacts()
-            tags_str = ", ".join("{{" + h + "}}" for h in headers)
-            self._log_line(
-                f"Auto-loaded {len(rows)} contacts from CSV Maker — "
-                f"tags: {tags_str}", "ok")
-            self._render_tag_panel()
-            # Clean up temp file
-            try:
-                os.unlink(path)
-            except Exception:
-                pass
         except Exception as e:
             self._log_line(f"Auto-load failed: {e}", "err")
 
@@ -1998,37 +2130,69 @@ class BulkEmailApp(ctk.CTk):
         if not path:
             return
         try:
-            with open(path, newline="", encoding="utf-8-sig") as f:
-                reader = csv.DictReader(f)
-                rows    = list(reader)
-                headers = reader.fieldnames or []
-            if not rows:
+            source = CSVContactSource(path)
+            if not source:
                 messagebox.showwarning("Empty CSV", "No data rows found.")
                 return
-            email_col = next(
-                (h for h in headers if "email" in h.lower()), None)
-            if not email_col:
+            if not source.email_col:
                 messagebox.showerror("No email column",
                     "CSV must have a column with 'email' in the name.")
                 return
-            self._contacts    = rows
-            self._csv_headers = headers
-            valid = sum(1 for r in rows
-                        if validate_email(r.get(email_col, "")))
-            self._contact_info.configure(
-                text=f"{valid} valid / {len(rows)} total",
-                text_color=self._t["accent"])
-            self._contacts_status_label.configure(
-                text=f"✓  {valid} contacts loaded",
-                text_color=self._t["accent"])
-            self._log_line(
-                f"Loaded {len(rows)} contacts — "
-                f"columns: {', '.join(headers)}", "ok")
-            # Refresh tag panel so CSV columns appear as buttons
-            self._render_tag_panel()
+            self._use_contacts(source, lambda total:
+                f"Loaded {total} contacts — columns: {', '.join(source.headers)}")
         except Exception as e:
             messagebox.showerror("CSV Error", str(e))
 
+    def _use_contacts(self, source, describe):
+        """Switch to a new contact source and count it in the background."""
+        self._contacts    = source
+        self._csv_headers = source.headers
+        self._contact_info.configure(text="Counting contacts…",
+                                      text_color=self._t["text_dim"])
+        self._contacts_status_label.configure(text="Counting contacts…",
+                                               text_color=self._t["text_dim"])
+        # Refresh tag panel so CSV columns appear as buttons
+        self._render_tag_panel()
+        validator = RecipientValidator(check_mx=check_mx_enabled(self._config),
+                                       suppressions=SUPPRESSIONS)
+        threading.Thread(target=source.scan, args=(validator,),
+                         daemon=True).start()
+        self._watch_contacts(source, describe)
+
+    def _watch_contacts(self, source, describe):
+        """Poll a scanning source from the Tk thread and update the counters."""
+        if source is not self._contacts:
+            return   # another file was loaded meanwhile
+        if not source.done.is_set():
+            self._contact_info.configure(
+                text=f"Checking {source.checking:,} domains…" if source.checking
+                else f"Counting… {source.total:,} rows")
+            self.after(200, self._watch_contacts, source, describe)
+            return
+        if source.error:
+            self._log_line(f"CSV error: {source.error}", "err")
+        valid, total = source.valid, source.total
+        self._contact_info.configure(
+            text=f"{valid} valid / {total} total",
+            text_color=self._t["accent"])
+        self._contacts_status_label.configure(
+            text=f"✓  {valid} contacts loaded",
+            text_color=self._t["accent"])
+        self._log_line(describe(total), "ok")
+        if source.validator and source.validator.rejected:
+            self._log_line(f"Will skip {source.validator.describe()}.", "warn")
+
+    def _on_close(self):
+        self._scheduler.stop()
+        self._events.close()
+        CONFIG_STORE.flush()
+        if self._temp_csv:
+            try:
+                os.unlink(self._temp_csv)
+            except Exception:
+                pass
+        self.destroy()
+
     def _export_sample(self):
         path = filedialog.asksaveasfilename(
             defaultextension=".csv",
@@ -2044,21 +2208,32 @@ class BulkEmailApp(ctk.CTk):
         self._log_line("Sample CSV saved.", "ok")
 
     def _pick_attachment(self):
-        path = filedialog.askopenfilename(title="Select attachment")
-        if path:
-            self._attachment = path
+        paths = filedialog.askopenfilenames(title="Select attachments")
+        new = [p for p in paths if p not in self._attachments]
+        if not new:
+            return
+        self._attachments.extend(new)
+        for path in new:
             p = Path(path)
-            # File size
-            try:
-                size = p.stat().st_size
-                if size < 1024:
-                    size_str = f"{size} B"
-                elif size < 1024 * 1024:
-                    size_str = f"{size/1024:.1f} KB"
-                else:
-                    size_str = f"{size/1024/1024:.1f} MB"
-            except Exception:
-                size_str = ""
+            self._log_line(f"Attachment: {p.name} ({self._fmt_size_str(p)})", "ok")
+        self._update_attachment_card()
+
+    @staticmethod
+    def _fmt_size_str(p):
+        try:
+            size = p.stat().st_size
+            if size < 1024:
+                return f"{size} B"
+            elif size < 1024 * 1024:
+                return f"{size/1024:.1f} KB"
+            return f"{size/1024/1024:.1f} MB"
+        except Exception:
+            return ""
+
+    def _update_attachment_card(self):
+        paths = [Path(p) for p in self._attachments]
+        if len(paths) == 1:
+            p = paths[0]
             # Icon by extension
             ext = p.suffix.lower()
             icon = {"pdf": "📄", "doc": "📝", "docx": "📝",
@@ -2069,12 +2244,18 @@ class BulkEmailApp(ctk.CTk):
             self._att_icon.configure(text=icon)
             self._att_name.configure(text=p.name[:34],
                                       text_color=self._t["accent"])
-            self._att_size.configure(text=f"{ext.upper().lstrip('.')} · {size_str}")
-            self._att_remove_btn.configure(state="normal")
-            self._log_line(f"Attachment: {p.name} ({size_str})", "ok")
+            self._att_size.configure(
+                text=f"{ext.upper().lstrip('.')} · {self._fmt_size_str(p)}")
+        else:
+            self._att_icon.configure(text="📎")
+            self._att_name.configure(text=f"{len(paths)} files attached",
+                                      text_color=self._t["accent"])
+            self._att_size.configure(
+                text=", ".join(p.name for p in paths)[:40])
+        self._att_remove_btn.configure(state="normal")
 
     def _remove_attachment(self):
-        self._attachment = None
+        self._attachments = []
         self._att_icon.configure(text="📎", text_color=self._t["text_dim"])
         self._att_name.configure(text="No file attached",
                                   text_color=self._t["text_dim"])
@@ -2341,46 +2522,103 @@ class BulkEmailApp(ctk.CTk):
             self._spell_btn.configure(
                 text="✓ Spell",
                 fg_color=t["accent_dim"], text_color="#000")
+            self._spell_checked.clear()
             self._run_spellcheck()
         else:
             self._spell_btn.configure(
                 text="○ Spell",
                 fg_color="transparent", text_color=t["text_dim"])
             self._body.tag_remove("misspelled", "1.0", "end")
+            self._spell_checked.clear()
 
     def _on_key_release(self, event=None):
-        self._highlight_body()
+        # The lines this key touched: the cursor line, the one above
+        # (Return / BackSpace) and any lines a paste just added.  Both the
+        # tag highlighter and the spellchecker work from the same range.
+        line  = int(self._body.index("insert").split(".")[0])
+        added = int(self._body.index("end-1c").split(".")[0]) - \
+            self._body_lines
+        first = max(1, line - 1 - max(added, 0))
+        self._highlight_body(first, line + 1)
         if self._spell_on and _SPELL_AVAILABLE:
-            # Debounce — run spellcheck 600ms after last keypress
-            if self._spell_after_id:
-                self.after_cancel(self._spell_after_id)
-            self._spell_after_id = self.after(600, self._run_spellcheck)
+            self._spell_dirty.update(range(first, line + 1))
+            self._schedule_spellcheck()
+
+    def _on_body_modified(self, event=None):
+        """Any edit — typed, pasted or done in code — queues a viewport check."""
+        self._body.edit_modified(False)
+        self._schedule_spellcheck()
+
+    def _schedule_spellcheck(self, delay=600):
+        """Debounce: check spelling ``delay`` ms after the last change."""
+        if not self._spell_on or not _SPELL_AVAILABLE:
+            return
+        if self._spell_after_id:
+            self.after_cancel(self._spell_after_id)
+        self._spell_after_id = self.after(delay, self._run_spellcheck)
 
     def _run_spellcheck(self):
-        """Find all misspelled words and tag them red."""
+        """Tag misspelled words red — on visible lines that need it only.
+
+        A line is checked when a key event marked it dirty or its text no
+        longer matches what was last checked there (pastes, templates,
+        lines shifting). Unchecked lines off screen wait until they are
+        scrolled into view. Words go through an LRU cache and every word
+        not in it is looked up in one batched unknown() call.
+        """
+        self._spell_after_id = None
         if not self._spell_on or not _SPELL_AVAILABLE:
             return
         body = self._body
-        body.tag_remove("misspelled", "1.0", "end")
-        full_text = body.get("1.0", "end")
-
-        # Extract plain words only — skip {{tags}} and [placeholders]
-        # We tokenise line by line to get accurate positions
-        for line_num, line in enumerate(full_text.split("\n"), start=1):
-            # Skip words inside {{ }} or [ ]
-            clean = re.sub(r"\{\{[^}]*\}\}", lambda m: " " * len(m.group()), line)
-            clean = re.sub(r"\[[^\]]*\]",    lambda m: " " * len(m.group()), clean)
-
-            for match in re.finditer(r"\b[a-zA-Z']+\b", clean):
-                word = match.group()
-                # Skip very short words, proper-noun-like (capitalised mid-sentence), numbers
+        first = int(body.index("@0,0").split(".")[0])
+        last  = int(body.index(f"@0,{body.winfo_height()}").split(".")[0])
+        lines = int(body.index("end-1c").split(".")[0])
+        checked, dirty = self._spell_checked, self._spell_dirty
+        for n in [n for n in checked if n > lines]:
+            del checked[n]
+        dirty.intersection_update(range(1, lines + 1))
+
+        todo = []
+        for n in range(first, last + 1):
+            text = body.get(f"{n}.0", f"{n}.end")
+            if n in dirty or checked.get(n) != text:
+                todo.append((n, text))
+        if not todo:
+            return
+
+        found, new = [], set()
+        for n, text in todo:
+            clean = SPELL_SKIP_RE.sub(lambda m: " " * len(m.group()), text)
+            for m in SPELL_WORD_RE.finditer(clean):
+                word = m.group().lower()
                 if len(word) <= 2:
                     continue
-                # Check spelling
-                if self._spell.unknown([word.lower()]):
-                    start = f"{line_num}.{match.start()}"
-                    end   = f"{line_num}.{match.end()}"
-                    body.tag_add("misspelled", start, end)
+                found.append((n, m.start(), m.end(), word))
+                if word not in self._spell_cache:
+                    new.add(word)
+        unknown = self._spell.unknown(new) if new else set()
+        cache = self._spell_cache
+        for word in new:
+            cache[word] = word in unknown
+        while len(cache) > SPELL_CACHE_SIZE:
+            cache.popitem(last=False)
+
+        for n, text in todo:
+            body.tag_remove("misspelled", f"{n}.0", f"{n}.end")
+            checked[n] = text
+            dirty.discard(n)
+        for n, start, end, word in found:
+            if word in cache:
+                cache.move_to_end(word)
+            if self._is_misspelled(word):
+                body.tag_add("misspelled", f"{n}.{start}", f"{n}.{end}")
+
+    def _is_misspelled(self, word):
+        """Cached spell lookup for one lower-cased word."""
+        hit = self._spell_cache.get(word)
+        if hit is None:
+            hit = self._spell_cache[word] = bool(self._spell.unknown([word]))
+        return hit
 
     def _show_spell_menu(self, event):
         """Right-click: if on a misspelled word show suggestions, always show standard options."""
@@ -2402,7 +2640,7 @@ class BulkEmailApp(ctk.CTk):
         is_misspelled = (
             _SPELL_AVAILABLE and self._spell_on and
             len(word_clean) > 2 and
-            bool(self._spell.unknown([word_clean.lower()]))
+            self._is_misspelled(word_clean.lower())
         )
 
         if is_misspelled and word_clean:
@@ -2458,50 +2696,46 @@ class BulkEmailApp(ctk.CTk):
     def _replace_word(self, start, end, replacement):
         self._body.delete(start, end)
         self._body.insert(start, replacement)
+        self._spell_dirty.add(int(self._body.index(start).split(".")[0]))
         self._run_spellcheck()
         self._highlight_body()
 
     def _add_to_dict(self, word):
         if self._spell:
             self._spell.word_frequency.add(word.lower())
+            self._spell_cache.pop(word.lower(), None)
+            # The word may be underlined anywhere, so look at every line again
+            self._spell_checked.clear()
             self._run_spellcheck()
             self._log_line(f'Added "{word}" to dictionary.', "ok")
 
-    def _highlight_body(self):
-        """Highlight {{csv_tags}} in accent colour and [placeholders] in orange."""
-        body = self._body
-        for tag in ("csv_tag", "placeholder"):
-            body.tag_remove(tag, "1.0", "end")
-        # {{tags}}
-        start = "1.0"
-        while True:
-            pos = body.search(r"\{\{[^}]+\}\}", start, "end", regexp=True)
-            if not pos:
-                break
-            match_end = body.index(f"{pos} wordend")
-            # find the closing }}
-            line_text = body.get(pos, f"{pos} lineend")
-            m = re.search(r"\{\{[^}]+\}\}", line_text)
-            if m:
-                end_pos = f"{pos}+{m.end()}c"
-                body.tag_add("csv_tag", pos, end_pos)
-                start = end_pos
-            else:
-                start = match_end
-        # [placeholders]
-        start = "1.0"
-        while True:
-            pos = body.search(r"\[[^\]]+\]", start, "end", regexp=True)
-            if not pos:
-                break
-            line_text = body.get(pos, f"{pos} lineend")
-            m = re.search(r"\[[^\]]+\]", line_text)
-            if m:
-                end_pos = f"{pos}+{m.end()}c"
-                body.tag_add("placeholder", pos, end_pos)
-                start = end_pos
-            else:
-                start = f"{pos}+1c"
+    def _highlight_body(self, first=None, last=None):
+        """Highlight {{csv_tags}} in accent colour and [placeholders] in orange.
+
+        Only lines ``first``..``last`` are rescanned (the whole body when
+        not given) — both tag kinds live within a single line.
+        """
+        body  = self._body
+        lines = int(body.index("end-1c").split(".")[0])
+        self._body_lines = lines
+        first = max(1, first or 1)
+        last  = min(lines, last or lines)
+        if first > last:
+            return
+        start, end = f"{first}.0", f"{last}.end"
+        ranges = {"csv_tag": [], "placeholder": []}
+        for n, text in enumerate(body.get(start, end).split("\n"), first):
+            free = {"csv_tag": 0, "placeholder": 0}
+            for m in HIGHLIGHT_RE.finditer(text):
+                for tag, group in (("csv_tag", 1), ("placeholder", 2)):
+                    hit = m.group(group)
+                    if hit and m.start() >= free[tag]:
+                        free[tag] = m.start() + len(hit)
+                        ranges[tag] += [f"{n}.{m.start()}", f"{n}.{free[tag]}"]
+        for tag, spans in ranges.items():
+            body.tag_remove(tag, start, end)
+            if spans:
+                body.tag_add(tag, *spans)
 
     def _fill_placeholders(self):
         """Scan body + subject for [placeholders] and walk user through filling them."""
@@ -2899,6 +3133,10 @@ class BulkEmailApp(ctk.CTk):
             messagebox.showinfo("No contacts",
                 "Import a CSV first to use the Tag Inspector.")
             return
+        if not self._contacts.done.is_set():
+            messagebox.showinfo("Still counting",
+                "Contacts are still being counted — try again in a moment.")
+            return
 
         win = ctk.CTkToplevel(self)
         win.title("Tag Inspector")
@@ -3080,60 +3318,467 @@ class BulkEmailApp(ctk.CTk):
 
         refresh()
 
+    PREVIEW_PAGE = 50
+
     def _preview(self):
-        if not self._contacts:
+        """Page through the rendered message for every contact.
+
+        The templates are compiled once when the window opens (↻ picks up
+        edits), so flipping between contacts only fills in values.
+        Filled-in tags are shown in the accent colour, tags that came out
+        blank or unknown in orange.
+        """
+        src = self._contacts
+        if not src:
             messagebox.showinfo("No contacts", "Import a CSV to preview.")
             return
-        t    = self._t
-        row  = self._contacts[0]
-        subj = personalise(self._subject.get(), row, self._config)
-        body = personalise(self._body.get("1.0", "end"), row, self._config)
-        win  = ctk.CTkToplevel(self)
-        win.title("Preview — First Contact")
-        win.geometry("640x500")
+        if not src.done.is_set():
+            messagebox.showinfo("Still counting",
+                "Contacts are still being counted — try again in a moment.")
+            return
+        t     = self._t
+        total = len(src)
+        page  = self.PREVIEW_PAGE
+        state = {"i": 0, "page": None, "rows": [], "builder": None,
+                 "search": None}
+        col   = src.email_col
+
+        def compile_():
+            state["builder"] = MessageBuilder(
+                self._subject.get().strip(), self._body.get("1.0", "end").strip(),
+                src.headers, self._config,
+                user=self._get_smtp()[2], from_name=self._from_name.get().strip(),
+                html=self._html_var.get())
+
+        win = ctk.CTkToplevel(self)
+        win.title("Preview")
+        win.geometry("980x640")
         win.configure(fg_color=t["bg_main"])
-        ctk.CTkLabel(win, text="PREVIEW", font=FONT_HEAD,
-                     text_color=t["accent"]
-                     ).pack(anchor="w", padx=20, pady=(16, 4))
-        ctk.CTkLabel(win, text=f"To:      {row.get('email', '?')}",
-                     font=FONT_MONO, text_color=t["text_dim"]
-                     ).pack(anchor="w", padx=20)
-        ctk.CTkLabel(win, text=f"Subject: {subj}",
-                     font=FONT_MONO, text_color=t["text_dim"]
-                     ).pack(anchor="w", padx=20)
-        ctk.CTkFrame(win, fg_color=t["border"], height=1
-                     ).pack(fill="x", padx=20, pady=10)
-        txt = tk.Text(win, font=FONT_MONO,
+
+        # ── Navigator ─────────────────────────────────────────────────────
+        nav = ctk.CTkFrame(win, fg_color=t["bg_card"], corner_radius=0, height=44)
+        nav.pack(fill="x")
+        nav.pack_propagate(False)
+        counter_lbl = ctk.CTkLabel(nav, text="", font=FONT_LABEL,
+                                   text_color=t["text_main"])
+        counter_lbl.pack(side="left", padx=18)
+        ctk.CTkButton(nav, text="◀ Prev", font=FONT_SMALL,
+                      fg_color="transparent", border_color=t["border"],
+                      border_width=1, text_color=t["text_dim"],
+                      hover_color=t["bg_input"], width=80,
+                      command=lambda: show(state["i"] - 1)
+                      ).pack(side="left", padx=4, pady=8)
+        ctk.CTkButton(nav, text="▶ Next", font=FONT_SMALL,
+                      fg_color=t["accent_dim"], text_color="#000",
+                      hover_color=t["accent"], width=80,
+                      command=lambda: show(state["i"] + 1)
+                      ).pack(side="left", padx=4, pady=8)
+        ctk.CTkLabel(nav, text="Jump to:", font=FONT_SMALL,
+                     text_color=t["text_dim"]).pack(side="left", padx=(12, 4))
+        jump_var = ctk.StringVar(value="1")
+        jump_entry = ctk.CTkEntry(nav, textvariable=jump_var, font=FONT_SMALL,
+                                  width=80, fg_color=t["bg_input"],
+                                  border_color=t["border"],
+                                  text_color=t["text_main"])
+        jump_entry.pack(side="left", pady=8)
+        jump_entry.bind("<Return>", lambda e: jump())
+
+        ctk.CTkButton(nav, text="Export .eml…", font=FONT_SMALL,
+                      fg_color="transparent", border_color=t["border"],
+                      border_width=1, text_color=t["text_dim"],
+                      hover_color=t["bg_input"], width=110,
+                      command=lambda: export()).pack(side="right", padx=(4, 14), pady=8)
+        ctk.CTkButton(nav, text="↻ Refresh", font=FONT_SMALL,
+                      fg_color="transparent", border_color=t["border"],
+                      border_width=1, text_color=t["text_dim"],
+                      hover_color=t["bg_input"], width=90,
+                      command=lambda: (compile_(), load_page(force=True))
+                      ).pack(side="right", padx=4, pady=8)
+        search_var = ctk.StringVar()
+        search_entry = ctk.CTkEntry(nav, textvariable=search_var,
+                                    font=FONT_SMALL, width=180,
+                                    placeholder_text="Find contact…",
+                                    fg_color=t["bg_input"],
+                                    border_color=t["border"],
+                                    text_color=t["text_main"])
+        search_entry.pack(side="right", padx=4, pady=8)
+        search_entry.bind("<Return>", lambda e: search())
+
+        # ── Body: contact list + rendered message ────────────────────────
+        body = ctk.CTkFrame(win, fg_color=t["bg_main"])
+        body.pack(fill="both", expand=True)
+        body.columnconfigure(0, weight=1)
+        body.columnconfigure(1, weight=3)
+        body.rowconfigure(0, weight=1)
+
+        listbox = tk.Listbox(body, font=FONT_SMALL, activestyle="none",
+                             bg=t["bg_sidebar"], fg=t["text_main"],
+                             selectbackground=t["accent_dim"],
+                             selectforeground="#000",
+                             relief="flat", bd=0, highlightthickness=0,
+                             exportselection=False)
+        listbox.grid(row=0, column=0, sticky="nsew", padx=(12, 4), pady=12)
+        listbox.bind("<<ListboxSelect>>", lambda e: listbox.curselection() and
+                     show(state["page"] + listbox.curselection()[0]))
+
+        msg_frame = ctk.CTkFrame(body, fg_color=t["bg_main"], corner_radius=0)
+        msg_frame.grid(row=0, column=1, sticky="nsew", padx=(4, 12), pady=12)
+        msg_frame.rowconfigure(3, weight=1)
+        msg_frame.columnconfigure(0, weight=1)
+        to_lbl = ctk.CTkLabel(msg_frame, text="", font=FONT_MONO,
+                              text_color=t["text_dim"], anchor="w")
+        to_lbl.grid(row=0, column=0, sticky="ew")
+        subj_lbl = ctk.CTkLabel(msg_frame, text="", font=FONT_MONO,
+                                text_color=t["text_dim"], anchor="w")
+        subj_lbl.grid(row=1, column=0, sticky="ew")
+        missing_lbl = ctk.CTkLabel(msg_frame, text="", font=FONT_SMALL,
+                                   text_color=ORANGE, anchor="w")
+        missing_lbl.grid(row=2, column=0, sticky="ew", pady=(0, 6))
+        txt = tk.Text(msg_frame, font=FONT_MONO,
                       bg=t["bg_card"], fg=t["text_main"],
                       relief="flat", bd=0, padx=14, pady=10,
-                      highlightthickness=0, wrap="word")
-        txt.pack(fill="both", expand=True, padx=20, pady=(0, 20))
-        txt.insert("1.0", body)
-        txt.configure(state="disabled")
+                      highlightthickness=0, wrap="word", state="disabled")
+        txt.grid(row=3, column=0, sticky="nsew")
+        txt.tag_configure("value", foreground=t["accent"])
+        txt.tag_configure("missing", foreground=ORANGE, underline=True)
+
+        status_lbl = ctk.CTkLabel(win, text="", font=FONT_SMALL,
+                                  text_color=t["text_dim"], anchor="w")
+        status_lbl.pack(fill="x", padx=14, pady=(0, 8))
+
+        # ── Behaviour ─────────────────────────────────────────────────────
+        def load_page(force=False):
+            start = state["i"] // page * page
+            if force or start != state["page"]:
+                state["page"] = start
+                state["rows"] = list(itertools.islice(src.iter_rows(start), page))
+                builder = state["builder"]
+                listbox.delete(0, "end")
+                for n, row in enumerate(state["rows"], start + 1):
+                    gaps = len(builder.unresolved(row))
+                    listbox.insert("end", f"{n:>6}  {row.get(col, '')}"
+                                          + (f"  ⚠{gaps}" if gaps else ""))
+            render()
+
+        def render():
+            i, builder = state["i"], state["builder"]
+            row = state["rows"][i - state["page"]]
+            listbox.selection_clear(0, "end")
+            listbox.selection_set(i - state["page"])
+            listbox.see(i - state["page"])
+            counter_lbl.configure(text=f"Contact {i + 1:,} of {total:,}")
+            jump_var.set(str(i + 1))
+            to_lbl.configure(text=f"To:      {row.get(col, '?')}")
+            subj_lbl.configure(
+                text=f"Subject: {builder.subject.render(row) or '(no subject)'}")
+            gaps = builder.unresolved(row)
+            missing_lbl.configure(
+                text="Unresolved: " + ", ".join("{{%s}}" % g for g in gaps)
+                if gaps else "")
+            txt.configure(state="normal")
+            txt.delete("1.0", "end")
+            for text, kind in builder.body.segments(row):
+                txt.insert("end", text, kind or ())
+            txt.configure(state="disabled")
+
+        def show(i):
+            state["i"] = i % total
+            load_page()
+
+        def jump():
+            try:
+                n = int(jump_var.get().replace(",", "")) - 1
+            except ValueError:
+                return
+            if 0 <= n < total:
+                show(n)
+
+        def search():
+            # Scans forward from the next contact, wrapping round, off the
+            # UI thread — a big file takes a moment to read end to end.
+            needle = search_var.get().strip().lower()
+            if not needle or state["search"]:
+                return
+            state["search"] = needle
+            status_lbl.configure(text=f"Searching for “{needle}”…")
+            first = (state["i"] + 1) % total
+
+            def scan():
+                found = None
+                for start, stop in ((first, total), (0, first)):
+                    for n, row in enumerate(src.iter_rows(start), start):
+                        if n >= stop:
+                            break
+                        if any(needle in (v or "").lower() for v in row.values()):
+                            found = n
+                            break
+                    if found is not None:
+                        break
+                self._events.call(search_done, needle, found)
+            threading.Thread(target=scan, daemon=True).start()
+
+        def search_done(needle, found):
+            state["search"] = None
+            if not win.winfo_exists():
+                return
+            if found is None:
+                status_lbl.configure(text=f"No contact matches “{needle}”.")
+            else:
+                status_lbl.configure(text=f"Found “{needle}” at contact {found + 1:,}.")
+                show(found)
+
+        def export():
+            directory = filedialog.askdirectory(
+                parent=win, title="Write one .eml per contact into…")
+            if not directory:
+                return
+            builder = MessageBuilder(
+                self._subject.get().strip(), self._body.get("1.0", "end").strip(),
+                src.headers, self._config,
+                user=self._get_smtp()[2], from_name=self._from_name.get().strip(),
+                html=self._html_var.get(), attachments=self._attachments,
+                log=self._log_line)
+
+            def progress(done, n):
+                self._events.call(status, f"Exporting… {done:,} / {n:,}")
+
+            def status(text):
+                if win.winfo_exists():
+                    status_lbl.configure(text=text)
+
+            def run():
+                try:
+                    written = export_eml(builder, src, directory, progress=progress)
+                except OSError as e:
+                    self._events.call(status, f"Export failed: {e}")
+                    return
+                self._events.call(status,
+                    f"Wrote {written:,} .eml files to {directory}")
+                self._log_line(f"Exported {written:,} messages to {directory}", "ok")
+            threading.Thread(target=run, daemon=True).start()
+
+        compile_()
+        load_page()
+
+    def _open_scheduler(self):
+        """Queue the current campaign for later and watch the queue."""
+        t = self._t
+        win = ctk.CTkToplevel(self)
+        win.title("Scheduled Campaigns")
+        win.geometry("860x600")
+        win.configure(fg_color=t["bg_main"])
+
+        head = ctk.CTkFrame(win, fg_color=t["bg_sidebar"], corner_radius=0, height=50)
+        head.pack(fill="x")
+        head.pack_propagate(False)
+        ctk.CTkLabel(head, text="🕑  SCHEDULE", font=FONT_HEAD,
+                     text_color=t["accent"]).pack(side="left", padx=18)
+        ctk.CTkLabel(head, text="Send this campaign later, or spread it over a window",
+                     font=FONT_SMALL, text_color=t["text_dim"]).pack(side="left")
+
+        form = ctk.CTkFrame(win, fg_color=t["bg_card"], corner_radius=0)
+        form.pack(fill="x")
+        form.columnconfigure(1, weight=1)
+        entries = {}
+        for r, (key, label, placeholder) in enumerate((
+                ("at",     "Start at",          "YYYY-MM-DD HH:MM or HH:MM — blank = now"),
+                ("hours",  "Only send between", "e.g. 09:00-17:00 — blank = any time"),
+                ("spread", "Spread until",      "YYYY-MM-DD HH:MM — blank = as fast as the delay allows"))):
+            ctk.CTkLabel(form, text=label, font=FONT_LABEL, text_color=t["text_dim"],
+                         anchor="w").grid(row=r, column=0, sticky="w", padx=(18, 8), pady=4)
+            entries[key] = ctk.CTkEntry(form, font=FONT_MONO, placeholder_text=placeholder,
+                                        fg_color=t["bg_input"], border_color=t["border"],
+                                        text_color=t["text_main"])
+            entries[key].grid(row=r, column=1, sticky="ew", padx=(0, 18), pady=4)
+        ctk.CTkButton(form, text="Queue This Campaign", font=FONT_LABEL,
+                      fg_color=t["accent"], text_color="#000",
+                      hover_color=t["accent_dim"], width=200,
+                      command=lambda: queue_campaign()
+                      ).grid(row=3, column=1, sticky="e", padx=18, pady=(4, 12))
+
+        ctk.CTkLabel(win, text="QUEUE", font=FONT_LABEL, text_color=t["text_dim"]
+                     ).pack(anchor="w", padx=18, pady=(12, 4))
+        listing = ctk.CTkScrollableFrame(win, fg_color=t["bg_sidebar"],
+                                         scrollbar_button_color=t["border"])
+        listing.pack(fill="both", expand=True, padx=12)
+        foot = ctk.CTkLabel(win, text="", font=FONT_SMALL, text_color=t["text_dim"],
+                            anchor="w", justify="left")
+        foot.pack(fill="x", padx=18, pady=8)
+
+        def queue_campaign():
+            src = self._contacts
+            if not src:
+                messagebox.showwarning("No contacts", "Import a CSV first.", parent=win)
+                return
+            if self._temp_csv and os.path.abspath(src.path) == os.path.abspath(self._temp_csv):
+                messagebox.showwarning("Temporary list",
+                    "These contacts only exist until the app closes — "
+                    "export them to a CSV and load that before scheduling.", parent=win)
+                return
+            subj = self._subject.get().strip()
+            body = self._body.get("1.0", "end").strip()
+            if not subj or not body:
+                messagebox.showwarning("Missing", "Subject and body are required.",
+                                       parent=win)
+                return
+            host, port, user, pwd, tls = self._get_smtp()
+            if not all([host, user, pwd]):
+                messagebox.showwarning("SMTP", "Fill in host, email, and password.",
+                                       parent=win)
+                return
+            if self._config.get("user") != user or self._config.get("pass") != pwd:
+                messagebox.showwarning("Save SMTP settings",
+                    "Scheduled campaigns use the saved password — save your "
+                    "SMTP settings first.", parent=win)
+                return
+            try:
+                job = self._scheduler.add(
+                    src.path, subj, body, (host, port, user, tls),
+                    at=parse_when(entries["at"].get()),
+                    hours=entries["hours"].get().strip(),
+                    spread_until=parse_when(entries["spread"].get()),
+                    html=self._html_var.get(),
+                    from_name=self._from_name.get().strip(),
+                    attachments=self._attachments,
+                    delay=float(self._delay_var.get() or 1))
+            except ValueError as e:
+                messagebox.showwarning("Schedule", str(e), parent=win)
+                return
+            self._log_line(f"Queued “{job['name']}” — "
+                           f"{describe_when(job)}.", "ok")
+            refresh()
+
+        def describe_when(job):
+            parts = [f"starts {job['at'].replace('T', ' ')[:16]}" if job.get("at")
+                     else "starts as soon as possible"]
+            if job.get("hours"):
+                parts.append(f"only {job['hours']}")
+            if job.get("spread_until"):
+                parts.append(f"spread until {job['spread_until'].replace('T', ' ')[:16]}")
+            return ", ".join(parts)
+
+        colours = {"queued": t["text_dim"], "running": ORANGE, "done": t["accent"],
+                   "failed": RED, "cancelled": t["text_dim"]}
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            for w in listing.winfo_children():
+                w.destroy()
+            jobs = self._scheduler.jobs()
+            if not jobs:
+                ctk.CTkLabel(listing, text="Nothing scheduled.", font=FONT_SMALL,
+                             text_color=t["text_dim"]).pack(anchor="w", padx=8, pady=8)
+            for job in jobs:
+                row = ctk.CTkFrame(listing, fg_color=t["bg_card"], corner_radius=6)
+                row.pack(fill="x", pady=3)
+                row.columnconfigure(0, weight=1)
+                ctk.CTkLabel(row, text=f"{job['name']}  →  {job['smtp']['user']}",
+                             font=FONT_LABEL, text_color=t["text_main"], anchor="w"
+                             ).grid(row=0, column=0, sticky="w", padx=10, pady=(6, 0))
+                progress = (f" · {job['sent']:,} sent, {job['failed']:,} failed"
+                            + (f" of {job['total']:,}" if job.get("total") else "")
+                            if job.get("sent") or job.get("failed") else "")
+                detail = f"{describe_when(job)}{progress}"
+                if job.get("error"):
+                    detail += f" · {job['error']}"
+                ctk.CTkLabel(row, text=detail, font=FONT_SMALL,
+                             text_color=t["text_dim"], anchor="w", wraplength=560,
+                             justify="left"
+                             ).grid(row=1, column=0, sticky="w", padx=10, pady=(0, 6))
+                ctk.CTkLabel(row, text=job["status"].upper(), font=FONT_LABEL,
+                             text_color=colours.get(job["status"], t["text_dim"])
+                             ).grid(row=0, column=1, rowspan=2, padx=8)
+                active = job["status"] in ("queued", "running")
+                ctk.CTkButton(row, text="Cancel" if active else "Remove",
+                              font=FONT_SMALL, fg_color="transparent",
+                              border_color=t["border"], border_width=1,
+                              text_color=t["text_dim"], hover_color=t["bg_input"],
+                              width=80,
+                              command=lambda j=job["id"], a=active:
+                                  (self._scheduler.cancel(j) if a
+                                   else self._scheduler.forget(j), refresh())
+                              ).grid(row=0, column=2, rowspan=2, padx=(0, 10))
+            foot.configure(text=(
+                "Scheduled campaigns run while this app is open"
+                if self._scheduler.owner else
+                "Scheduled campaigns are being run by another copy of the app "
+                "or email_engine.py --run-scheduler")
+                + " — or headless with:  python email_engine.py --run-scheduler")
+
+        def poll():
+            if win.winfo_exists():
+                refresh()
+                win.after(3000, poll)
+
+        poll()
 
     # ── Sending ────────────────────────────────────────────────────────────
 
-    def _start_send(self):
+    def _start_send(self, resume=False):
         if self._sending:
             return
         if not self._contacts:
             messagebox.showwarning("No contacts", "Import a CSV first.")
             return
+        if not self._contacts.done.is_set():
+            messagebox.showinfo("Still counting",
+                "Contacts are still being counted — try again in a moment.")
+            return
         subj = self._subject.get().strip()
         body = self._body.get("1.0", "end").strip()
         if not subj or not body:
             messagebox.showwarning("Missing", "Subject and body are required.")
             return
+        delay = self._get_delay()
+        if delay is None:
+            return
         host, port, user, pwd, tls = self._get_smtp()
         if not all([host, user, pwd]):
             messagebox.showwarning("SMTP", "Fill in host, email, and password.")
             return
+        if not self._scheduler.claim(user, host):
+            messagebox.showwarning("Account busy",
+                f"Something is already sending from {user} — a scheduled "
+                "campaign or email_engine.py. Wait for it, or cancel it "
+                "under 🕑 Schedule.")
+            return
+
+        # Same list + same content = same campaign, so a re-send can pick up
+        # where the last one stopped.
+        src = self._contacts
+        journal = SendJournal.for_campaign(src.path, user, subj, body)
+        done = journal.counts()
+        if resume and not journal:
+            self._scheduler.release(user, host)
+            messagebox.showinfo("Nothing to resume",
+                "This campaign hasn't been sent before — use Send Campaign.")
+            return
+        if not resume and done["sent"]:
+            ans = messagebox.askyesnocancel("Campaign already started",
+                f"This campaign already reached {done['sent']} contacts.\n\n"
+                "Yes  = Resume (skip them)\n"
+                "No   = Send to everyone again\n"
+                "Cancel = Abort")
+            if ans is None:
+                self._scheduler.release(user, host)
+                return
+            resume = ans
+        if not resume:
+            journal.reset()
+
+        start = journal.first_unsent() if resume else 0
+        left  = len(src) - (done["sent"] + done["failed"] + done["skipped"]
+                            if resume else 0)
+        verb  = "Resume — send to" if resume else "Send to"
         if not messagebox.askyesno("Confirm Send",
-                f"Send to {len(self._contacts)} contacts?\n\nThis cannot be undone."):
+                f"{verb} {left} contacts?\n\nThis cannot be undone."):
+            self._scheduler.release(user, host)
             return
         self._sending = True
         self._stop_flag.clear()
         self._send_btn.configure(state="disabled")
+        self._resume_btn.configure(state="disabled")
         self._stop_btn.configure(
             state="normal",
             fg_color=RED, text_color="#fff",
@@ -3141,141 +3786,109 @@ class BulkEmailApp(ctk.CTk):
         self._set_status("SENDING", ORANGE)
         threading.Thread(target=self._send_thread,
                          args=(host, port, user, pwd, tls, subj, body),
+                         kwargs={"journal": journal, "start": start,
+                                 "resume": resume, "delay": delay,
+                                 "account": (user, host)},
+                         daemon=True).start()
+
+    def _get_delay(self):
+        """The delay entry as seconds, or None (after warning) if it's not a number."""
+        try:
+            delay = float(self._delay_var.get() or 1)
+        except ValueError:
+            delay = -1
+        if delay < 0:
+            messagebox.showwarning("Delay",
+                "The delay must be a number of seconds, e.g. 1 or 0.5.")
+            return None
+        return delay
+
+    def _start_dry_run(self):
+        """Build every message without sending, to time it and size it up."""
+        if self._sending:
+            return
+        if not self._contacts:
+            messagebox.showwarning("No contacts", "Import a CSV first.")
+            return
+        if not self._contacts.done.is_set():
+            messagebox.showinfo("Still counting",
+                "Contacts are still being counted — try again in a moment.")
+            return
+        subj = self._subject.get().strip()
+        body = self._body.get("1.0", "end").strip()
+        if not subj or not body:
+            messagebox.showwarning("Missing", "Subject and body are required.")
+            return
+        delay = self._get_delay()
+        if delay is None:
+            return
+        ans = messagebox.askyesnocancel("Dry Run",
+            "Every message is built exactly as it would be sent, "
+            "but nothing is sent.\n\n"
+            "Yes  = Also save the messages to an mbox file\n"
+            "No   = Just measure them\n"
+            "Cancel = Abort")
+        if ans is None:
+            return
+        path = ""
+        if ans:
+            path = filedialog.asksaveasfilename(
+                defaultextension=".mbox",
+                filetypes=[("Mailbox", "*.mbox"), ("All files", "*.*")],
+                initialfile="dry_run.mbox")
+            if not path:
+                return
+        self._sending = True
+        self._stop_flag.clear()
+        self._send_btn.configure(state="disabled")
+        self._resume_btn.configure(state="disabled")
+        self._stop_btn.configure(
+            state="normal",
+            fg_color=RED, text_color="#fff",
+            hover_color="#cc0000")
+        self._set_status("DRY RUN", ORANGE)
+        threading.Thread(target=self._send_thread,
+                         args=self._get_smtp() + (subj, body),
+                         kwargs={"dry_run": path, "delay": delay},
                          daemon=True).start()
 
     def _stop_send(self):
         self._stop_flag.set()
         self._log_line("Stop requested…", "warn")
 
-    def _send_thread(self, host, port, user, pwd, tls, subj_tpl, body_tpl):
-        email_col = next(
-            (h for h in self._csv_headers if "email" in h.lower()), None)
-        total, sent, failed = len(self._contacts), 0, 0
-        lf = lw = log_path = None
-
-        if self._track_var.get():
-            log_path = Path.home() / \
-                f"letustech_sent_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            lf = open(log_path, "w", newline="", encoding="utf-8")
-            lw = csv.writer(lf)
-            lw.writerow(["email", "status", "timestamp"])
-
-        def connect_smtp():
-            """Create and return a fresh authenticated SMTP connection."""
-            if tls == "SSL/TLS":
-                s = smtplib.SMTP_SSL(
-                    host, port,
-                    context=ssl.create_default_context(), timeout=15)
-            else:
-                s = smtplib.SMTP(host, port, timeout=15)
-                if tls == "STARTTLS":
-                    s.starttls(context=ssl.create_default_context())
-            s.login(user, pwd)
-            return s
-
-        server = None
+    def _send_thread(self, host, port, user, pwd, tls, subj_tpl, body_tpl,
+                     journal=None, start=0, resume=False, dry_run=None,
+                     delay=1.0, account=None):
+        campaign = Campaign(
+            self._contacts, (host, port, user, pwd, tls), subj_tpl, body_tpl,
+            self._config,
+            html=self._html_var.get(),
+            from_name=self._from_name.get().strip(),
+            attachments=self._attachments,
+            delay=delay,
+            journal=journal, start=start, resume=resume,
+            track=self._track_var.get(),
+            stop_flag=self._stop_flag,
+            log=self._log_line,
+            progress=self._events.progress,
+            dry_run=dry_run,
+            suppressions=SUPPRESSIONS)
         try:
-            server = connect_smtp()
-            self._log_line(f"Connected to {host}:{port}", "ok")
-
-            delay = float(self._delay_var.get() or 1)
-
-            for i, row in enumerate(self._contacts):
-                if self._stop_flag.is_set():
-                    self._log_line("Stopped.", "warn")
-                    break
-
-                to_email = row.get(email_col, "").strip()
-                if not validate_email(to_email):
-                    self._log_line(f"Skip invalid: {to_email}", "warn")
-                    failed += 1
-                    continue
-
-                msg = MIMEMultipart("alternative")
-                msg["Subject"] = personalise(subj_tpl, row, self._config)
-                msg["From"]    = (f"{self._from_name.get().strip() or user}"
-                                  f" <{user}>")
-                msg["To"]      = to_email
-                body_text = personalise(body_tpl, row, self._config)
-                msg.attach(MIMEText(
-                    body_text,
-                    "html" if self._html_var.get() else "plain"))
-
-                if self._attachment:
-                    try:
-                        with open(self._attachment, "rb") as af:
-                            part = MIMEBase("application", "octet-stream")
-                            part.set_payload(af.read())
-                        encoders.encode_base64(part)
-                        part.add_header("Content-Disposition",
-                            f"attachment; "
-                            f"filename={Path(self._attachment).name}")
-                        msg.attach(part)
-                    except Exception as ae:
-                        self._log_line(f"Attachment error: {ae}", "warn")
-
-                # Try sending — reconnect once if connection dropped
-                for attempt in range(2):
-                    try:
-                        server.sendmail(user, to_email, msg.as_string())
-                        sent += 1
-                        self._log_line(f"OK  {to_email}", "ok")
-                        if lw:
-                            lw.writerow([to_email, "sent",
-                                         datetime.now().isoformat()])
-                        break  # success
-                    except smtplib.SMTPServerDisconnected:
-                        if attempt == 0:
-                            self._log_line("Connection dropped — reconnecting…", "warn")
-                            try:
-                                server = connect_smtp()
-                                self._log_line("Reconnected.", "ok")
-                            except Exception as re_err:
-                                self._log_line(f"Reconnect failed: {re_err}", "err")
-                                failed += 1
-                                if lw:
-                                    lw.writerow([to_email, f"reconnect failed",
-                                                 datetime.now().isoformat()])
-                                break
-                        else:
-                            failed += 1
-                            self._log_line(f"FAIL  {to_email} — could not reconnect", "err")
-                            if lw:
-                                lw.writerow([to_email, "failed: disconnected",
-                                             datetime.now().isoformat()])
-                    except Exception as se:
-                        failed += 1
-                        self._log_line(f"FAIL  {to_email} — {se}", "err")
-                        if lw:
-                            lw.writerow([to_email, f"failed: {se}",
-                                         datetime.now().isoformat()])
-                        break
-
-                self._progress_var.set((i + 1) / total)
-                self._prog_label.configure(
-                    text=(f"{i+1} / {total}  |  "
-                          f"{sent} sent  |  {failed} failed"))
-
-                if i < total - 1 and not self._stop_flag.is_set():
-                    time.sleep(delay)
-
-            try:
-                server.quit()
-            except Exception:
-                pass
-
-        except Exception as e:
-            self._log_line(f"SMTP error: {e}", "err")
-            self._log_line("Check your host, port, email and password in SMTP settings.", "warn")
+            campaign.run()
         finally:
+            # always hand the buttons back, even if run() blew up
             self._sending = False
-            if lf:
-                lf.close()
-                self._log_line(f"Log saved: {log_path}", "ok")
-            self.after(0, self._send_done, sent, failed)
+            if account:
+                self._scheduler.release(*account)
+            counts = campaign.counts
+            if dry_run is not None:
+                self._events.call(self._dry_run_done, campaign.metrics)
+            else:
+                self._events.call(self._send_done, counts["sent"], counts["failed"])
 
     def _send_done(self, sent, failed):
         self._send_btn.configure(state="normal")
+        self._resume_btn.configure(state="normal")
         self._stop_btn.configure(
             state="disabled",
             fg_color=self._t["border"],
@@ -3291,6 +3904,26 @@ class BulkEmailApp(ctk.CTk):
             f"Sent:   {sent}\n"
             f"Failed: {failed}")
 
+    def _dry_run_done(self, metrics):
+        self._send_btn.configure(state="normal")
+        self._resume_btn.configure(state="normal")
+        self._stop_btn.configure(
+            state="disabled",
+            fg_color=self._t["border"],
+            text_color=self._t["text_dim"],
+            hover_color=self._t["border"])
+        sizes, proj = metrics.sizes, metrics.projection or {}
+        self._set_status(f"DRY RUN — {sizes.count} built", self._t["accent"])
+        messagebox.showinfo("Dry Run",
+            f"Messages built:  {sizes.count:,}\n"
+            f"Total size:      {sizes.total / 1e6:,.1f} MB\n"
+            f"Median / p95:    {sizes.percentile(0.5) / 1024:,.1f} KB / "
+            f"{sizes.percentile(0.95) / 1024:,.1f} KB\n"
+            f"Largest:         {sizes.max / 1024:,.1f} KB\n\n"
+            f"Projected send time: {proj.get('estimate', '?')}\n"
+            f"(limited by {proj.get('bottleneck', '?')})\n\n"
+            "Full breakdown is in the report — see the log.")
+
 
 # ══════════════════════════════════════════════════════════════════════════
 if __name__ == "__main__":
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Send-path benchmarks — LetUsTech
+Times the stages a campaign goes through — CSV load, personalise, MIME
+build and the whole send — against a local SMTP sink, on synthetic
+contact lists of 1k, 100k and 1M rows. Nothing leaves the machine.
+
+    python benchmark.py                      # everything, JSON to stdout
+    python benchmark.py --sizes 1k,100k --out before.json
+    python benchmark.py --compare before.json
+
+Results are JSON, so two runs (say, before and after a change) can be
+compared with --compare, which exits 1 if anything got slower than
+--tolerance allows.
+"""
+
+import asyncio, base64, csv, itertools, json, platform, random, re, subprocess
+import sys, tempfile, threading, time, zlib
+from datetime import datetime
+from pathlib import Path
+
+from email_engine import (
+    CSVContactSource, RecipientValidator, MessageBuilder, Campaign,
+    TRANSPORTS, personalise, compile_template,
+)
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+SUBJECT = "Quick question for {{company}}, {{first_name}}"
+BODY = (
+    "Hi {{first_name}},\n\n"
+    "I noticed {{company}} is based in {{city}} and wanted to reach out.\n"
+    "We help teams like yours send better email — would a short call next\n"
+    "week work? {{missing_tag}} stays as-is.\n\n"
+    "Best regards,\n{{sender_name}}\n"
+) * 3
+
+# ── SMTP sink ───────────────────────────────────────────────────────────────
+class SMTPSink:
+    """A throwaway SMTP server on 127.0.0.1, run on its own event loop thread.
+
+    Advertises PIPELINING (unless ``pipelining`` is False) and AUTH
+    PLAIN/LOGIN, and accepts any password.
+    ``latency`` seconds are added before each message is acknowledged.
+    ``fail_rate`` and ``soft_fail_rate`` are the shares of recipients
+    refused with 550 and 451. Which recipients fail depends only on the
+    address and ``seed``, so every run fails the same ones.
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, soft_fail_rate=0.0, seed=1,
+                 pipelining=True):
+        self.latency        = latency
+        self.fail_rate      = fail_rate
+        self.soft_fail_rate = soft_fail_rate
+        self.seed      = seed
+        self.pipelining = pipelining
+        self.messages  = 0
+        self.bytes     = 0
+        self.refused   = 0
+        self.sessions  = 0
+        self.port      = None
+        self._loop     = asyncio.new_event_loop()
+        self._server   = None
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._session, "127.0.0.1", 0))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _reply_for(self, addr):
+        roll = (zlib.crc32(f"{self.seed}:{addr}".encode()) & 0xFFFF) / 0x10000
+        if roll < self.fail_rate:
+            return b"550 5.1.1 no such user\r\n"
+        if roll < self.fail_rate + self.soft_fail_rate:
+            return b"451 4.2.0 try again later\r\n"
+        return b"250 2.1.5 ok\r\n"
+
+    async def _session(self, reader, writer):
+        self.sessions += 1
+        writer.write(b"220 sink ESMTP\r\n")
+        accepted = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                cmd = line.decode("ascii", "replace").strip()
+                verb = cmd[:4].upper()
+                if verb in ("EHLO", "HELO"):
+                    writer.write(b"250-sink\r\n" +
+                                 (b"250-PIPELINING\r\n" if self.pipelining else b"") +
+                                 b"250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                elif verb == "AUTH":
+                    parts = cmd.split()
+                    if parts[1].upper() == "LOGIN":
+                        for prompt in (b"VXNlcm5hbWU6", b"UGFzc3dvcmQ6"):
+                            writer.write(b"334 " + prompt + b"\r\n")
+                            await writer.drain()
+                            await reader.readline()
+                    elif len(parts) == 2:   # PLAIN with the credentials to follow
+                        writer.write(b"334 \r\n")
+                        await writer.drain()
+                        base64.b64decode(await reader.readline())
+                    writer.write(b"235 2.7.0 ok\r\n")
+                elif verb == "MAIL":
+                    accepted = False
+                    writer.write(b"250 2.1.0 ok\r\n")
+                elif verb == "RCPT":
+                    reply = self._reply_for(cmd[cmd.find("<") + 1:cmd.rfind(">")])
+                    accepted = accepted or reply.startswith(b"250")
+                    self.refused += not reply.startswith(b"250")
+                    writer.write(reply)
+                elif verb == "DATA":
+                    if not accepted:
+                        writer.write(b"554 5.5.1 no valid recipients\r\n")
+                        continue
+                    writer.write(b"354 go ahead\r\n")
+                    await writer.drain()
+                    size = 0
+                    while True:
+                        chunk = await reader.readline()
+                        if chunk in (b".\r\n", b""):
+                            break
+                        size += len(chunk)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    self.messages += 1
+                    self.bytes    += size
+                    accepted = False
+                    writer.write(b"250 2.0.0 queued\r\n")
+                elif verb in ("RSET", "NOOP"):
+                    accepted = verb != "RSET" and accepted
+                    writer.write(b"250 2.0.0 ok\r\n")
+                elif verb == "QUIT":
+                    writer.write(b"221 2.0.0 bye\r\n")
+                    await writer.drain()
+                    return
+                else:
+                    writer.write(b"502 5.5.2 not implemented\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+# ── Synthetic contacts ──────────────────────────────────────────────────────
+FIRST = ["Alex", "Sam", "Priya", "Jordan", "Chen", "Maria", "Olu", "Niamh",
+         "Tomasz", "Aisha", "Lukas", "Zoë"]
+LAST  = ["Smith", "Patel", "O'Brien", "Nowak", "García", "Okafor", "Kim",
+         "Jones", "Müller", "Rossi"]
+CITY  = ["London", "Leeds", "Cardiff", "Glasgow", "Belfast", "Bristol"]
+DOMAINS = ["gmail.com", "outlook.com", "yahoo.com", "example.co.uk",
+           "company.io", "mail.test"]
+
+def make_contacts(path, rows, seed=1):
+    """Write ``rows`` synthetic contacts to ``path`` (same seed, same file)."""
+    rnd = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["email", "first_name", "last_name", "company", "city"])
+        for i in range(rows):
+            first, last = rnd.choice(FIRST), rnd.choice(LAST)
+            local = re.sub(r"[^a-z]", "", first.lower())
+            w.writerow([f"{local}.{i}@{rnd.choice(DOMAINS)}",
+                        first, last, f"{last} & Co {i % 997}", rnd.choice(CITY)])
+    return path
+
+# ── Benchmarks ──────────────────────────────────────────────────────────────
+def _result(name, rows, seconds, **extra):
+    return {"name": name, "rows": rows, "seconds": round(seconds, 4),
+            "per_sec": round(rows / seconds, 1) if seconds else None, **extra}
+
+def bench_load(path, rows):
+    t0 = time.perf_counter()
+    src = CSVContactSource(str(path))
+    src.scan(RecipientValidator(check_mx=False))
+    seconds = time.perf_counter() - t0
+    return src, _result("csv_load", rows, seconds, valid=src.valid)
+
+def bench_personalise(src, rows, config):
+    """personalise() as the app calls it, and the compiled template send uses."""
+    out = []
+    t0 = time.perf_counter()
+    for row in src.iter_rows():
+        personalise(SUBJECT, row, config)
+        personalise(BODY, row, config)
+    out.append(_result("personalise", rows, time.perf_counter() - t0))
+
+    subject = compile_template(SUBJECT, src.headers, config)
+    body    = compile_template(BODY, src.headers, config)
+    t0 = time.perf_counter()
+    for row in src.iter_rows():
+        subject.render(row)
+        body.render(row)
+    out.append(_result("personalise_compiled", rows, time.perf_counter() - t0))
+    return out
+
+def bench_mime(src, rows, config):
+    builder = MessageBuilder(SUBJECT, BODY, src.headers, config,
+                             user="bench@example.com", from_name="Bench")
+    col = src.email_col
+    t0 = time.perf_counter()
+    for row in itertools.islice(src.iter_rows(), rows):
+        builder.build(row, row[col])
+    seconds = time.perf_counter() - t0
+    return _result("mime_build", rows, seconds,
+                   mean_bytes=builder.metrics.sizes.summary()["mean_bytes"])
+
+def bench_send(path, rows, sink, config, transport):
+    src = CSVContactSource(str(path))
+    src.scan(RecipientValidator(check_mx=False))
+    cfg = dict(config, transport=transport)
+    before = sink.messages
+    campaign = Campaign(src, ("127.0.0.1", sink.port, "bench@example.com",
+                              "bench", "None"),
+                        SUBJECT, BODY, cfg, from_name="Bench", delay=0)
+    t0 = time.perf_counter()
+    counts = campaign.run()
+    seconds = time.perf_counter() - t0
+    if campaign.error:
+        raise campaign.error
+    stages = campaign.metrics.report()["stages"]
+    return _result(f"send_{transport}", rows, seconds,
+                   sent=counts["sent"], failed=counts["failed"],
+                   delivered=sink.messages - before,
+                   pool_size=cfg.get("pool_size", 1),
+                   smtp_p50_ms=stages["smtp"]["p50_ms"],
+                   smtp_p95_ms=stages["smtp"]["p95_ms"])
+
+def run(sizes, send_rows=10_000, build_rows=100_000,
+        transports=("smtplib", "asyncio"), pool=4,
+        latency=0.0, fail_rate=0.0, soft_fail_rate=0.0, seed=1, workdir=None,
+        log=None):
+    """Run every benchmark and return the results document."""
+    log = log or (lambda msg: None)
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="letustech_bench_"))
+    config  = {"sender_name": "Bench", "check_mx": "Off", "pool_size": pool}
+    results = []
+
+    for label in sizes:
+        rows = SIZES[label]
+        path = workdir / f"contacts_{label}.csv"
+        if not path.exists():
+            log(f"Generating {rows:,} contacts…")
+            make_contacts(path, rows, seed)
+        log(f"{label}: csv load")
+        src, res = bench_load(path, rows)
+        results.append(dict(res, size=label))
+        log(f"{label}: personalise")
+        results += [dict(r, size=label) for r in bench_personalise(src, rows, config)]
+        log(f"{label}: mime build")
+        results.append(dict(bench_mime(src, min(rows, build_rows or rows),
+                                       config), size=label))
+
+    if send_rows:
+        sink = SMTPSink(latency, fail_rate, soft_fail_rate, seed).start()
+        path = make_contacts(workdir / f"send_{send_rows}.csv", send_rows, seed)
+        try:
+            for transport in transports:
+                log(f"send: {transport}, {send_rows:,} messages")
+                results.append(dict(bench_send(path, send_rows, sink, config,
+                                               transport), size=str(send_rows)))
+        finally:
+            sink.stop()
+
+    return {
+        "version":   _version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python":    platform.python_version(),
+        "platform":  platform.platform(),
+        "params":    {"sizes": list(sizes), "send_rows": send_rows,
+                      "build_rows": build_rows,
+                      "transports": list(transports), "pool_size": pool,
+                      "latency_ms": latency * 1000, "fail_rate": fail_rate,
+                      "soft_fail_rate": soft_fail_rate, "seed": seed},
+        "results":   results,
+    }
+
+def _version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(old, new, tolerance=0.15):
+    """Lines describing each benchmark's change, and whether any regressed."""
+    before = {(r["name"], r.get("size")): r for r in old["results"]}
+    lines, regressed = [], False
+    for r in new["results"]:
+        prev = before.get((r["name"], r.get("size")))
+        if not prev or not prev.get("per_sec") or not r.get("per_sec"):
+            continue
+        ratio = r["per_sec"] / prev["per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag, regressed = "  ← slower", True
+        lines.append(f"{r['name']:<22} {r.get('size', ''):>7}  "
+                     f"{prev['per_sec']:>12,.0f}/s → {r['per_sec']:>12,.0f}/s  "
+                     f"({ratio:.2f}x){flag}")
+    return lines, regressed
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(
+        prog="benchmark",
+        description="Time the Bulk Email Sender send path against a local SMTP sink.")
+    ap.add_argument("--sizes", default="1k,100k,1m",
+                    help="contact list sizes to time (default: %(default)s)")
+    ap.add_argument("--send-rows", type=int, default=10_000, metavar="N",
+                    help="messages in the end-to-end send; 0 skips it "
+                         "(default: %(default)s)")
+    ap.add_argument("--build-rows", type=int, default=100_000, metavar="N",
+                    help="cap on rows put through the MIME build for each "
+                         "size, 0 for all — it's the slow stage "
+                         "(default: %(default)s)")
+    ap.add_argument("--transport", action="append", choices=list(TRANSPORTS),
+                    help="transport(s) to send with (default: all)")
+    ap.add_argument("--pool", type=int, default=4, help="SMTP connections (default: 4)")
+    ap.add_argument("--latency", type=float, default=0.0, metavar="MS",
+                    help="sink delay before acknowledging each message")
+    ap.add_argument("--fail-rate", type=float, default=0.0,
+                    help="share of recipients the sink refuses with 550")
+    ap.add_argument("--soft-fail-rate", type=float, default=0.0,
+                    help="share of recipients the sink refuses with 451")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--workdir", help="keep generated CSVs here between runs")
+    ap.add_argument("--out", help="write the JSON here instead of stdout")
+    ap.add_argument("--compare", metavar="OLD_JSON",
+                    help="compare with an earlier run; exit 1 on a regression")
+    ap.add_argument("--tolerance", type=float, default=0.15,
+                    help="slowdown allowed by --compare (default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        ap.error(f"unknown size(s) {', '.join(unknown)} — choose from {', '.join(SIZES)}")
+    if args.workdir:
+        Path(args.workdir).mkdir(parents=True, exist_ok=True)
+
+    doc = run(sizes, send_rows=args.send_rows, build_rows=args.build_rows,
+              transports=args.transport or list(TRANSPORTS), pool=args.pool,
+              latency=args.latency / 1000, fail_rate=args.fail_rate,
+              soft_fail_rate=args.soft_fail_rate, seed=args.seed,
+              workdir=args.workdir,
+              log=lambda msg: print(msg, file=sys.stderr, flush=True))
+    text = json.dumps(doc, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        lines, regressed = compare(old, doc, args.tolerance)
+        print("\n".join(lines), file=sys.stderr)
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,16 @@ from tkinter import ttk, messagebox, filedialog
 import csv
 import re
 import os
+import io
 import base64
 import tempfile
+import threading
+import queue
+import time
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
 
 FAVICON_B64 = (
     "/9j/4AAQSkZJRgABAQAAAQABAAD/4gHYSUNDX1BST0ZJTEUAAQEAAAHIAAAAAAQwAABtbnRy"
@@ -49,11 +57,452 @@ FONT_TITLE = ("Consolas", 18, "bold")
 
 EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
 
+ROW_HEIGHT = 28   # Treeview row height, also used to work out how many rows fit
+
+CORE_FIELDS = ("email", "first_name", "last_name", "company")
+
+BULK_EMAIL_RE = re.compile(r"[^\s@,;<>\"']+@[^\s@,;<>\"']+\.[^\s@,;<>\"']+")
+BULK_SPLIT_RE = re.compile(r"[,;\t]+")
+
+# imports run on a worker thread and hand rows to the UI in batches
+IMPORT_CHUNK  = 2000   # rows per batch
+IMPORT_QUEUE  = 8      # batches buffered before the reader waits (bounds memory)
+IMPORT_BUDGET = 0.04   # seconds of merging per UI tick, so the window stays responsive
+
 
 def is_valid_email(e):
     return bool(EMAIL_RE.match(e.strip()))
 
 
+def email_key(e):
+    """Normalised form used for duplicate checks."""
+    return e.strip().lower()
+
+
+def normalise_header(h):
+    return (h or "").strip().lower().replace(" ", "_")
+
+
+def bulk_extra_fields(fields):
+    """Fields filled from the tokens after the name: company, then custom."""
+    return (["company"] if "company" in fields else []) + \
+           [f for f in fields if f not in CORE_FIELDS]
+
+
+def parse_bulk_line(line, fields, extra_fields=None):
+    """Turn one pasted line into a row dict, or None if it has no email."""
+    em_match = BULK_EMAIL_RE.search(line)
+    if not em_match:
+        return None
+    email = em_match.group(0).strip()
+
+    tokens = [t.strip().strip("\"'") for t in BULK_SPLIT_RE.split(line)]
+    other_tokens = [t for t in tokens if t.lower() != email.lower()]
+
+    row = {f: "" for f in fields}
+    row["email"] = email
+
+    if other_tokens:
+        # if first token looks like "First Last" (single token, space inside), split it
+        name_token = other_tokens[0]
+        name_parts = name_token.split()
+        if len(name_parts) >= 2 and "first_name" in fields and "last_name" in fields:
+            row["first_name"] = name_parts[0]
+            row["last_name"]  = " ".join(name_parts[1:])
+        elif "first_name" in fields:
+            row["first_name"] = name_token
+        remaining = other_tokens[1:]
+    else:
+        remaining = []
+
+    # map remaining tokens to: company first, then custom fields
+    if extra_fields is None:
+        extra_fields = bulk_extra_fields(fields)
+    for i, cf in enumerate(extra_fields):
+        row[cf] = remaining[i] if i < len(remaining) else ""
+    return row
+
+
+def bulk_batches(raw, fields, chunk=IMPORT_CHUNK):
+    """Yield (rows, chars_done, lines_without_email) for pasted text."""
+    extra = bulk_extra_fields(fields)
+    batch, done, skipped = [], 0, 0
+    for line in io.StringIO(raw):
+        done += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        row = parse_bulk_line(line, fields, extra)
+        if row is None:
+            skipped += 1
+        else:
+            batch.append(row)
+        if len(batch) >= chunk:
+            yield batch, done, skipped
+            batch, skipped = [], 0
+    yield batch, done, skipped
+
+
+def csv_batches(path, fields, chunk=IMPORT_CHUNK):
+    """Yield (rows, bytes_done, 0) for a CSV file, reading it incrementally.
+
+    Headers are normalised once; each record is mapped onto `fields` by
+    column position.  Rows without an email are dropped.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = [normalise_header(h) for h in next(reader, [])]
+        cols   = {h: i for i, h in enumerate(header)}   # later duplicates win, like DictReader
+        pick   = [(f, cols[f]) for f in fields if f in cols]
+        blank  = [f for f in fields if f not in cols]
+        ei     = cols["email"]
+        batch  = []
+        for rec in reader:
+            if ei >= len(rec) or not rec[ei].strip():
+                continue
+            row = {f: (rec[i].strip() if i < len(rec) else "") for f, i in pick}
+            for f in blank:
+                row[f] = ""
+            batch.append(row)
+            if len(batch) >= chunk:
+                yield batch, fh.buffer.tell(), 0
+                batch = []
+        yield batch, fh.buffer.tell(), 0
+
+
+class EntryStore:
+    """Column-oriented storage for the contact list.
+
+    Each field is a list of strings indexed by row id, and `_order` maps a
+    row's position in the list to its id.  A column added after rows exist
+    starts empty and reads as "" until written, so adding a field is O(1).
+    Deleting a row only drops its id from `_order`; the dead cells are
+    reclaimed by _compact() once they outnumber the live rows.
+    """
+
+    COMPACT_MIN = 4096   # don't bother compacting below this many dead rows
+
+    def __init__(self, fields=()):
+        self._cols  = {f: [] for f in fields}
+        self._order = array("q")
+        self._next  = 0      # next row id (= physical length of a full column)
+        self._dead  = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    def add_field(self, name):
+        self._cols.setdefault(name, [])
+
+    def _write(self, rid, field, value):
+        col = self._cols.get(field)
+        if col is None:
+            col = self._cols[field] = []
+        if len(col) <= rid:
+            col.extend([""] * (rid + 1 - len(col)))
+        col[rid] = value
+
+    def append(self, row):
+        """Add a row from a {field: value} dict."""
+        rid = self._next
+        for f, v in row.items():
+            col = self._cols.get(f)
+            if col is not None and len(col) == rid:
+                col.append(v)
+            else:
+                self._write(rid, f, v)
+        self._order.append(rid)
+        self._next += 1
+
+    def get(self, i, field):
+        col = self._cols.get(field)
+        rid = self._order[i]
+        return col[rid] if col is not None and rid < len(col) else ""
+
+    def set(self, i, field, value):
+        self._write(self._order[i], field, value)
+
+    def values(self, i, fields):
+        return [self.get(i, f) for f in fields]
+
+    def row(self, i, fields):
+        return dict(zip(fields, self.values(i, fields)))
+
+    def rows(self, fields):
+        """Yield every row as a list of values for `fields`, in order."""
+        cols = [self._cols.get(f, []) for f in fields]
+        for rid in self._order:
+            yield [c[rid] if rid < len(c) else "" for c in cols]
+
+    def __delitem__(self, i):
+        rid = self._order.pop(i)
+        for col in self._cols.values():
+            if rid < len(col):
+                col[rid] = ""   # drop the reference now, reclaim the slot later
+        self._dead += 1
+        if self._dead > max(self.COMPACT_MIN, len(self._order)):
+            self._compact()
+
+    def _compact(self):
+        order = self._order
+        for f, col in self._cols.items():
+            n = len(col)
+            self._cols[f] = [col[rid] if rid < n else "" for rid in order]
+        self._order = array("q", range(len(order)))
+        self._next  = len(order)
+        self._dead  = 0
+
+    def column(self, field):
+        """All values of one field, in row order."""
+        col = self._cols.get(field, [])
+        n   = len(col)
+        return [col[rid] if rid < n else "" for rid in self._order]
+
+    def drop(self, positions):
+        """Remove many rows in one pass; positions refer to the current order."""
+        gone = set(positions)
+        self._order = array("q", (rid for i, rid in enumerate(self._order)
+                                  if i not in gone))
+        self._dead += len(gone)
+        if self._dead > max(self.COMPACT_MIN, len(self._order)):
+            self._compact()
+
+    def clear(self):
+        self._cols  = {f: [] for f in self._cols}
+        self._order = array("q")
+        self._next  = self._dead = 0
+
+
+class ImportJob:
+    """Runs a batch generator on a worker thread.
+
+    The UI drains `queue` with drain(); the queue is bounded so a slow UI
+    makes the reader wait instead of buffering the whole input.
+    """
+
+    def __init__(self, batches, total, label, finish):
+        self.label   = label
+        self.finish  = finish     # called on the UI thread with the job when done
+        self.total   = max(1, total)
+        self.done    = 0
+        self.added   = self.dupes = self.skipped = 0
+        self.error   = None
+        self.finished = False
+        self.cancel  = threading.Event()
+        self.queue   = queue.Queue(maxsize=IMPORT_QUEUE)
+        self._thread = threading.Thread(target=self._run, args=(batches,), daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self, batches):
+        try:
+            for item in batches:
+                while not self.cancel.is_set():
+                    try:
+                        self.queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self.cancel.is_set():
+                    break
+        except Exception as ex:
+            self.error = ex
+        finally:
+            batches.close()
+            self.queue.put(None)   # UI keeps draining until it sees this
+
+    def drain(self, budget=IMPORT_BUDGET):
+        """Yield queued batches for up to `budget` seconds."""
+        deadline = time.monotonic() + budget
+        while time.monotonic() < deadline:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self.finished = True
+                return
+            rows, self.done, skipped = item
+            self.skipped += skipped
+            if not self.cancel.is_set():
+                yield rows
+
+
+# ── Dedupe ────────────────────────────────────────────────────────────────────
+# Providers whose mailboxes ignore dots in the local part and/or accept
+# "+tag" sub-addresses — both map back to the same inbox.
+#   domain → (ignore dots, sub-address separator)
+PROVIDER_RULES = {
+    "gmail.com":      (True,  "+"),
+    "outlook.com":    (False, "+"),
+    "hotmail.com":    (False, "+"),
+    "live.com":       (False, "+"),
+    "icloud.com":     (False, "+"),
+    "me.com":         (False, "+"),
+    "fastmail.com":   (False, "+"),
+    "protonmail.com": (False, "+"),
+    "proton.me":      (False, "+"),
+}
+DOMAIN_ALIASES = {"googlemail.com": "gmail.com"}
+
+MERGE_RULES = ("first", "last", "longest", "most_common")
+DEFAULT_MERGE = {"company": "most_common"}          # anything else: "first"
+
+DEDUPE_THRESHOLD = 0.8   # local-part similarity for same name @ same domain
+MAX_BLOCK        = 50    # more addresses than this for one name at one domain
+                         # are different people (jsmith1@, jsmith2@, …), not typos
+DEDUPE_WINDOW    = 3     # sorted neighbours each local part is compared with
+
+_NOT_LETTERS = re.compile(r"[^a-z]+")
+_PUNCT       = re.compile(r"[^a-z0-9]+")
+_NOT_DIGITS  = re.compile(r"[^0-9]+")
+
+
+def canonical_email(addr):
+    """Lower-case address with provider aliases, dots and +tags folded."""
+    addr = addr.strip().lower()
+    local, at, domain = addr.rpartition("@")
+    if not at:
+        return addr
+    domain = DOMAIN_ALIASES.get(domain, domain)
+    rule = PROVIDER_RULES.get(domain)
+    if rule:
+        dots, sep = rule
+        local = local.split(sep, 1)[0]
+        if dots:
+            local = local.replace(".", "")
+    return f"{local}@{domain}"
+
+
+def fold(text):
+    """Lower-case letters only, accents stripped: "Zoë O'Neil" → "zoeoneil"."""
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NOT_LETTERS.sub("", text)
+
+
+def name_key(first, last):
+    """Order-insensitive key for a person's name, or "" if there is none."""
+    a, b = fold(first), fold(last)
+    if not a or not b:
+        return ""
+    return f"{a} {b}" if a <= b else f"{b} {a}"
+
+
+def find_duplicates(emails, firsts, lasts, fuzzy=True, threshold=DEDUPE_THRESHOLD):
+    """Group row positions that look like the same contact.
+
+    Rows whose canonical_email() matches are always grouped.  With `fuzzy`,
+    addresses at the same domain whose rows carry the same name are also
+    grouped when their local parts are similar — j.smith@acme.com and
+    john.smith@acme.com for John Smith.  Only rows sharing a (domain,
+    name) block are compared, and within a block each local part is only
+    checked against its DEDUPE_WINDOW sorted neighbours, so the cost stays
+    linear in the number of rows.  Local parts with different digits
+    (jsmith1@ vs jsmith2@) are never fuzzy-matched.
+
+    Returns a list of clusters, each a sorted list of ≥2 positions.
+    """
+    parent = {}
+
+    def root(i):
+        while parent.get(i, i) != i:
+            parent[i] = parent.get(parent[i], parent[i])
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = root(i), root(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    first_seen = {}
+    for i, addr in enumerate(emails):
+        j = first_seen.setdefault(canonical_email(addr), i)
+        if j != i:
+            union(j, i)
+
+    if fuzzy:
+        blocks = defaultdict(list)
+        for canon, i in first_seen.items():
+            key = name_key(firsts[i], lasts[i])
+            if not key:
+                continue
+            local, _, domain = canon.rpartition("@")
+            local = _PUNCT.sub("", local)
+            blocks[(domain, key)].append((local, _NOT_DIGITS.sub("", local), i))
+        for members in blocks.values():
+            if len(members) < 2 or len(members) > MAX_BLOCK:
+                continue
+            # similar local parts sort close together, so each one is only
+            # compared with its next few neighbours.  The matcher caches its
+            # analysis of seq2, so an anchor is prepared at most once, and
+            # the cheap upper bounds reject most pairs before ratio()
+            members.sort()
+            sm = SequenceMatcher(None)
+            for a, (la, da, ia) in enumerate(members):
+                anchored = False
+                for lb, db, ib in members[a + 1:a + 1 + DEDUPE_WINDOW]:
+                    if (ia in parent or ib in parent) and root(ia) == root(ib):
+                        continue            # already grouped
+                    if la != lb:
+                        if da != db:
+                            continue
+                        if 2 * min(len(la), len(lb)) < threshold * (len(la) + len(lb)):
+                            continue            # real_quick_ratio(), inlined
+                        if not anchored:
+                            sm.set_seq2(la)
+                            anchored = True
+                        sm.set_seq1(lb)
+                        if sm.quick_ratio() < threshold or sm.ratio() < threshold:
+                            continue
+                    union(ia, ib)
+
+    # roots never appear as keys in `parent`, so add each one to its cluster
+    clusters = defaultdict(list)
+    for i in list(parent):
+        clusters[root(i)].append(i)
+    return sorted(sorted([r] + members) for r, members in clusters.items())
+
+
+def merge_values(values, rule):
+    """Pick one value for a field from a cluster, ignoring blanks."""
+    vals = [v for v in values if v.strip()]
+    if not vals:
+        return ""
+    if rule == "last":
+        return vals[-1]
+    if rule == "longest":
+        return max(vals, key=len)
+    if rule == "most_common":
+        # spellings that fold to the same letters count together
+        # ("ACME, Inc." and "Acme Inc"); ties go to the earliest
+        counts = Counter(fold(v) for v in vals)
+        best = max(counts.values())
+        return next(v for v in vals if counts[fold(v)] == best)
+    return vals[0]
+
+
+def merge_duplicates(store, fields, clusters, rules=None):
+    """Collapse each cluster into its first row and drop the rest.
+
+    `rules` maps field → one of MERGE_RULES; unlisted fields use
+    DEFAULT_MERGE, then "first".  Returns the number of rows removed.
+    """
+    rules = {**DEFAULT_MERGE, **(rules or {})}
+    gone = []
+    for cluster in clusters:
+        keep = cluster[0]
+        for f in fields:
+            values = [store.get(i, f) for i in cluster]
+            store.set(keep, f, merge_values(values, rules.get(f, "first")))
+        gone.extend(cluster[1:])
+    store.drop(gone)
+    return len(gone)
+
+
 # ── Main App ──────────────────────────────────────────────────────────────────
 class CSVMaker(tk.Tk):
     def __init__(self):
@@ -76,10 +525,20 @@ class CSVMaker(tk.Tk):
         except Exception:
             pass
 
-        # data store:  list of dicts  {field: value, ...}
-        self.entries  = []
         self.fields   = ["email", "first_name", "last_name", "company"]   # match Email Sender tags
 
+        # data store:  one column of strings per field, see EntryStore
+        self.entries  = EntryStore(self.fields)
+        self.email_index = set()   # email_key() of every entry, kept in sync with self.entries
+        self.valid_count = 0       # entries whose email passes is_valid_email()
+
+        # virtual table: the Treeview only holds the rows currently on screen
+        self._top      = 0         # index of the entry shown in the first row
+        self._visible  = 1         # number of rows that fit in the table
+        self._selected = None      # index into self.entries, survives scrolling
+
+        self._import   = None      # running ImportJob, if any
+
         self._build_ui()
         self._refresh_table()
 
@@ -219,6 +678,19 @@ class CSVMaker(tk.Tk):
         self.lbl_valid   = self._stat_card(stats, "0", "VALID")
         self.lbl_invalid = self._stat_card(stats, "0", "INVALID")
 
+        # import progress — only packed while an ImportJob is running
+        self.import_frame = tk.Frame(stats, bg=BG)
+        tk.Button(self.import_frame, text="Cancel", font=FONT_SMALL,
+                  bg=SURFACE, fg=RED, relief="flat",
+                  activebackground=SURFACE2, cursor="hand2",
+                  command=self._cancel_import).pack(side="right", padx=(8, 0))
+        self.import_bar = ttk.Progressbar(self.import_frame, length=160,
+                                          mode="determinate", maximum=1000)
+        self.import_bar.pack(side="right")
+        self.import_label = tk.Label(self.import_frame, text="", font=FONT_SMALL,
+                                     bg=BG, fg=MUTED)
+        self.import_label.pack(side="right", padx=(0, 8))
+
         # table
         table_frame = tk.Frame(rf, bg=SURFACE, bd=0)
         table_frame.grid(row=1, column=0, sticky="nsew")
@@ -229,7 +701,7 @@ class CSVMaker(tk.Tk):
         style.theme_use("clam")
         style.configure("Custom.Treeview",
                          background=SURFACE, foreground=TEXT,
-                         rowheight=28, font=FONT_SMALL,
+                         rowheight=ROW_HEIGHT, font=FONT_SMALL,
                          fieldbackground=SURFACE, borderwidth=0)
         style.configure("Custom.Treeview.Heading",
                          background=SURFACE2, foreground=ACCENT,
@@ -240,17 +712,27 @@ class CSVMaker(tk.Tk):
 
         self.tree = ttk.Treeview(table_frame, style="Custom.Treeview",
                                   selectmode="browse", show="headings")
-        vsb = ttk.Scrollbar(table_frame, orient="vertical",
-                             command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
+        # the scrollbar drives self._top rather than the Treeview, which never
+        # holds more rows than fit on screen
+        self.vsb = ttk.Scrollbar(table_frame, orient="vertical",
+                                  command=self._yview)
         self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.vsb.grid(row=0, column=1, sticky="ns")
 
         self.tree.tag_configure("invalid", foreground=RED)
         self.tree.tag_configure("valid",   foreground=TEXT)
         self.tree.bind("<Delete>",      lambda e: self._delete_selected())
         self.tree.bind("<BackSpace>",   lambda e: self._delete_selected())
         self.tree.bind("<Double-1>",    lambda e: self._edit_selected())
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._on_select())
+        self.tree.bind("<Configure>",   lambda e: self._on_resize(e.height))
+        self.tree.bind("<MouseWheel>",  lambda e: self._scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>",    lambda e: self._scroll(-1, "units"))
+        self.tree.bind("<Button-5>",    lambda e: self._scroll(1, "units"))
+        self.tree.bind("<Up>",          lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>",        lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>",       lambda e: self._move_selection(-self._visible))
+        self.tree.bind("<Next>",        lambda e: self._move_selection(self._visible))
 
         # bottom action bar
         bot = tk.Frame(rf, bg=BG, pady=10)
@@ -286,6 +768,12 @@ class CSVMaker(tk.Tk):
                   cursor="hand2", padx=12, pady=6,
                   command=self._save_session).pack(side="right", padx=(0, 4))
 
+        tk.Button(bot, text="Dedupe…", font=FONT_SMALL,
+                  bg=SURFACE, fg=ACCENT, relief="flat",
+                  activebackground=SURFACE2, activeforeground=ACCENT,
+                  cursor="hand2", padx=12, pady=6,
+                  command=self._open_dedupe).pack(side="right", padx=(0, 4))
+
         tk.Button(bot, text="Delete Selected", font=FONT_SMALL,
                   bg=SURFACE, fg=MUTED, relief="flat",
                   activebackground=SURFACE2, cursor="hand2",
@@ -363,8 +851,7 @@ class CSVMaker(tk.Tk):
         if not name or name in self.fields:
             return
         self.fields.append(name)
-        for entry in self.entries:
-            entry.setdefault(name, "")
+        self.entries.add_field(name)
         self.new_field_var.set("")
         self._render_field_inputs()
         self._render_fields_list()
@@ -389,13 +876,15 @@ class CSVMaker(tk.Tk):
         if not email:
             messagebox.showwarning("Missing email", "Email field is required.")
             return
-        if any(e["email"].lower() == email.lower() for e in self.entries):
+        if email_key(email) in self.email_index:
             messagebox.showwarning("Duplicate", f"{email} is already in the list.")
             return
         self.entries.append(values)
+        self.email_index.add(email_key(email))
+        self._count(email, 1)
         for var in self.field_vars.values():
             var.set("")
-        self._refresh_table()
+        self._render_rows()
 
     def _update_bulk_hint(self):
         custom = [f for f in self.fields if f not in ("email", "first_name", "last_name", "company")]
@@ -405,71 +894,89 @@ class CSVMaker(tk.Tk):
         self.bulk_hint.config(text=hint)
 
     def _parse_bulk(self):
-        raw   = self.bulk_text.get("1.0", "end")
-        lines = [l.strip() for l in raw.splitlines() if l.strip()]
-        added = dupes = skipped = 0
-        core   = ("email", "first_name", "last_name", "company")
-        custom_fields = [f for f in self.fields if f not in core]
-
-        for line in lines:
-            em_match = re.search(r"[^\s@,;<>\"']+@[^\s@,;<>\"']+\.[^\s@,;<>\"']+", line)
-            if not em_match:
-                skipped += 1
-                continue
-            email = em_match.group(0).strip()
-
-            if any(e["email"].lower() == email.lower() for e in self.entries):
-                dupes += 1
+        if self._import_busy():
+            return
+        raw = self.bulk_text.get("1.0", "end")
+        self.bulk_status.config(text="Parsing…", fg=MUTED)
+
+        def finish(job):
+            msg = f"Added {job.added}"
+            if job.dupes:   msg += f" • Skipped {job.dupes} duplicate(s)"
+            if job.skipped: msg += f" • {job.skipped} line(s) had no email"
+            if job.cancel.is_set(): msg += " • Cancelled"
+            self.bulk_status.config(text=msg, fg=ACCENT if job.added else YELLOW)
+
+        self._run_import(bulk_batches(raw, list(self.fields)), len(raw),
+                         "Parsing", finish)
+
+    # ── Background import ─────────────────────────────────────────────────────
+    def _import_busy(self):
+        if self._import is not None:
+            messagebox.showinfo("Import running",
+                                "Wait for the current import to finish or cancel it.")
+            return True
+        return False
+
+    def _run_import(self, batches, total, label, finish):
+        job = ImportJob(batches, total, label, finish)
+        self._import = job
+        self.import_bar["value"] = 0
+        self.import_label.config(text=f"{label}…")
+        self.import_frame.pack(side="right")
+        job.start()
+        self.after(20, self._poll_import)
+
+    def _poll_import(self):
+        job = self._import
+        if job is None:
+            return
+        for rows in job.drain():
+            self._merge_rows(job, rows)
+        self.import_bar["value"] = int(1000 * min(1.0, job.done / job.total))
+        self.import_label.config(text=f"{job.label}… {job.added:,} added")
+        self._render_rows()
+        if not job.finished:
+            self.after(20, self._poll_import)
+            return
+        self._import = None
+        self.import_frame.pack_forget()
+        if job.error is not None:
+            messagebox.showerror("Import failed", str(job.error))
+        job.finish(job)
+
+    def _merge_rows(self, job, rows):
+        """Append a batch from the worker, skipping known addresses."""
+        index = self.email_index
+        for row in rows:
+            key = email_key(row["email"])
+            if key in index:
+                job.dupes += 1
                 continue
-
-            tokens = [t.strip().strip("\"'") for t in re.split(r"[,;\t]+", line)]
-            other_tokens = [t for t in tokens if t.lower() != email.lower()]
-
-            row = {f: "" for f in self.fields}
-            row["email"] = email
-
-            if other_tokens:
-                # if first token looks like "First Last" (single token, space inside), split it
-                name_token = other_tokens[0]
-                name_parts = name_token.split()
-                if len(name_parts) >= 2 and "first_name" in self.fields and "last_name" in self.fields:
-                    row["first_name"] = name_parts[0]
-                    row["last_name"]  = " ".join(name_parts[1:])
-                elif "first_name" in self.fields:
-                    row["first_name"] = name_token
-                remaining = other_tokens[1:]
-            else:
-                remaining = []
-
-            # map remaining tokens to: company first, then custom fields
-            extra_fields = (["company"] if "company" in self.fields else []) + custom_fields
-            for i, cf in enumerate(extra_fields):
-                row[cf] = remaining[i] if i < len(remaining) else ""
-
+            index.add(key)
             self.entries.append(row)
-            added += 1
+            self._count(row["email"], 1)
+            job.added += 1
 
-        msg = f"Added {added}"
-        if dupes:   msg += f" • Skipped {dupes} duplicate(s)"
-        if skipped: msg += f" • {skipped} line(s) had no email"
-        self.bulk_status.config(text=msg, fg=ACCENT if added else YELLOW)
-        self._refresh_table()
+    def _cancel_import(self):
+        if self._import is not None:
+            self._import.cancel.set()
 
     def _delete_selected(self):
-        sel = self.tree.selection()
-        if not sel:
+        idx = self._selected
+        if idx is None:
             return
-        iid = sel[0]
-        idx = self.tree.index(iid)
+        email = self.entries.get(idx, "email")
+        self.email_index.discard(email_key(email))
+        self._count(email, -1)
         del self.entries[idx]
-        self._refresh_table()
+        self._selected = None
+        self._render_rows()
 
     def _edit_selected(self):
-        sel = self.tree.selection()
-        if not sel:
+        idx = self._selected
+        if idx is None:
             return
-        idx     = self.tree.index(sel[0])
-        entry   = self.entries[idx]
+        entry   = self.entries.row(idx, self.fields)
 
         dlg = tk.Toplevel(self)
         dlg.title("Edit Entry")
@@ -514,13 +1021,17 @@ class CSVMaker(tk.Tk):
                 err_lbl.config(text="Email cannot be empty.")
                 return
             # dupe check — allow keeping same email
-            for j, e in enumerate(self.entries):
-                if j != idx and e["email"].lower() == new_email.lower():
-                    err_lbl.config(text=f"{new_email} already exists.")
-                    return
+            old_key, new_key = email_key(entry["email"]), email_key(new_email)
+            if new_key != old_key and new_key in self.email_index:
+                err_lbl.config(text=f"{new_email} already exists.")
+                return
+            self._count(entry["email"], -1)
             for field in self.fields:
-                self.entries[idx][field] = edit_vars[field].get().strip()
-            self._refresh_table()
+                self.entries.set(idx, field, edit_vars[field].get().strip())
+            self._count(new_email, 1)
+            self.email_index.discard(old_key)
+            self.email_index.add(new_key)
+            self._refresh_row(idx)
             dlg.destroy()
 
         tk.Frame(dlg, bg=BORDER, height=1).pack(fill="x")
@@ -536,39 +1047,252 @@ class CSVMaker(tk.Tk):
                   padx=16, pady=4,
                   command=save).pack(side="right")
 
+    def _open_dedupe(self):
+        if not self.entries or self._import_busy():
+            return
+
+        dlg = tk.Toplevel(self)
+        dlg.title("Find Duplicates")
+        dlg.configure(bg=SURFACE)
+        dlg.resizable(False, False)
+        dlg.grab_set()
+
+        self.update_idletasks()
+        x = self.winfo_x() + self.winfo_width()  // 2 - 240
+        y = self.winfo_y() + self.winfo_height() // 2 - 220
+        dlg.geometry(f"+{x}+{y}")
+
+        tk.Label(dlg, text="FIND DUPLICATES", font=FONT_BOLD,
+                 bg=SURFACE, fg=ACCENT, pady=10, padx=16, anchor="w").pack(fill="x")
+        tk.Frame(dlg, bg=BORDER, height=1).pack(fill="x")
+        tk.Label(dlg,
+                 text="Addresses match ignoring case, Gmail dots and +tags "
+                      "(Gmail, Outlook, iCloud, …).",
+                 font=FONT_SMALL, bg=SURFACE, fg=MUTED, padx=16, pady=6,
+                 anchor="w", wraplength=440, justify="left").pack(fill="x")
+
+        fuzzy_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(dlg, text="Also match the same name at the same domain",
+                       variable=fuzzy_var, font=FONT_SMALL, bg=SURFACE, fg=TEXT,
+                       command=lambda: btn_merge.config(state="disabled"),
+                       selectcolor=SURFACE2, activebackground=SURFACE,
+                       activeforeground=TEXT, padx=16, anchor="w").pack(fill="x")
+
+        # per-field merge rules
+        form = tk.Frame(dlg, bg=SURFACE, padx=16, pady=8)
+        form.pack(fill="x")
+        tk.Label(form, text="WHEN FIELDS DIFFER, KEEP", font=FONT_SMALL,
+                 bg=SURFACE, fg=MUTED, anchor="w").grid(row=0, column=0,
+                                                        columnspan=2, sticky="w")
+        rule_vars = {}
+        for i, field in enumerate(self.fields, start=1):
+            tk.Label(form, text=field.upper(), font=FONT_SMALL,
+                     bg=SURFACE, fg=MUTED, anchor="w",
+                     width=12).grid(row=i, column=0, sticky="w", pady=2)
+            var = tk.StringVar(value=DEFAULT_MERGE.get(field, "first"))
+            rule_vars[field] = var
+            ttk.Combobox(form, textvariable=var, values=MERGE_RULES,
+                         state="readonly", width=14,
+                         font=FONT_SMALL).grid(row=i, column=1, sticky="w", pady=2)
+
+        status = tk.Label(dlg, text="", font=FONT_SMALL, bg=SURFACE, fg=MUTED,
+                          padx=16, anchor="w")
+        status.pack(fill="x")
+        preview = tk.Listbox(dlg, height=8, width=60, font=FONT_SMALL,
+                             bg=SURFACE2, fg=TEXT, relief="flat", bd=0,
+                             highlightthickness=0, activestyle="none")
+        preview.pack(fill="x", padx=16, pady=(4, 8))
+
+        found = {"clusters": None}
+
+        def scan():
+            # columns are copied here; the dialog's grab keeps the list still
+            emails = self.entries.column("email")
+            firsts = self.entries.column("first_name")
+            lasts  = self.entries.column("last_name")
+            fuzzy  = fuzzy_var.get()
+            result = queue.Queue()
+            status.config(text="Scanning…", fg=MUTED)
+            btn_merge.config(state="disabled")
+            btn_scan.config(state="disabled")
+            threading.Thread(
+                target=lambda: result.put(find_duplicates(emails, firsts, lasts, fuzzy)),
+                daemon=True).start()
+
+            def poll():
+                if not dlg.winfo_exists():
+                    return
+                try:
+                    clusters = result.get_nowait()
+                except queue.Empty:
+                    self.after(50, poll)
+                    return
+                found["clusters"] = clusters
+                extra = sum(len(c) - 1 for c in clusters)
+                preview.delete(0, "end")
+                for c in clusters[:200]:
+                    preview.insert("end", f"{emails[c[0]]}  ←  "
+                                          + ", ".join(emails[i] for i in c[1:]))
+                if len(clusters) > 200:
+                    preview.insert("end", f"… and {len(clusters) - 200} more")
+                status.config(text=f"{len(clusters)} group(s) • {extra} row(s) would be merged away",
+                              fg=ACCENT if clusters else MUTED)
+                btn_scan.config(state="normal")
+                btn_merge.config(state="normal" if clusters else "disabled")
+
+            self.after(50, poll)
+
+        def merge():
+            clusters = found["clusters"]
+            if not clusters:
+                return
+            rules   = {f: v.get() for f, v in rule_vars.items()}
+            removed = merge_duplicates(self.entries, self.fields, clusters, rules)
+            self._reindex()
+            dlg.destroy()
+            messagebox.showinfo("Dedupe", f"Merged {len(clusters)} group(s), "
+                                          f"removed {removed} duplicate row(s).")
+
+        tk.Frame(dlg, bg=BORDER, height=1).pack(fill="x")
+        btn_row = tk.Frame(dlg, bg=SURFACE, padx=16, pady=10)
+        btn_row.pack(fill="x")
+        tk.Button(btn_row, text="Close", font=FONT_SMALL,
+                  bg=SURFACE2, fg=MUTED, relief="flat",
+                  activebackground=BORDER, cursor="hand2",
+                  command=dlg.destroy).pack(side="right", padx=(8, 0))
+        btn_merge = tk.Button(btn_row, text="Merge", font=FONT_BOLD,
+                              bg=ACCENT, fg=BG, relief="flat",
+                              activebackground=ACCENT_D, cursor="hand2",
+                              padx=16, pady=4, state="disabled", command=merge)
+        btn_merge.pack(side="right")
+        btn_scan = tk.Button(btn_row, text="Scan", font=FONT_SMALL,
+                             bg=SURFACE2, fg=ACCENT, relief="flat",
+                             activebackground=BORDER, cursor="hand2",
+                             padx=12, pady=4, command=scan)
+        btn_scan.pack(side="right", padx=(0, 8))
+
+    def _reindex(self):
+        """Rebuild the email index and counters after a bulk change."""
+        emails = self.entries.column("email")
+        self.email_index = {email_key(e) for e in emails}
+        self.valid_count = sum(1 for e in emails if is_valid_email(e))
+        self._selected = None
+        self._render_rows()
+
     def _clear_all(self):
         if not self.entries:
             return
         if messagebox.askyesno("Clear all", "Remove all entries?"):
+            self._cancel_import()
             self.entries.clear()
-            self._refresh_table()
+            self.email_index.clear()
+            self.valid_count = 0
+            self._top = 0
+            self._selected = None
+            self._render_rows()
 
     # ── Table refresh ─────────────────────────────────────────────────────────
+    # The Treeview is virtual: it holds one item per visible row ("0", "1", …)
+    # and those items are re-filled from self.entries[self._top:] whenever the
+    # list scrolls or changes.  Nothing here is proportional to len(entries).
     def _refresh_table(self):
-        # rebuild columns
+        """Rebuild columns (fields may have changed) and redraw the rows."""
         self.tree["columns"] = self.fields
         for f in self.fields:
             self.tree.heading(f, text=f.upper())
             self.tree.column(f, width=160, minwidth=80, stretch=True)
-
-        # clear rows
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        # insert entries
-        for entry in self.entries:
-            vals = [entry.get(f, "") for f in self.fields]
-            tag  = "valid" if is_valid_email(entry.get("email", "")) else "invalid"
-            self.tree.insert("", "end", values=vals, tags=(tag,))
-
-        # stats
+        self._render_rows()
+
+    def _count(self, email, sign):
+        if is_valid_email(email):
+            self.valid_count += sign
+
+    def _row_values(self, idx):
+        tag = "valid" if is_valid_email(self.entries.get(idx, "email")) else "invalid"
+        return self.entries.values(idx, self.fields), (tag,)
+
+    def _render_rows(self):
+        """Fill the on-screen rows from self._top and sync scrollbar and stats."""
+        total = len(self.entries)
+        self._top = max(0, min(self._top, total - self._visible))
+        shown = min(self._visible, total - self._top)
+
+        items = self.tree.get_children()
+        for iid in items[shown:]:
+            self.tree.delete(iid)
+        for i in range(shown):
+            vals, tags = self._row_values(self._top + i)
+            if i < len(items):
+                self.tree.item(str(i), values=vals, tags=tags)
+            else:
+                self.tree.insert("", "end", iid=str(i), values=vals, tags=tags)
+
+        sel = self._selected
+        if sel is not None and self._top <= sel < self._top + shown:
+            self.tree.selection_set(str(sel - self._top))
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        if total:
+            self.vsb.set(self._top / total, (self._top + shown) / total)
+        else:
+            self.vsb.set(0, 1)
+        self._update_stats()
+
+    def _refresh_row(self, idx):
+        """Redraw a single entry after an edit, if it is on screen."""
+        if self._top <= idx < self._top + self._visible:
+            vals, tags = self._row_values(idx)
+            self.tree.item(str(idx - self._top), values=vals, tags=tags)
+        self._update_stats()
+
+    def _update_stats(self):
         total   = len(self.entries)
-        valid   = sum(1 for e in self.entries if is_valid_email(e.get("email", "")))
+        valid   = self.valid_count
         invalid = total - valid
         self.lbl_total.config(text=str(total))
         self.lbl_valid.config(text=str(valid), fg=ACCENT if valid else TEXT)
         self.lbl_invalid.config(text=str(invalid), fg=RED if invalid else TEXT)
 
+    def _yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, what)."""
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self.entries))
+            self._render_rows()
+        elif args[0] == "scroll":
+            self._scroll(int(args[1]), args[2])
+
+    def _scroll(self, n, what):
+        step = self._visible if what == "pages" else 1
+        self._top += n * step
+        self._render_rows()
+        return "break"
+
+    def _on_resize(self, height):
+        # first row sits under the heading, which is about one row tall
+        visible = max(1, height // ROW_HEIGHT - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._render_rows()
+
+    def _on_select(self):
+        sel = self.tree.selection()
+        if sel:
+            self._selected = self._top + int(sel[0])
+
+    def _move_selection(self, step):
+        if not self.entries:
+            return "break"
+        cur = self._selected if self._selected is not None else self._top - 1
+        idx = max(0, min(len(self.entries) - 1, cur + step))
+        self._selected = idx
+        if idx < self._top:
+            self._top = idx
+        elif idx >= self._top + self._visible:
+            self._top = idx - self._visible + 1
+        self._render_rows()
+        self.tree.focus(str(idx - self._top))
+        return "break"
 
     # ── Save session ──────────────────────────────────────────────────────────
     def _save_session(self):
@@ -585,15 +1309,17 @@ class CSVMaker(tk.Tk):
         if not path:
             return
         with open(path, "w", newline="", encoding="utf-8") as fh:
-            writer = csv.DictWriter(fh, fieldnames=self.fields, extrasaction="ignore")
-            writer.writeheader()
-            writer.writerows(self.entries)
+            writer = csv.writer(fh)
+            writer.writerow(self.fields)
+            writer.writerows(self.entries.rows(self.fields))
         messagebox.showinfo("Saved",
                              f"Session saved ({len(self.entries)} entries):\n{os.path.basename(path)}")
 
     # ── Load CSV ──────────────────────────────────────────────────────────────
     def _load_csv(self):
         """Load a CSV. Any columns beyond email/name become custom fields."""
+        if self._import_busy():
+            return
         path = filedialog.askopenfilename(
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
             title="Load CSV"
@@ -601,28 +1327,31 @@ class CSVMaker(tk.Tk):
         if not path:
             return
 
+        # only the header and first record are read here; the rest streams
+        # in on the import thread
         try:
             with open(path, newline="", encoding="utf-8-sig") as fh:
-                reader = csv.DictReader(fh)
-                if not reader.fieldnames:
+                reader = csv.reader(fh)
+                header = next(reader, None)
+                if not header:
                     messagebox.showerror("Load failed", "CSV has no headers.")
                     return
 
                 # normalise header names
-                csv_fields = [f.strip().lower().replace(" ", "_")
-                               for f in reader.fieldnames]
+                csv_fields = [normalise_header(f) for f in header]
 
                 if "email" not in csv_fields:
                     messagebox.showerror("Load failed",
                                           "CSV must have an 'email' column.")
                     return
 
-                rows = list(reader)
+                has_rows = next(reader, None) is not None
+            size = os.path.getsize(path)
         except Exception as ex:
             messagebox.showerror("Load failed", str(ex))
             return
 
-        if not rows:
+        if not has_rows:
             messagebox.showwarning("Empty file", "The CSV has no data rows.")
             return
 
@@ -641,29 +1370,17 @@ class CSVMaker(tk.Tk):
             mode = "replace" if ans else "append"
 
         # discover any new custom fields in the CSV
-        new_fields = [f for f in csv_fields if f not in self.fields]
+        new_fields = [f for f in dict.fromkeys(csv_fields) if f and f not in self.fields]
         for nf in new_fields:
             self.fields.append(nf)
-            for existing in self.entries:
-                existing.setdefault(nf, "")
+            self.entries.add_field(nf)
 
         if mode == "replace":
             self.entries.clear()
-
-        added = dupes = 0
-        for raw_row in rows:
-            # remap headers to normalised names
-            row = {f.strip().lower().replace(" ", "_"): v.strip()
-                   for f, v in raw_row.items()}
-            email = row.get("email", "").strip()
-            if not email:
-                continue
-            if any(e["email"].lower() == email.lower() for e in self.entries):
-                dupes += 1
-                continue
-            entry = {f: row.get(f, "") for f in self.fields}
-            self.entries.append(entry)
-            added += 1
+            self.email_index.clear()
+            self.valid_count = 0
+            self._top = 0
+            self._selected = None
 
         # rebuild UI to reflect any new fields
         self._render_field_inputs()
@@ -672,22 +1389,26 @@ class CSVMaker(tk.Tk):
         self._update_bulk_hint()
         self._refresh_table()
 
-        msg = f"Loaded {added} entries"
-        if new_fields:
-            msg += f"\nNew fields added: {', '.join(new_fields)}"
-        if dupes:
-            msg += f"\nSkipped {dupes} duplicate(s)"
-        messagebox.showinfo("Loaded", msg)
+        def finish(job):
+            msg = f"Loaded {job.added} entries"
+            if new_fields:
+                msg += f"\nNew fields added: {', '.join(new_fields)}"
+            if job.dupes:
+                msg += f"\nSkipped {job.dupes} duplicate(s)"
+            if job.cancel.is_set():
+                msg += "\nCancelled before the end of the file"
+            messagebox.showinfo("Loaded", msg)
+
+        self._run_import(csv_batches(path, list(self.fields)), size,
+                         f"Loading {os.path.basename(path)}", finish)
 
     # ── Export ────────────────────────────────────────────────────────────────
     def _export_csv(self):
         if not self.entries:
             messagebox.showwarning("Nothing to export", "Add some entries first.")
             return
-        rows = self.entries
-        if self.skip_invalid_var.get():
-            rows = [e for e in rows if is_valid_email(e.get("email", ""))]
-        if not rows:
+        skip_invalid = self.skip_invalid_var.get()
+        if skip_invalid and not self.valid_count:
             messagebox.showwarning("Nothing to export",
                                     "No valid emails to export.")
             return
@@ -699,13 +1420,17 @@ class CSVMaker(tk.Tk):
         )
         if not path:
             return
+        # stream straight from the columns; email is always the first field
+        rows = self.entries.rows(self.fields)
+        if skip_invalid:
+            rows = (r for r in rows if is_valid_email(r[0]))
         with open(path, "w", newline="", encoding="utf-8") as fh:
-            writer = csv.DictWriter(fh, fieldnames=self.fields,
-                                     extrasaction="ignore")
-            writer.writeheader()
+            writer = csv.writer(fh)
+            writer.writerow(self.fields)
             writer.writerows(rows)
+        count = self.valid_count if skip_invalid else len(self.entries)
         messagebox.showinfo("Exported",
-                             f"Saved {len(rows)} entries to:\n{os.path.basename(path)}")
+                             f"Saved {count} entries to:\n{os.path.basename(path)}")
 
 
 if __name__ == "__main__":
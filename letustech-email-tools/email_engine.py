@@ -0,0 +1,2945 @@
+#!/usr/bin/env python3
+"""
+Email engine — LetUsTech
+Everything a campaign needs except the window: config, templates,
+contacts, the send journal, SMTP transports and the campaign runner.
+Imports nothing from Tk, so it can run headless from cron or a server:
+
+    python email_engine.py --csv contacts.csv --template offer.txt
+"""
+
+import csv, smtplib, ssl, threading, queue, time, json, re, sys, os, codecs, hashlib
+import asyncio, base64, socket, math, atexit
+from array import array
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.mime.base import MIMEBase
+from email import encoders
+from collections import deque, OrderedDict, Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+CONFIG_FILE  = Path.home() / ".letustech_email_config.enc"
+CONFIG_FILE_LEGACY = Path.home() / ".letustech_email_config.json"
+
+# ── Encryption helpers ──────────────────────────────────────────────────────
+# Key is derived from a machine-specific value so config can't just be
+# copied to another machine and read. Nothing is stored in plain text.
+SENSITIVE_KEYS = {"pass", "user", "host"}  # fields to always encrypt
+
+_cipher = None   # Fernet instance once built, False without cryptography
+
+def _fernet():
+    """Fernet cipher for the config file, or None without ``cryptography``.
+
+    Imported and keyed on first use, then reused for the life of the
+    process — headless runs that never touch the saved config don't pay
+    for it, and the app doesn't pay for it on every save.
+    """
+    global _cipher
+    if _cipher is None:
+        try:
+            from cryptography.fernet import Fernet
+            _cipher = Fernet(_get_key())
+        except ImportError:
+            _cipher = False
+    return _cipher or None
+
+def _get_key() -> bytes:
+    """Derive a stable Fernet key from a machine identifier."""
+    import uuid
+    machine_id = str(uuid.getnode()).encode()
+    digest = hashlib.sha256(machine_id + b"letustech-v1").digest()
+    return base64.urlsafe_b64encode(digest)
+
+def atomic_write(path, data: bytes):
+    """Replace ``path`` with ``data`` so readers see the old or new file, never half."""
+    path = Path(path)
+    tmp  = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+class ConfigStore:
+    """The saved settings, read from disk once and kept in memory.
+
+    load() hands out copies of the in-memory snapshot. save() replaces
+    the snapshot straight away and writes it out ``DEBOUNCE`` seconds
+    later on a timer thread, so a burst of saves from the settings
+    window costs one encrypt-and-write. Writes go to a temp file that is
+    then renamed over the real one, so a crash mid-write leaves the old
+    settings intact. flush() writes anything pending right now; it runs
+    at exit too.
+    """
+
+    DEBOUNCE = 0.5   # seconds
+
+    def __init__(self, path, legacy=None):
+        self.path    = Path(path)
+        self.legacy  = Path(legacy) if legacy else None
+        self._data   = None
+        self._dirty  = False
+        self._timer  = None
+        self._lock   = threading.Lock()   # guards the snapshot
+        self._io     = threading.Lock()   # keeps writes in order
+
+    def load(self) -> dict:
+        with self._lock:
+            if self._data is None:
+                self._data = self._read()
+            return dict(self._data)
+
+    def save(self, data: dict):
+        with self._lock:
+            self._data  = dict(data)
+            self._dirty = True
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.DEBOUNCE, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._io:
+            with self._lock:
+                if not self._dirty:
+                    return
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                data, self._dirty = dict(self._data), False
+            self._write(data)
+
+    def clear(self):
+        """Forget every setting and delete the file."""
+        with self._io:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                self._data, self._dirty = {}, False
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def _read(self) -> dict:
+        # Migrate legacy plain-text config if it exists
+        if self.legacy and self.legacy.exists() and not self.path.exists():
+            try:
+                data = json.loads(self.legacy.read_text())
+                self._write(data)
+                self.legacy.unlink()  # remove old plain-text file
+            except Exception:
+                pass
+
+        if not self.path.exists():
+            return {}
+        try:
+            raw = self.path.read_bytes()
+            f   = _fernet()
+            if f:
+                data = json.loads(f.decrypt(raw).decode())
+            else:
+                # Fallback: base64 only (obfuscation, not true encryption)
+                data = json.loads(base64.b64decode(raw).decode())
+            return data
+        except Exception:
+            return {}
+
+    def _write(self, data: dict):
+        try:
+            payload = json.dumps(data, indent=2).encode()
+            f       = _fernet()
+            if f:
+                out = f.encrypt(payload)
+            else:
+                out = base64.b64encode(payload)
+            atomic_write(self.path, out)
+        except Exception:
+            pass
+
+CONFIG_STORE = ConfigStore(CONFIG_FILE, CONFIG_FILE_LEGACY)
+atexit.register(CONFIG_STORE.flush)
+
+def load_config() -> dict:
+    return CONFIG_STORE.load()
+
+def save_config(data: dict):
+    CONFIG_STORE.save(data)
+
+# ── Helpers ─────────────────────────────────────────────────────────────────
+EMAIL_RE = re.compile(r"""
+    [A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*  # local
+    @
+    (?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+            # labels
+    (?:[A-Za-z]{2,63}|xn--[A-Za-z0-9-]{1,59})                       # TLD
+""", re.X)
+
+def validate_email(email):
+    """RFC 5321-style syntax check: dot-atom local part, real domain labels."""
+    email = email.strip()
+    local, _, _ = email.rpartition("@")
+    return (len(email) <= 254 and len(local) <= 64
+            and EMAIL_RE.fullmatch(email) is not None)
+
+def normalise_email(email):
+    """The form two addresses are compared in when de-duplicating."""
+    return (email or "").strip().lower()
+
+TAG_RE = re.compile(r"\{\{([^}]+)\}\}")
+
+def settings_tags(config):
+    """App settings exposed as built-in {{tags}}."""
+    return {
+        "company_name":    config.get("company_name", ""),
+        "sender_name":     config.get("sender_name", ""),
+        "sender_role":     config.get("sender_role", ""),
+        "signature":       config.get("sender_sig", ""),
+        "company_website": config.get("company_website", ""),
+        "company_phone":   config.get("company_phone", ""),
+        "company_address": config.get("company_address", ""),
+    }
+
+def append_footer(template, config):
+    """Auto-append the configured footer unless the template already has it."""
+    footer = config.get("email_footer", "").strip()
+    if footer and footer not in template:
+        template = template.rstrip() + f"\n\n--\n{footer}"
+    return template
+
+def personalise(template, row, config=None):
+    # Build a case-insensitive lookup of the row
+    row_lower = {k.lower().strip(): v for k, v in row.items()}
+
+    # Inject app settings as built-in tags
+    if config:
+        row_lower.update(settings_tags(config))
+        template = append_footer(template, config)
+
+    def replace_tag(match):
+        tag = match.group(1).strip()
+        if tag in row:
+            return row[tag]
+        if tag.lower() in row_lower:
+            return row_lower[tag.lower()]
+        return match.group(0)
+
+    return TAG_RE.sub(replace_tag, template)
+
+class CompiledTemplate:
+    """A {{tag}} template parsed once for a fixed set of CSV headers.
+
+    The template is split into literal text and slots. Each slot is
+    resolved up front — to a column index, a settings value, or left as
+    the original text — so render() is a single join per row. Output is
+    identical to personalise() for the same template, headers and config.
+
+    Tags that match nothing, and settings tags that are blank, are listed
+    in ``unknown``. unresolved() adds whichever column tags are empty for
+    a given row.
+    """
+
+    def __init__(self, template, headers, config=None):
+        self.headers = list(headers)
+        builtins = {}
+        if config:
+            builtins = settings_tags(config)
+            template = append_footer(template, config)
+
+        # Mirror personalise(): exact column names win (last duplicate wins,
+        # as in a DictReader row), then settings, then a case-insensitive
+        # column match.
+        exact = {h: i for i, h in enumerate(self.headers)}
+        lower = {h.lower().strip(): exact[h] for h in dict.fromkeys(self.headers)}
+
+        parts, pos = [""], 0   # alternating literal, slot, literal, ...
+        names, unknown = [], []
+        for m in TAG_RE.finditer(template):
+            parts[-1] += template[pos:m.start()]
+            tag = m.group(1).strip()
+            if tag in exact:
+                parts += [exact[tag], ""]
+                names.append(tag)
+            elif tag.lower() in builtins:
+                parts[-1] += builtins[tag.lower()]
+                if not builtins[tag.lower()]:
+                    unknown.append(tag)
+            elif tag.lower() in lower:
+                parts += [lower[tag.lower()], ""]
+                names.append(tag)
+            else:
+                parts[-1] += m.group(0)
+                unknown.append(tag)
+            pos = m.end()
+        parts[-1] += template[pos:]
+
+        self._literals = parts[0::2]
+        self._slots    = parts[1::2]
+        self._keys     = [self.headers[i] for i in self._slots]
+        self._names    = names
+        self.unknown   = list(dict.fromkeys(unknown))
+        self.static    = not self._slots
+
+    def render(self, row):
+        """Render one row — a DictReader dict or a list aligned with headers."""
+        lits = self._literals
+        if self.static:
+            return lits[0]
+        if isinstance(row, dict):
+            vals = [row.get(k) for k in self._keys]
+        else:
+            n = len(row)
+            vals = [row[i] if i < n else None for i in self._slots]
+        out = [lits[0]]
+        for v, lit in zip(vals, lits[1:]):
+            out.append(v or "")
+            out.append(lit)
+        return "".join(out)
+
+    def unresolved(self, row):
+        """Tag names that come out blank or untouched for this row (a dict)."""
+        empty = [n for n, k in zip(self._names, self._keys) if not row.get(k)]
+        return list(dict.fromkeys(self.unknown + empty))
+
+    def segments(self, row):
+        """render() as ``(text, kind)`` pieces for highlighting a preview.
+
+        kind is None for template text, ``"value"`` for a filled-in tag
+        and ``"missing"`` for a tag that came out blank or was left as
+        ``{{tag}}``.
+        """
+        def literal(text):
+            pos = 0
+            for m in TAG_RE.finditer(text):
+                yield text[pos:m.start()], None
+                yield m.group(0), "missing"
+                pos = m.end()
+            yield text[pos:], None
+
+        out = list(literal(self._literals[0]))
+        for key, name, lit in zip(self._keys, self._names, self._literals[1:]):
+            value = row.get(key)
+            out.append((value, "value") if value else
+                       ("{{" + name + "}}", "missing"))
+            out.extend(literal(lit))
+        return [(text, kind) for text, kind in out if text]
+
+def compile_template(template, headers, config=None):
+    return CompiledTemplate(template, headers, config)
+
+# ── Recipient validation ────────────────────────────────────────────────────
+class StubResolver:
+    """Offline resolver answering from a dict — for tests and dry runs."""
+
+    def __init__(self, answers=None, default=True):
+        self.answers = {d.lower(): a for d, a in (answers or {}).items()}
+        self.default = default
+        self.calls   = 0
+
+    def has_mx(self, domain):
+        self.calls += 1
+        return self.answers.get(domain.lower(), self.default)
+
+class DNSResolver:
+    """Asks DNS whether a domain accepts mail.
+
+    Uses dnspython's MX lookup when it is installed; otherwise falls back
+    to an address lookup, since a domain with an A record but no MX still
+    takes mail (RFC 5321 §5.1). has_mx() answers True, False when the
+    domain definitely can't receive mail, or None when DNS couldn't say.
+
+    Without DNS at all (offline, blocked resolver) every name looks
+    missing, so before trusting a "no such domain" the fallback checks
+    that a few well-known domains resolve.
+    """
+
+    PROBES = ("gmail.com", "outlook.com", "yahoo.com")
+
+    def __init__(self, timeout=3.0):
+        self.timeout = timeout
+        self._dns_ok = None
+
+    def has_mx(self, domain):
+        try:
+            import dns.resolver, dns.exception
+        except ImportError:
+            return self._has_address(domain)
+        try:
+            answer = dns.resolver.resolve(domain, "MX", lifetime=self.timeout)
+        except dns.resolver.NXDOMAIN:
+            return False
+        except dns.resolver.NoAnswer:
+            return self._has_address(domain)
+        except dns.exception.DNSException:
+            return None
+        # RFC 7505 "null MX": the domain says it never accepts mail
+        return not all(str(r.exchange) == "." for r in answer)
+
+    def _has_address(self, domain):
+        answer = self._resolves(domain)
+        if answer is False and not self._dns_works():
+            return None
+        return answer
+
+    def _dns_works(self):
+        if self._dns_ok is None:
+            self._dns_ok = any(self._resolves(d) for d in self.PROBES)
+        return self._dns_ok
+
+    @staticmethod
+    def _resolves(domain):
+        try:
+            socket.getaddrinfo(domain, None)
+            return True
+        except socket.gaierror as e:
+            missing = {socket.EAI_NONAME, getattr(socket, "EAI_NODATA", None)}
+            return False if e.errno in missing else None
+        except (UnicodeError, OSError):
+            return None
+
+class CachedResolver:
+    """Wraps a resolver so each domain is looked up once per TTL.
+
+    Answers DNS couldn't give (None) are kept for a shorter time so a
+    flaky lookup gets retried.
+    """
+
+    def __init__(self, resolver, ttl=3600, unknown_ttl=60):
+        self.resolver    = resolver
+        self.ttl         = ttl
+        self.unknown_ttl = unknown_ttl
+        self.lookups     = 0
+        self._cache = {}   # domain -> (answer, expires)
+        self._lock  = threading.Lock()
+
+    def has_mx(self, domain):
+        domain = domain.lower()
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(domain)
+            if hit and hit[1] > now:
+                return hit[0]
+        answer = self.resolver.has_mx(domain)
+        ttl = self.ttl if answer is not None else self.unknown_ttl
+        with self._lock:
+            self._cache[domain] = (answer, now + ttl)
+            self.lookups += 1
+        return answer
+
+# Shared by list scans and sends, so a domain checked on import isn't
+# looked up again when the campaign goes out. Swap for a StubResolver
+# in tests.
+RESOLVER = CachedResolver(DNSResolver())
+
+REJECT_REASONS = {
+    "syntax":     "invalid address",
+    "duplicate":  "duplicate",
+    "suppressed": "on the suppression list",
+    "no-mx":      "no mail server for domain",
+}
+
+class RecipientValidator:
+    """Checks recipients before anything is sent.
+
+    check() normalises an address and returns ``(address, reason)`` where
+    reason is None for a good address, or one of REJECT_REASONS: bad
+    syntax, a case-insensitive repeat of an earlier address, an address
+    in ``suppressions`` (a SuppressionStore), or a domain DNS says can't
+    receive mail. Domains DNS couldn't answer for are let through — the
+    SMTP server will have the final word.
+    """
+
+    WORKERS = 16   # parallel DNS lookups in prefetch()
+
+    def __init__(self, resolver=None, check_mx=True, dedupe=True,
+                 suppressions=None):
+        self.resolver = resolver or RESOLVER
+        self.check_mx = check_mx
+        self.dedupe   = dedupe
+        self.suppressions = suppressions
+        self.seen     = set()
+        self.rejected = Counter()
+
+    def check(self, email):
+        addr = normalise_email(email)
+        if not validate_email(addr):
+            reason = "syntax"
+        elif self.dedupe and addr in self.seen:
+            reason = "duplicate"
+        elif self.suppressions is not None and addr in self.suppressions:
+            reason = "suppressed"
+        elif self.check_mx and \
+                self.resolver.has_mx(addr.rpartition("@")[2]) is False:
+            reason = "no-mx"
+        else:
+            self.seen.add(addr)
+            return addr, None
+        self.rejected[reason] += 1
+        return addr, reason
+
+    def prefetch(self, domains):
+        """Resolve many domains in parallel so later checks hit the cache."""
+        if not self.check_mx or not domains:
+            return {}
+        from concurrent.futures import ThreadPoolExecutor
+        domains = list(domains)
+        with ThreadPoolExecutor(min(self.WORKERS, len(domains))) as pool:
+            return dict(zip(domains, pool.map(self.resolver.has_mx, domains)))
+
+    def describe(self):
+        """Human summary of what was rejected, e.g. ``3 duplicate, 1 invalid address``."""
+        return ", ".join(f"{n:,} {REJECT_REASONS[r]}"
+                         for r, n in self.rejected.most_common())
+
+# ── Attachments ─────────────────────────────────────────────────────────────
+class AttachmentCache:
+    """Attachment MIME parts read and base64-encoded once per campaign.
+
+    Every message shares the same encoded part. Each file is re-stat'ed on
+    use and rebuilt if its size or mtime has changed, so an edit made
+    mid-campaign goes out to the remaining recipients.
+    """
+
+    def __init__(self, paths=(), log=None):
+        self.paths  = list(paths)
+        self._log   = log or (lambda msg, tag="info": None)
+        self._parts = {}   # path -> (size, mtime_ns, part)
+        self._lock  = threading.Lock()
+
+    def part(self, path):
+        st = os.stat(path)
+        with self._lock:
+            cached = self._parts.get(path)
+            if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+                return cached[2]
+            with open(path, "rb") as af:
+                part = MIMEBase("application", "octet-stream")
+                part.set_payload(af.read())
+            encoders.encode_base64(part)
+            part.add_header("Content-Disposition",
+                f"attachment; filename={Path(path).name}")
+            if cached:
+                self._log(f"Attachment changed on disk — re-encoded "
+                          f"{Path(path).name}", "info")
+            self._parts[path] = (st.st_size, st.st_mtime_ns, part)
+            return part
+
+    def attach_all(self, msg, on_error=None):
+        """Attach every file to ``msg``; failures go to ``on_error(exc)``."""
+        for path in self.paths:
+            try:
+                msg.attach(self.part(path))
+            except Exception as ae:
+                if on_error:
+                    on_error(ae)
+
+# ── Messages ────────────────────────────────────────────────────────────────
+class MessageBuilder:
+    """Turns one contact row into the finished email.
+
+    Campaigns, the preview browser and .eml export all go through this,
+    so what you check is what gets sent. Templates are compiled and
+    attachments encoded once, up front.
+    """
+
+    def __init__(self, subject, body, headers, config=None, *, user="",
+                 from_name="", html=False, attachments=(), metrics=None,
+                 log=None):
+        self.subject  = compile_template(subject, headers, config)
+        self.body     = compile_template(body, headers, config)
+        self.from_hdr = f"{from_name or user} <{user}>"
+        self.subtype  = "html" if html else "plain"
+        self.metrics  = metrics or CampaignMetrics()
+        self._log     = log or (lambda msg, tag="info": None)
+        self.attachments = AttachmentCache(attachments, log=self._log)
+
+    def render(self, row):
+        """``(subject, body)`` for one row."""
+        return self.subject.render(row), self.body.render(row)
+
+    def unresolved(self, row):
+        return list(dict.fromkeys(self.subject.unresolved(row) +
+                                  self.body.unresolved(row)))
+
+    def _compose(self, subject, text, to_email):
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"]    = self.from_hdr
+        msg["To"]      = to_email
+        msg.attach(MIMEText(text, self.subtype))
+        self.attachments.attach_all(msg, on_error=lambda ae:
+            self._log(f"Attachment error: {ae}", "warn"))
+        return msg
+
+    def build(self, row, to_email):
+        """The serialised message, ready for sendmail()."""
+        with self.metrics.timer("render"):
+            subject, text = self.render(row)
+        with self.metrics.timer("mime"):
+            payload = self._compose(subject, text, to_email).as_string()
+        self.metrics.size(len(payload))
+        return payload
+
+def export_eml(builder, contacts, directory, progress=None, stop_flag=None):
+    """Write one ``.eml`` per contact that would be sent, for offline checks.
+
+    Contacts a campaign would skip (bad syntax, duplicates) are skipped
+    here too; domains aren't looked up. ``progress(done, total)`` is
+    called every few hundred rows. Returns how many files were written.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    validator = RecipientValidator(check_mx=False)
+    col, total, written = contacts.email_col, len(contacts), 0
+    for i, row in enumerate(contacts.iter_rows()):
+        if stop_flag is not None and stop_flag.is_set():
+            break
+        to_email = (row.get(col) or "").strip()
+        if validator.check(to_email)[1] is None:
+            safe = re.sub(r"[^\w.@+-]", "_", to_email)
+            with open(directory / f"{i + 1:06d}_{safe}.eml", "w",
+                      encoding="utf-8", newline="\r\n") as f:
+                f.write(builder.build(row, to_email))
+            written += 1
+        if progress and (i + 1) % 250 == 0:
+            progress(i + 1, total)
+    if progress:
+        progress(total, total)
+    return written
+
+# ── Contacts ────────────────────────────────────────────────────────────────
+class CSVContactSource:
+    """A CSV contact list read from disk on demand instead of held in memory.
+
+    Opening reads just the header and first row. scan() — run on a
+    background thread — then walks the file once, recording the byte
+    offset of every BLOCK-th row and counting total and valid rows. Any
+    row can then be fetched with a short seek-and-parse, and sending
+    streams straight off the file, so memory stays flat however big the
+    list is. Rows come back as dicts, exactly as csv.DictReader gives them.
+
+    ``valid`` counts addresses that pass a RecipientValidator — syntax and
+    duplicates while reading, then one MX lookup per distinct domain.
+    """
+
+    BLOCK = 256   # rows per index entry
+
+    def __init__(self, path, encoding="utf-8-sig"):
+        self.path      = path
+        self.encoding  = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.total     = 0
+        self.valid     = 0
+        self.checking  = 0      # distinct domains being looked up
+        self.validator = None
+        self.error     = None
+        self.done      = threading.Event()
+        self._blocks   = array("q")   # byte offset of rows 0, BLOCK, 2*BLOCK…
+
+        with open(path, "rb") as f:
+            bom = encoding == "utf-8-sig" and f.read(3) == codecs.BOM_UTF8
+            records = self._records(f, 3 if bom else 0)
+            _, self.headers = next(records, (0, []))
+            first = next(records, None)
+        self._data_start = first[0] if first else None
+        self._first      = self._as_dict(first[1]) if first else None
+
+        self.email_col = next(
+            (h for h in self.headers if "email" in h.lower()), None)
+        # DictReader keeps the last of any duplicated column names
+        self._email_idx = max((i for i, h in enumerate(self.headers)
+                               if h == self.email_col), default=None)
+
+    def _records(self, f, pos):
+        """Yield (byte_offset, fields) for each non-blank record from ``pos``."""
+        f.seek(pos)
+        where = [pos]
+        enc   = self.encoding
+
+        def lines():
+            for line in iter(f.readline, b""):
+                where[0] += len(line)
+                yield line.decode(enc)
+
+        reader = csv.reader(lines())
+        while True:
+            start = where[0]
+            rec = next(reader, None)
+            if rec is None:
+                return
+            if rec:
+                yield start, rec
+
+    def _as_dict(self, rec):
+        row = dict(zip(self.headers, rec))
+        n = len(self.headers)
+        if len(rec) > n:
+            row[None] = rec[n:]
+        else:
+            for key in self.headers[len(rec):]:
+                row[key] = None
+        return row
+
+    def scan(self, validator=None):
+        """Index the file and count rows. Blocking — call from a thread."""
+        col = self._email_idx
+        self.validator = v = validator or RecipientValidator()
+        mx, v.check_mx = v.check_mx, False   # domains are batched below
+        domains = Counter()
+        total = valid = 0
+        try:
+            if self._data_start is None:
+                return
+            with open(self.path, "rb") as f:
+                for start, rec in self._records(f, self._data_start):
+                    if total % self.BLOCK == 0:
+                        self._blocks.append(start)
+                        self.total, self.valid = total, valid
+                    total += 1
+                    addr, reason = v.check(rec[col] if col is not None
+                                           and col < len(rec) else "")
+                    if reason is None:
+                        valid += 1
+                        domains[addr.rpartition("@")[2]] += 1
+            self.total, self.valid = total, valid
+            v.check_mx = mx
+            if mx:
+                self.checking = len(domains)
+                for domain, ok in v.prefetch(domains).items():
+                    if ok is False:
+                        valid -= domains[domain]
+                        v.rejected["no-mx"] += domains[domain]
+        except Exception as e:
+            self.error = e
+        finally:
+            v.check_mx = mx
+            self.checking = 0
+            self.total, self.valid = total, valid
+            self.done.set()
+
+    def __len__(self):
+        return self.total
+
+    def __bool__(self):
+        return self._first is not None
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.total
+        if i == 0 and self._first is not None:
+            return dict(self._first)
+        if not 0 <= i < self.total:
+            raise IndexError(i)
+        for row in self.iter_rows(i):
+            return row
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def iter_rows(self, start=0):
+        """Yield row dicts from row ``start`` onward, reading lazily."""
+        if self._data_start is None:
+            return
+        block, skip = divmod(start, self.BLOCK)
+        pos = self._blocks[block] if start else self._data_start
+        with open(self.path, "rb") as f:
+            for n, (_, rec) in enumerate(self._records(f, pos)):
+                if n >= skip:
+                    yield self._as_dict(rec)
+
+# ── Send journal ────────────────────────────────────────────────────────────
+JOURNAL_DIR = Path.home() / ".letustech_campaigns"
+
+class SendJournal:
+    """Durable, append-only record of who a campaign has already reached.
+
+    One line per recipient outcome: ``key<TAB>row<TAB>state`` where key is a
+    hash of the campaign and the lower-cased address, and state is
+    ``sent``, ``failed`` (permanent — don't retry) or ``retry`` (transient).
+    Rows passed over as duplicates or suppressed are written as
+    ``-row<TAB>row<TAB>skipped``, keyed by row so they never shadow the
+    address they repeat. The last line for a key wins. Writes are fsynced every SYNC_EVERY
+    records or SYNC_SECS seconds, so a crash loses at most one batch.
+    """
+
+    SYNC_EVERY = 50
+    SYNC_SECS  = 2.0
+    DONE       = ("sent", "failed")
+
+    def __init__(self, campaign_id, directory=None):
+        self.campaign_id = campaign_id
+        directory = Path(directory or JOURNAL_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path    = directory / f"{campaign_id}.journal"
+        self._state  = {}   # key -> (row, state)
+        self._fh     = None
+        self._lock   = threading.Lock()
+        self._pending   = 0
+        self._last_sync = time.monotonic()
+        self._load()
+
+    @staticmethod
+    def campaign_id(*parts):
+        """Stable id for a campaign built from whatever defines it."""
+        raw = "\x1f".join(str(p) for p in parts).encode("utf-8", "replace")
+        return hashlib.sha256(raw).hexdigest()[:16]
+
+    @classmethod
+    def for_campaign(cls, csv_path, user, subject, body):
+        """Journal for one list + sender + content.
+
+        Same inputs give the same journal, so a re-send can pick up where
+        the last one stopped.
+        """
+        return cls(cls.campaign_id(os.path.abspath(csv_path),
+                                   os.path.getsize(csv_path),
+                                   user, subject, body))
+
+    def key(self, email):
+        raw = f"{self.campaign_id}\x1f{email.strip().lower()}".encode()
+        return hashlib.sha1(raw).hexdigest()[:20]
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3 and parts[1].isdigit():   # skip torn tail
+                    self._state[parts[0]] = (int(parts[1]), parts[2])
+
+    def __bool__(self):
+        return bool(self._state)
+
+    def done_keys(self):
+        """Keys of recipients a resume should skip."""
+        return {k for k, (_, st) in self._state.items() if st in self.DONE}
+
+    def counts(self):
+        out = {"sent": 0, "failed": 0, "retry": 0, "skipped": 0}
+        for _, st in self._state.values():
+            out[st] = out.get(st, 0) + 1
+        return out
+
+    def first_unsent(self):
+        """Index of the first row not yet finished — no CSV scan needed."""
+        done = {row for row, st in self._state.values()
+                if st in self.DONE or st == "skipped"}
+        i = 0
+        while i in done:
+            i += 1
+        return i
+
+    def record(self, email, row, state):
+        self._write(self.key(email), row, state)
+
+    def skip(self, row):
+        """Mark a row passed over without sending, so first_unsent() moves past it."""
+        self._write(f"-{row}", row, "skipped")
+
+    def _write(self, key, row, state):
+        with self._lock:
+            self._state[key] = (row, state)
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(f"{key}\t{row}\t{state}\n")
+            self._pending += 1
+            if (self._pending >= self.SYNC_EVERY or
+                    time.monotonic() - self._last_sync >= self.SYNC_SECS):
+                self._sync()
+
+    def _sync(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._pending   = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._sync()
+                self._fh.close()
+                self._fh = None
+
+    def reset(self):
+        """Forget everything — the next send goes to the whole list again."""
+        self.close()
+        self._state.clear()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+# ── Suppression list ────────────────────────────────────────────────────────
+SUPPRESSION_FILE = Path.home() / ".letustech_suppressions.tsv"
+
+SUPPRESS_REASONS = {
+    "hard-bounce":  "mailbox rejected permanently",
+    "soft-bounce":  "kept failing temporarily",
+    "unsubscribed": "unsubscribed",
+    "manual":       "added by hand",
+}
+
+def bounce_class(error):
+    """``("hard" | "soft" | None, code)`` for a failed delivery.
+
+    Only a refused recipient says anything about the address itself. 4xx
+    is soft. 5xx is hard when the enhanced status blames the address or
+    mailbox (5.1.x, 5.2.x) — or, without one, for 550/551/553 — but a
+    full mailbox (5.2.2) only counts as soft. Policy and content
+    rejections (5.7.x and the like) are about the sender or the message,
+    so they suppress nobody.
+    """
+    if not isinstance(error, smtplib.SMTPRecipientsRefused) or \
+            not error.recipients:
+        return None, None
+    code, msg = next(iter(error.recipients.values()))
+    if isinstance(msg, bytes):
+        msg = msg.decode("utf-8", "replace")
+    if 400 <= code < 500:
+        return "soft", code
+    if not 500 <= code < 600:
+        return None, code
+    m = re.search(r"\b5\.(\d{1,3})\.(\d{1,3})\b", msg or "")
+    if m:
+        if (m.group(1), m.group(2)) == ("2", "2"):
+            return "soft", code
+        return ("hard" if m.group(1) in ("1", "2") else None), code
+    return ("hard" if code in (550, 551, 553) else None), code
+
+class SuppressionStore:
+    """Addresses that must not be emailed again, and why.
+
+    Append-only like SendJournal — one line per change,
+    ``address<TAB>reason<TAB>code<TAB>time``, last line wins. reason is
+    one of SUPPRESS_REASONS, ``-`` to lift a suppression, ``soft`` to
+    count a temporary failure (code holds the count) or ``ok`` to reset
+    that count. Kept in memory as a dict, so a lookup is one hash probe
+    however long the list grows; the file is read on first use and
+    compacted when it's mostly superseded lines.
+    """
+
+    SOFT_LIMIT = 3     # temporary failures in a row before suppressing
+    SYNC_EVERY = 50
+    SYNC_SECS  = 2.0
+
+    def __init__(self, path=None):
+        self.path     = Path(path or SUPPRESSION_FILE)
+        self._entries = None   # address -> reason
+        self._soft    = {}     # address -> temporary failures in a row
+        self._fh      = None
+        self._lock    = threading.Lock()
+        self._pending   = 0
+        self._last_sync = time.monotonic()
+
+    def _ensure(self):
+        if self._entries is not None:
+            return
+        entries, soft, lines = {}, {}, 0
+        if self.path.exists():
+            with open(self.path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 4:   # torn tail
+                        continue
+                    lines += 1
+                    addr, reason, code = parts[0], parts[1], parts[2]
+                    if reason == "soft":
+                        soft[addr] = int(code) if code.isdigit() else 1
+                    elif reason == "ok":
+                        soft.pop(addr, None)
+                    elif reason == "-":
+                        entries.pop(addr, None)
+                    else:
+                        entries[addr] = sys.intern(reason)
+                        soft.pop(addr, None)
+        self._entries, self._soft = entries, soft
+        if lines > 1000 and lines > 2 * (len(entries) + len(soft)):
+            self._compact()
+
+    def _compact(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for addr, reason in self._entries.items():
+                f.write(f"{addr}\t{reason}\t\t\n")
+            for addr, n in self._soft.items():
+                f.write(f"{addr}\tsoft\t{n}\t\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def __contains__(self, email):
+        with self._lock:
+            self._ensure()
+            return normalise_email(email) in self._entries
+
+    def __len__(self):
+        with self._lock:
+            self._ensure()
+            return len(self._entries)
+
+    def reason(self, email):
+        with self._lock:
+            self._ensure()
+            return self._entries.get(normalise_email(email))
+
+    def counts(self):
+        with self._lock:
+            self._ensure()
+            return Counter(self._entries.values())
+
+    def add(self, email, reason="manual", code=""):
+        addr = normalise_email(email)
+        with self._lock:
+            self._ensure()
+            self._entries[addr] = sys.intern(reason)
+            self._soft.pop(addr, None)
+            self._write(addr, reason, code)
+
+    def remove(self, email):
+        addr = normalise_email(email)
+        with self._lock:
+            self._ensure()
+            if self._entries.pop(addr, None) is not None:
+                self._write(addr, "-")
+
+    def note(self, email, error=None):
+        """Learn from one delivery attempt — error None means it was delivered.
+
+        Returns the reason if this suppressed the address, else None.
+        """
+        addr = normalise_email(email)
+        kind, code = bounce_class(error) if error is not None else (None, None)
+        with self._lock:
+            self._ensure()
+            if error is None:
+                if self._soft.pop(addr, None):
+                    self._write(addr, "ok")
+                return None
+            if kind == "hard":
+                reason = "hard-bounce"
+            elif kind == "soft":
+                n = self._soft.get(addr, 0) + 1
+                if n < self.SOFT_LIMIT:
+                    self._soft[addr] = n
+                    self._write(addr, "soft", n)
+                    return None
+                reason = "soft-bounce"
+            else:
+                return None
+            self._entries[addr] = reason
+            self._soft.pop(addr, None)
+            self._write(addr, reason, code)
+            return reason
+
+    def export(self, path):
+        """Write the list as a CSV of email, reason."""
+        with self._lock:
+            self._ensure()
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(["email", "reason"])
+                w.writerows(self._entries.items())
+            return len(self._entries)
+
+    def _write(self, addr, reason, code=""):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(f"{addr}\t{reason}\t{code}\t"
+                       f"{datetime.now().isoformat(timespec='seconds')}\n")
+        self._pending += 1
+        if (self._pending >= self.SYNC_EVERY or
+                time.monotonic() - self._last_sync >= self.SYNC_SECS):
+            self._sync()
+
+    def _sync(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._pending   = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._sync()
+                self._fh.close()
+                self._fh = None
+
+    def clear(self):
+        """Forget every suppression."""
+        self.close()
+        with self._lock:
+            self._entries, self._soft = {}, {}
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+SUPPRESSIONS = SuppressionStore()
+
+# ── Metrics ─────────────────────────────────────────────────────────────────
+class LatencyHistogram:
+    """Fixed-size latency distribution — log-spaced buckets, about 12% wide.
+
+    Memory stays the same whether a campaign has a hundred contacts or a
+    million; percentiles are read back as the upper edge of the bucket
+    they fall in.
+    """
+
+    FLOOR      = 1e-5   # seconds; anything faster lands in bucket 0
+    PER_DECADE = 20
+    DECADES    = 8      # up to 1000 s
+
+    def __init__(self):
+        self.counts = [0] * (self.PER_DECADE * self.DECADES + 1)
+        self.count  = 0
+        self.total  = 0.0
+        self.max    = 0.0
+
+    def add(self, seconds):
+        if seconds <= self.FLOOR:
+            idx = 0
+        else:
+            idx = min(len(self.counts) - 1, 1 + int(
+                math.log10(seconds / self.FLOOR) * self.PER_DECADE))
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.max, self.FLOOR * 10 ** (idx / self.PER_DECADE))
+        return self.max
+
+    def summary(self):
+        ms = lambda sec: round(sec * 1000, 2)
+        return {"count":   self.count,
+                "mean_ms": ms(self.total / self.count) if self.count else 0.0,
+                "p50_ms":  ms(self.percentile(0.50)),
+                "p95_ms":  ms(self.percentile(0.95)),
+                "max_ms":  ms(self.max)}
+
+class SizeHistogram(LatencyHistogram):
+    """Message sizes in bytes, on the same kind of log-spaced buckets."""
+
+    FLOOR      = 100    # bytes
+    PER_DECADE = 10
+    DECADES    = 7      # up to 1 GB
+
+    def distribution(self):
+        """``[(up_to_bytes, count), ...]`` for every bucket that has messages."""
+        return [(round(self.FLOOR * 10 ** (idx / self.PER_DECADE)), n)
+                for idx, n in enumerate(self.counts) if n]
+
+    def summary(self):
+        return {"count":       self.count,
+                "total_bytes": int(self.total),
+                "mean_bytes":  round(self.total / self.count) if self.count else 0,
+                "p50_bytes":   round(self.percentile(0.50)),
+                "p95_bytes":   round(self.percentile(0.95)),
+                "max_bytes":   int(self.max),
+                "distribution": [{"up_to_bytes": edge, "count": n}
+                                 for edge, n in self.distribution()]}
+
+def error_class(error):
+    """Short bucket name for a failure, e.g. ``SMTPRecipientsRefused 550``."""
+    code = getattr(error, "smtp_code", None)
+    if code is None and isinstance(error, smtplib.SMTPRecipientsRefused):
+        code = next((c for c, _ in error.recipients.values()), None)
+    name = type(error).__name__
+    return f"{name} {code}" if code is not None else name
+
+class CampaignMetrics:
+    """Per-stage timings and error counts for one campaign.
+
+    Stages are ``render`` (merge tags), ``mime`` (building and
+    serialising the message), ``smtp`` (one sendmail round-trip) and
+    ``reconnect``. The size of every built message is kept too, and a dry
+    run fills in ``projection``. Safe to feed from every worker thread at
+    once.
+    """
+
+    STAGES = ("render", "mime", "smtp", "reconnect")
+
+    def __init__(self):
+        self.stages   = {name: LatencyHistogram() for name in self.STAGES}
+        self.sizes    = SizeHistogram()
+        self.projection = None
+        self.errors   = Counter()
+        self.started  = time.time()
+        self.finished = None
+        self._lock    = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage].add(seconds)
+
+    def size(self, nbytes):
+        with self._lock:
+            self.sizes.add(nbytes)
+
+    @contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - t0)
+
+    def error(self, error):
+        with self._lock:
+            self.errors[error_class(error)] += 1
+
+    def live(self):
+        """One-line latency readout for the progress label."""
+        with self._lock:
+            smtp = self.stages["smtp"]
+            p50, p95 = smtp.percentile(0.50), smtp.percentile(0.95)
+        return f"smtp p50 {p50 * 1000:.0f} ms · p95 {p95 * 1000:.0f} ms"
+
+    def report(self, **campaign):
+        """Everything gathered so far as a JSON-ready dict."""
+        with self._lock:
+            end = self.finished or time.time()
+            elapsed = max(end - self.started, 1e-9)
+            sent = campaign.get("sent", campaign.get("rendered",
+                                                   self.stages["smtp"].count))
+            data = {
+                "campaign": {
+                    **campaign,
+                    "started":  datetime.fromtimestamp(self.started).isoformat(),
+                    "finished": datetime.fromtimestamp(end).isoformat(),
+                    "elapsed_s": round(elapsed, 3),
+                    "msgs_per_min": round(sent / elapsed * 60, 1),
+                },
+                "stages": {name: h.summary() for name, h in self.stages.items()},
+                "sizes":  self.sizes.summary(),
+                "errors": dict(self.errors.most_common()),
+            }
+            if self.projection:
+                data["projection"] = self.projection
+            return data
+
+    def write_report(self, base, **campaign):
+        """Write ``<base>_report.json`` and ``<base>_report.csv``."""
+        data = self.report(**campaign)
+        json_path = base.with_name(base.name + "_report.json")
+        csv_path  = base.with_name(base.name + "_report.csv")
+        json_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        cols = ["count", "mean_ms", "p50_ms", "p95_ms", "max_ms"]
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["section", "name"] + cols)
+            for name, summary in data["stages"].items():
+                w.writerow(["stage", name] + [summary[c] for c in cols])
+            sizes = data["sizes"]
+            for key in ("total_bytes", "mean_bytes", "p50_bytes", "p95_bytes",
+                        "max_bytes"):
+                w.writerow(["size", key, sizes[key]])
+            for bucket in sizes["distribution"]:
+                w.writerow(["size", f"<= {bucket['up_to_bytes']}", bucket["count"]])
+            projection = data.get("projection") or {}
+            for name, value in projection.get("limits", {}).items():
+                w.writerow(["projection", name, value])
+            for name, count in data["errors"].items():
+                w.writerow(["error", name, count])
+            for name, value in data["campaign"].items():
+                w.writerow(["campaign", name, value])
+        return json_path, csv_path
+
+# ── Send engine ─────────────────────────────────────────────────────────────
+MAX_POOL_SIZE = 10   # upper bound on parallel SMTP connections
+
+def is_transient(error):
+    """True if a failed send is worth retrying later (4xx or connection loss)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500
+                   for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return error is not None
+
+def connect_smtp(host, port, user, pwd, tls, timeout=15):
+    """Create and return a fresh authenticated SMTP connection."""
+    if tls == "SSL/TLS":
+        s = smtplib.SMTP_SSL(
+            host, port,
+            context=ssl.create_default_context(), timeout=timeout)
+    else:
+        s = smtplib.SMTP(host, port, timeout=timeout)
+        if tls == "STARTTLS":
+            s.starttls(context=ssl.create_default_context())
+    s.login(user, pwd)
+    return s
+
+def parse_domain_limits(text):
+    """Parse "gmail.com=20, outlook.com=10" into {"gmail.com": 20.0, ...}."""
+    limits = {}
+    for chunk in re.split(r"[,;\n]+", text or ""):
+        domain, _, rate = chunk.partition("=")
+        domain = domain.strip().lower().lstrip("@")
+        try:
+            if domain:
+                limits[domain] = float(rate)
+        except ValueError:
+            pass
+    return limits
+
+class RateMeter:
+    """Events per second over a sliding window — thread-safe."""
+
+    def __init__(self, window=10):
+        self.window = window
+        self._stamps = deque()
+        self._lock   = threading.Lock()
+
+    def mark(self, now=None):
+        with self._lock:
+            self._stamps.append(time.monotonic() if now is None else now)
+
+    def rate(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._stamps and now - self._stamps[0] > self.window:
+                self._stamps.popleft()
+            return len(self._stamps) / self.window
+
+class TokenBucket:
+    """Classic token bucket — ``rate`` tokens per second, up to ``burst``."""
+
+    def __init__(self, rate, burst=1.0):
+        self.rate   = rate
+        self.burst  = burst
+        self.tokens = burst
+        self.stamp  = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def ready_in(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+class RateLimiter:
+    """Global send budget plus one bucket per recipient domain.
+
+    ``per_second`` caps the whole campaign; ``domain_per_minute`` caps each
+    recipient domain separately, with ``overrides`` giving specific domains
+    (gmail.com, outlook.com…) their own per-minute limit. A rate of 0 means
+    unlimited. Not thread-safe on its own — SendQueue serialises access.
+    """
+
+    WINDOW = 10   # seconds of history behind throughput()
+
+    def __init__(self, per_second=0.0, domain_per_minute=0.0, overrides=None):
+        self._global  = TokenBucket(per_second) if per_second > 0 else None
+        self._default = domain_per_minute / 60
+        self._rates   = {d: r / 60 for d, r in (overrides or {}).items()}
+        self._domains = {}
+        self._sent    = RateMeter(self.WINDOW)
+
+    def _bucket(self, domain):
+        if domain not in self._domains:
+            rate = self._rates.get(domain, self._default)
+            self._domains[domain] = TokenBucket(rate) if rate > 0 else None
+        return self._domains[domain]
+
+    def global_ready_in(self, now):
+        return self._global.ready_in(now) if self._global else 0.0
+
+    def domain_ready_in(self, domain, now):
+        bucket = self._bucket(domain)
+        return bucket.ready_in(now) if bucket else 0.0
+
+    def take(self, domain, now):
+        if self._global:
+            self._global.take(now)
+        bucket = self._bucket(domain)
+        if bucket:
+            bucket.take(now)
+        self._sent.mark(now)
+
+    def throughput(self):
+        """Messages per second released over the last WINDOW seconds."""
+        return self._sent.rate()
+
+class SendQueue:
+    """Bounded look-ahead buffer that hands out whichever message can go now.
+
+    Messages are bucketed by recipient domain. ``get`` walks the domains
+    round-robin and returns the first one whose rate-limit bucket has a
+    token, so a backlog of gmail.com addresses never stalls the pool while
+    other domains are waiting behind it.
+    """
+
+    def __init__(self, limiter=None, maxsize=100):
+        self.limiter  = limiter or RateLimiter()
+        self.maxsize  = maxsize
+        self._domains = OrderedDict()   # domain -> deque of items
+        self._count   = 0
+        self._cond    = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return self._count
+
+    def put(self, domain, item, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._count < self.maxsize,
+                                       timeout):
+                raise queue.Full
+            self._domains.setdefault(domain, deque()).append(item)
+            self._count += 1
+            self._cond.notify_all()
+
+    def _pop(self, now):
+        """``(item, 0)`` if one may go now, else ``(None, seconds to wait)``.
+
+        A wait of 0 with no item means the queue is empty. Call with the
+        condition held.
+        """
+        wait = self.limiter.global_ready_in(now)
+        if self._count and not wait:
+            for domain in list(self._domains):
+                ready_in = self.limiter.domain_ready_in(domain, now)
+                if ready_in:
+                    wait = min(wait or ready_in, ready_in)
+                    continue
+                items = self._domains.pop(domain)
+                item  = items.popleft()
+                if items:   # rotate to the back for fairness
+                    self._domains[domain] = items
+                self._count -= 1
+                self.limiter.take(domain, now)
+                self._cond.notify_all()
+                return item, 0.0
+        return None, wait
+
+    def get(self, timeout=None):
+        deadline = time.monotonic() + (timeout if timeout is not None else 1e9)
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                item, wait = self._pop(now)
+                if item is not None:
+                    return item
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(min(wait, remaining) if wait else remaining)
+
+    def poll(self):
+        """Never blocks: ``(item, 0)``, or ``(None, wait)`` as for _pop."""
+        with self._cond:
+            return self._pop(time.monotonic())
+
+    def throughput(self):
+        with self._cond:
+            return self.limiter.throughput()
+
+class SMTPPool:
+    """A pool of authenticated SMTP connections fed from one work queue.
+
+    Each worker thread owns a single connection and pulls ready-to-send
+    messages off the shared queue. A connection that has sat idle is
+    checked with NOOP before reuse, and a dropped connection is reopened
+    once per message before that message is counted as failed.
+
+    Pacing is left to the RateLimiter behind the shared SendQueue. Results
+    are reported through ``on_result(to_email, status, ref, error)`` where
+    status is ``"sent"`` or a short failure reason — the same strings the
+    tracking log has always used — ``ref`` is whatever was passed to
+    submit() and ``error`` is the exception behind a failure. Send and
+    reconnect times are recorded on ``metrics``.
+    """
+
+    IDLE_CHECK = 30    # seconds idle before a connection is NOOP-checked
+    LOOKAHEAD  = 100   # default number of built messages waiting to send
+
+    def __init__(self, host, port, user, pwd, tls, size=1, limiter=None,
+                 stop_flag=None, log=None, on_result=None, lookahead=None,
+                 metrics=None):
+        self.host, self.port = host, port
+        self.user, self.pwd, self.tls = user, pwd, tls
+        self.size      = max(1, min(int(size), MAX_POOL_SIZE))
+        self._stop     = stop_flag or threading.Event()
+        self._log      = log or (lambda msg, tag="info": None)
+        self._on_result = on_result or (lambda *result: None)
+        self.metrics   = metrics or CampaignMetrics()
+        self._jobs     = SendQueue(limiter, maxsize=max(
+            int(lookahead or self.LOOKAHEAD), self.size * 2))
+        self._closed   = threading.Event()
+        self._threads  = []
+
+    def connect(self):
+        return connect_smtp(self.host, self.port, self.user, self.pwd, self.tls)
+
+    def start(self):
+        """Open the first connection (raising on failure) and start workers.
+
+        Remaining connections are opened by their own worker threads so a
+        slow login on one doesn't hold up the rest of the pool.
+        """
+        first = self.connect()
+        for n in range(self.size):
+            th = threading.Thread(target=self._worker,
+                                  args=(n, first if n == 0 else None),
+                                  daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def submit(self, to_email, payload, ref=None):
+        """Queue one serialised message; blocks while the pool is busy."""
+        domain = to_email.rpartition("@")[2].lower()
+        while not self._stop.is_set():
+            try:
+                self._jobs.put(domain, (to_email, payload, ref), timeout=0.2)
+                return True
+            except queue.Full:
+                if not any(th.is_alive() for th in self._threads) and \
+                        not self._stop.is_set():
+                    raise RuntimeError("all SMTP connections have closed")
+        return False
+
+    def close(self):
+        """Let workers drain the queue, then quit every connection."""
+        self._closed.set()
+        for th in self._threads:
+            th.join()
+
+    def throughput(self):
+        return self._jobs.throughput()
+
+    # ── Worker ──────────────────────────────────────────────────────────
+
+    def _worker(self, n, server):
+        if server is None:
+            try:
+                server = self.connect()
+            except Exception as e:
+                self._log(f"Connection {n + 1} failed: {e} — "
+                          f"continuing with fewer connections", "warn")
+                return
+        last_used = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    to_email, payload, ref = self._jobs.get(timeout=0.2)
+                except queue.Empty:
+                    if self._closed.is_set() and not len(self._jobs):
+                        break
+                    continue
+                server = self._check(n, server, time.monotonic() - last_used)
+                server = self._deliver(server, to_email, payload, ref)
+                last_used = time.monotonic()
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+    def _check(self, n, server, idle):
+        """NOOP an idle connection and quietly replace it if it's gone stale."""
+        if idle < self.IDLE_CHECK:
+            return server
+        try:
+            if server.noop()[0] == 250:
+                return server
+        except Exception:
+            pass
+        try:
+            with self.metrics.timer("reconnect"):
+                server = self.connect()
+            self._log(f"Connection {n + 1} went stale — reopened.", "info")
+        except Exception:
+            pass   # _deliver will report it against the message
+        return server
+
+    def _deliver(self, server, to_email, payload, ref=None):
+        """Send one message, reconnecting once if the connection dropped."""
+        for attempt in range(2):
+            try:
+                with self.metrics.timer("smtp"):
+                    server.sendmail(self.user, to_email, payload)
+                self._log(f"OK  {to_email}", "ok")
+                self._on_result(to_email, "sent", ref, None)
+                break
+            except smtplib.SMTPServerDisconnected as de:
+                if attempt == 0:
+                    self._log("Connection dropped — reconnecting…", "warn")
+                    try:
+                        with self.metrics.timer("reconnect"):
+                            server = self.connect()
+                        self._log("Reconnected.", "ok")
+                    except Exception as re_err:
+                        self._log(f"Reconnect failed: {re_err}", "err")
+                        self._on_result(to_email, "reconnect failed", ref, re_err)
+                        break
+                else:
+                    self._log(f"FAIL  {to_email} — could not reconnect", "err")
+                    self._on_result(to_email, "failed: disconnected", ref, de)
+            except Exception as se:
+                self._log(f"FAIL  {to_email} — {se}", "err")
+                self._on_result(to_email, f"failed: {se}", ref, se)
+                break
+        return server
+
+# ── Asyncio transport ───────────────────────────────────────────────────────
+class AsyncSMTP:
+    """Just enough of an asyncio SMTP client for bulk sending.
+
+    Speaks EHLO, STARTTLS, AUTH PLAIN/LOGIN, NOOP and QUIT, and when the
+    server advertises PIPELINING sends MAIL, RCPT and DATA in one write so
+    a message costs two round-trips instead of four. Failures raise the
+    same smtplib exceptions the blocking path does, so logging, journal
+    and retry handling don't care which transport was used.
+    """
+
+    def __init__(self, host, port, tls, timeout=15, local_hostname=None):
+        self.host, self.port, self.tls = host, port, tls
+        self.timeout = timeout
+        # resolved here, not in _ehlo — getfqdn() can block on DNS and
+        # would stall every session sharing the loop
+        self.local_hostname = local_hostname or socket.getfqdn()
+        self.esmtp   = {}
+        self._reader = self._writer = None
+
+    async def connect(self, user, pwd):
+        ctx = ssl.create_default_context()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port,
+                ssl=ctx if self.tls == "SSL/TLS" else None),
+            self.timeout)
+        code, msg = await self._reply()
+        if code != 220:
+            raise smtplib.SMTPConnectError(code, msg)
+        await self._ehlo()
+        if self.tls == "STARTTLS":
+            if "starttls" not in self.esmtp:
+                raise smtplib.SMTPNotSupportedError(
+                    "STARTTLS extension not supported by server.")
+            await self._expect("STARTTLS", 220)
+            await self._writer.start_tls(ctx, server_hostname=self.host)
+            await self._ehlo()
+        await self._login(user, pwd)
+        return self
+
+    async def _reply(self):
+        lines = []
+        while True:
+            try:
+                line = await asyncio.wait_for(self._reader.readline(),
+                                              self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                raise smtplib.SMTPServerDisconnected(str(e))
+            if not line:
+                raise smtplib.SMTPServerDisconnected(
+                    "Connection unexpectedly closed")
+            lines.append(line[4:].strip())
+            if line[3:4] != b"-":
+                try:
+                    code = int(line[:3])
+                except ValueError:
+                    code = -1
+                return code, b"\n".join(lines)
+
+    async def _send(self, data):
+        if self._writer is None or self._writer.is_closing():
+            raise smtplib.SMTPServerDisconnected("please run connect() first")
+        self._writer.write(data)
+        try:
+            await self._writer.drain()
+        except ConnectionError as e:
+            raise smtplib.SMTPServerDisconnected(str(e))
+
+    async def command(self, line):
+        await self._send(line.encode("ascii") + b"\r\n")
+        return await self._reply()
+
+    async def _expect(self, line, ok):
+        code, msg = await self.command(line)
+        if code != ok:
+            raise smtplib.SMTPResponseException(code, msg)
+        return msg
+
+    async def _ehlo(self):
+        msg = await self._expect("EHLO " + self.local_hostname, 250)
+        self.esmtp = {}
+        for ext in msg.decode("latin-1").split("\n")[1:]:
+            name, _, params = ext.partition(" ")
+            self.esmtp[name.lower()] = params
+
+    async def _login(self, user, pwd):
+        methods = self.esmtp.get("auth", "").upper().split()
+        if "auth" not in self.esmtp:
+            raise smtplib.SMTPNotSupportedError(
+                "SMTP AUTH extension not supported by server.")
+        b64 = lambda text: base64.b64encode(text.encode()).decode("ascii")
+        if "PLAIN" in methods or "LOGIN" not in methods:
+            code, msg = await self.command(
+                "AUTH PLAIN " + b64(f"\0{user}\0{pwd}"))
+        else:
+            code, msg = await self.command("AUTH LOGIN")
+            if code == 334:
+                code, msg = await self.command(b64(user))
+            if code == 334:
+                code, msg = await self.command(b64(pwd))
+        if code not in (235, 503):
+            raise smtplib.SMTPAuthenticationError(code, msg)
+
+    async def noop(self):
+        return await self.command("NOOP")
+
+    async def sendmail(self, from_addr, to_addr, payload):
+        data = re.sub(r"(?:\r\n|\n|\r(?!\n))", "\r\n", payload)
+        data = re.sub(r"(?m)^\.", "..", data).encode("ascii")
+        if not data.endswith(b"\r\n"):
+            data += b"\r\n"
+        envelope = [f"MAIL FROM:<{from_addr}>", f"RCPT TO:<{to_addr}>", "DATA"]
+        if "pipelining" in self.esmtp:
+            await self._send("".join(c + "\r\n" for c in envelope).encode())
+            replies = [await self._reply() for _ in envelope]
+        else:
+            replies = []
+            for c in envelope:
+                replies.append(await self.command(c))
+                if replies[-1][0] not in (250, 251, 354):
+                    break
+        (mail_code, mail_msg), rest = replies[0], replies[1:]
+        rcpt = rest[0] if rest else None
+        data_ok = len(rest) > 1 and rest[1][0] == 354
+        if mail_code == 250 and rcpt and rcpt[0] in (250, 251) and data_ok:
+            await self._send(data + b".\r\n")
+            code, msg = await self._reply()
+            if code != 250:
+                raise smtplib.SMTPDataError(code, msg)
+            return
+        if data_ok:   # a pipelined DATA got through anyway — close it empty
+            await self._send(b".\r\n")
+            await self._reply()
+        try:
+            await self.command("RSET")
+        except smtplib.SMTPServerDisconnected:
+            pass
+        if mail_code != 250:
+            raise smtplib.SMTPSenderRefused(mail_code, mail_msg, from_addr)
+        if not rcpt or rcpt[0] not in (250, 251):
+            raise smtplib.SMTPRecipientsRefused(
+                {to_addr: rcpt or (-1, b"not sent")})
+        raise smtplib.SMTPDataError(*rest[1])
+
+    async def quit(self):
+        try:
+            await self.command("QUIT")
+        finally:
+            self._writer.close()
+
+class AsyncSMTPPool(SMTPPool):
+    """SMTPPool whose connections are asyncio tasks on a single event loop.
+
+    Same queue, pacing, health checks and result reporting as SMTPPool —
+    only the transport differs — so it can be swapped in from Settings.
+    One feeder task moves messages from the SendQueue into an
+    asyncio.Queue as the rate limiter releases them; submit() and close()
+    wake it with call_soon_threadsafe, so an idle pool doesn't spin.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop  = None
+        self._hostname = None
+        self._wake  = None   # asyncio.Event, made on the loop
+        self._ready = None   # asyncio.Queue the sessions take from
+
+    def connect(self):
+        return self._loop.run_until_complete(self._aconnect())
+
+    async def _aconnect(self):
+        return await AsyncSMTP(self.host, self.port, self.tls,
+                               local_hostname=self._hostname).connect(
+            self.user, self.pwd)
+
+    def start(self):
+        self._hostname = socket.getfqdn()
+        self._loop = asyncio.new_event_loop()
+        first = self.connect()
+        th = threading.Thread(target=self._run, args=(first,), daemon=True)
+        th.start()
+        self._threads.append(th)
+
+    def submit(self, to_email, payload, ref=None):
+        ok = super().submit(to_email, payload, ref)
+        self._kick()
+        return ok
+
+    def close(self):
+        self._closed.set()
+        self._kick()
+        for th in self._threads:
+            th.join()
+
+    def _kick(self):
+        """Wake the feeder from any thread."""
+        try:
+            self._loop.call_soon_threadsafe(
+                lambda: self._wake is not None and self._wake.set())
+        except RuntimeError:
+            pass   # loop already closed — every session has ended
+
+    def _run(self, first):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main(first))
+        finally:
+            self._loop.close()
+
+    async def _main(self, first):
+        self._wake  = asyncio.Event()
+        self._ready = asyncio.Queue(maxsize=self.size)
+        sessions = [asyncio.ensure_future(
+                        self._session(n, first if n == 0 else None))
+                    for n in range(self.size)]
+        feeder = asyncio.ensure_future(self._feed())
+        await asyncio.gather(*sessions)
+        feeder.cancel()
+
+    async def _feed(self):
+        """Hand out messages as the limiter allows; one None per session at the end."""
+        while True:
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            item, wait = self._jobs.poll()
+            if item is not None:
+                await self._ready.put(item)
+                continue
+            if not wait and self._closed.is_set():
+                break   # drained
+            try:
+                await asyncio.wait_for(self._wake.wait(), wait or None)
+            except asyncio.TimeoutError:
+                pass
+        for _ in range(self.size):
+            await self._ready.put(None)
+
+    async def _session(self, n, server):
+        if server is None:
+            try:
+                server = await self._aconnect()
+            except Exception as e:
+                self._log(f"Connection {n + 1} failed: {e} — "
+                          f"continuing with fewer connections", "warn")
+                return
+        last_used = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                job = await self._ready.get()
+                if job is None:
+                    break
+                to_email, payload, ref = job
+                server = await self._acheck(n, server,
+                                            time.monotonic() - last_used)
+                server = await self._adeliver(server, to_email, payload, ref)
+                last_used = time.monotonic()
+        finally:
+            try:
+                await server.quit()
+            except Exception:
+                pass
+
+    async def _acheck(self, n, server, idle):
+        if idle < self.IDLE_CHECK:
+            return server
+        try:
+            if (await server.noop())[0] == 250:
+                return server
+        except Exception:
+            pass
+        try:
+            with self.metrics.timer("reconnect"):
+                server = await self._aconnect()
+            self._log(f"Connection {n + 1} went stale — reopened.", "info")
+        except Exception:
+            pass
+        return server
+
+    async def _adeliver(self, server, to_email, payload, ref=None):
+        """Async twin of SMTPPool._deliver — same reconnect-once rule."""
+        for attempt in range(2):
+            try:
+                with self.metrics.timer("smtp"):
+                    await server.sendmail(self.user, to_email, payload)
+                self._log(f"OK  {to_email}", "ok")
+                self._on_result(to_email, "sent", ref, None)
+                break
+            except smtplib.SMTPServerDisconnected as de:
+                if attempt == 0:
+                    self._log("Connection dropped — reconnecting…", "warn")
+                    try:
+                        with self.metrics.timer("reconnect"):
+                            server = await self._aconnect()
+                        self._log("Reconnected.", "ok")
+                    except Exception as re_err:
+                        self._log(f"Reconnect failed: {re_err}", "err")
+                        self._on_result(to_email, "reconnect failed", ref, re_err)
+                        break
+                else:
+                    self._log(f"FAIL  {to_email} — could not reconnect", "err")
+                    self._on_result(to_email, "failed: disconnected", ref, de)
+            except Exception as se:
+                self._log(f"FAIL  {to_email} — {se}", "err")
+                self._on_result(to_email, f"failed: {se}", ref, se)
+                break
+        return server
+
+TRANSPORTS = {
+    "smtplib": SMTPPool,        # blocking, one thread per connection
+    "asyncio": AsyncSMTPPool,   # one event loop, ESMTP pipelining
+}
+
+# ── Dry run ─────────────────────────────────────────────────────────────────
+class DryRunPool:
+    """Stands in for the SMTP pool: messages go to an mbox file, or nowhere.
+
+    Takes the same submit()/on_result() contract as SMTPPool, so a dry run
+    goes through exactly the same render, MIME and attachment code as a
+    real send. Nothing is paced — the rate limits are only used afterwards
+    by project_send_time(). ``size`` is the pool size being planned for.
+    """
+
+    def __init__(self, path=None, size=1, stop_flag=None, log=None,
+                 on_result=None, metrics=None):
+        self.path      = Path(path) if path else None
+        self.size      = max(1, min(int(size), MAX_POOL_SIZE))
+        self._stop     = stop_flag or threading.Event()
+        self._log      = log or (lambda msg, tag="info": None)
+        self._on_result = on_result or (lambda *result: None)
+        self.metrics   = metrics or CampaignMetrics()
+        self.domains   = Counter()
+        self._written  = RateMeter()
+        self._lock     = threading.Lock()
+        self._file     = None
+
+    def start(self):
+        if self.path:
+            self._file = open(self.path, "w", encoding="utf-8", newline="\n")
+
+    def submit(self, to_email, payload, ref=None):
+        if self._stop.is_set():
+            return False
+        with self._lock:
+            self.domains[to_email.rpartition("@")[2].lower()] += 1
+            if self._file:
+                # mboxrd: quote body lines that would look like a new message
+                self._file.write(f"From MAILER-DAEMON {time.asctime()}\n")
+                self._file.write(re.sub(r"^(>*From )", r">\1", payload,
+                                        flags=re.M))
+                self._file.write("\n\n")
+        self._written.mark()
+        self._on_result(to_email, "sent", ref, None)
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def throughput(self):
+        return self._written.rate()
+
+def format_duration(seconds):
+    """1h 05m / 3m 20s / 12s"""
+    seconds = int(round(seconds))
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    if h:
+        return f"{h}h {m:02d}m"
+    return f"{m}m {s:02d}s" if m else f"{s}s"
+
+def project_send_time(domains, pool_size=1, delay=0.0, domain_rate=0.0,
+                      overrides=None, smtp_latency=0.25, build_seconds=0.0,
+                      build_workers=None):
+    """Estimate how long a real send of ``domains`` (a Counter) would take.
+
+    Each limit on its own gives a lower bound — the SMTP connections
+    (``smtp_latency`` seconds per message, ``pool_size`` at once), the
+    global delay, every per-domain rate, and message building — and the
+    largest one wins. Returns the estimate, which limit it came from and
+    all of them in seconds.
+    """
+    count  = sum(domains.values())
+    limits = {"connections": count * smtp_latency / max(1, pool_size),
+              "build": build_seconds / (build_workers or BuildPipeline.WORKERS)}
+    if delay > 0:
+        limits["delay"] = count * delay
+    overrides = overrides or {}
+    per_domain = {d: n / overrides.get(d, domain_rate) * 60
+                  for d, n in domains.items()
+                  if overrides.get(d, domain_rate) > 0}
+    if per_domain:
+        slowest = max(per_domain, key=per_domain.get)
+        limits[f"domain {slowest}"] = per_domain[slowest]
+    bottleneck = max(limits, key=limits.get)
+    return {"seconds":    round(limits[bottleneck], 1),
+            "estimate":   format_duration(limits[bottleneck]),
+            "bottleneck": bottleneck,
+            "messages":   count,
+            "pool_size":  pool_size,
+            "smtp_latency_ms": round(smtp_latency * 1000),
+            "limits":     {name: round(sec, 1) for name, sec in limits.items()}}
+
+# ── Message pipeline ────────────────────────────────────────────────────────
+class BuildPipeline:
+    """Producer stage that renders and serialises messages ahead of sending.
+
+    feed() queues rows; builder threads turn each one into a finished
+    message with ``build(row, to_email)`` and hand it to
+    ``sink(to_email, payload, ref)`` — normally SMTPPool.submit, whose
+    bounded queue sits between the two stages. Keeping that queue full
+    means the SMTP connections never wait on CPU work. A row that fails
+    to build is passed to ``on_error(to_email, ref, exc)`` and skipped.
+    """
+
+    WORKERS = 2
+
+    def __init__(self, build, sink, workers=None, stop_flag=None,
+                 on_error=None):
+        self._build    = build
+        self._sink     = sink
+        self._stop     = stop_flag or threading.Event()
+        self._on_error = on_error or (lambda to_email, ref, exc: None)
+        self.workers   = max(1, int(workers or self.WORKERS))
+        self._rows     = queue.Queue(maxsize=self.workers * 4)
+        self._closed   = threading.Event()
+        self._threads  = []
+        self.built     = RateMeter()
+        self.error     = None
+
+    def start(self):
+        for _ in range(self.workers):
+            th = threading.Thread(target=self._worker, daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def feed(self, to_email, row, ref=None):
+        """Queue one row for building; False once the campaign is stopped."""
+        while not self._stop.is_set():
+            if self.error:
+                raise self.error
+            try:
+                self._rows.put((to_email, row, ref), timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def close(self):
+        """Build whatever is still queued, then stop the builder threads."""
+        self._closed.set()
+        for th in self._threads:
+            th.join()
+
+    def build_rate(self):
+        return self.built.rate()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                to_email, row, ref = self._rows.get(timeout=0.2)
+            except queue.Empty:
+                if self._closed.is_set():
+                    break
+                continue
+            try:
+                payload = self._build(row, to_email)
+            except Exception as e:
+                self._on_error(to_email, ref, e)
+                continue
+            self.built.mark()
+            try:
+                if not self._sink(to_email, payload, ref):
+                    break
+            except Exception as e:
+                self.error = e
+                break
+
+# ── Campaign runner ─────────────────────────────────────────────────────────
+def check_mx_enabled(config):
+    return str(config.get("check_mx", "On")).lower() not in ("off", "0", "false", "")
+
+class Campaign:
+    """One send run — contacts in, delivered and tracked email out.
+
+    ``contacts`` is a scanned CSVContactSource and ``smtp`` is
+    ``(host, port, user, pwd, tls)``. ``config`` is the app config: it
+    supplies the built-in tags and footer as well as the transport, pool,
+    queue and per-domain settings. ``log(msg, tag)`` and
+    ``progress(fraction, text)`` may be called from any thread. run()
+    blocks until the campaign ends and returns the counts.
+
+    With ``dry_run`` set to an mbox path (or ``""`` to just measure),
+    every message is built as usual but written there instead of sent;
+    the journal is left alone, and the report gains the size
+    distribution and a projected send time assuming ``smtp_latency``
+    seconds per message.
+
+    ``suppressions`` (a SuppressionStore) is both checked — listed
+    addresses are skipped — and fed with each delivery result, so hard
+    bounces aren't tried again next time.
+    """
+
+    def __init__(self, contacts, smtp, subject, body, config=None, *,
+                 html=False, from_name="", attachments=(), delay=1.0,
+                 journal=None, start=0, resume=False, track=False,
+                 stop_flag=None, log=None, progress=None, dry_run=None,
+                 smtp_latency=0.25, suppressions=None):
+        self.contacts = contacts
+        self.host, self.port, self.user, self.pwd, self.tls = smtp
+        self.subject, self.body = subject, body
+        self.config      = config or {}
+        self.html        = html
+        self.from_name   = from_name
+        self.attachments = list(attachments)
+        self.delay       = delay
+        self.journal     = journal
+        self.start       = start
+        self.resume      = resume
+        self.track       = track
+        self.stop_flag   = stop_flag or threading.Event()
+        self._log        = log or (lambda msg, tag="info": None)
+        self._progress   = progress or (lambda fraction, text: None)
+        self.dry_run     = dry_run
+        self.smtp_latency = smtp_latency
+        self.suppressions = suppressions
+        self.metrics  = CampaignMetrics()
+        self.counts   = {"done": start, "sent": 0, "failed": 0}
+        self.log_path = None
+        self.error    = None
+
+    def run(self):
+        cfg       = self.config
+        contacts  = self.contacts
+        dry       = self.dry_run is not None
+        journal   = None if dry else self.journal
+        email_col = next(
+            (h for h in contacts.headers if "email" in h.lower()), None)
+        total   = len(contacts)
+        counts  = self.counts
+        metrics = self.metrics
+        skip    = journal.done_keys() if self.resume and journal else set()
+        suppressions = self.suppressions
+        validator = RecipientValidator(check_mx=check_mx_enabled(cfg),
+                                       suppressions=suppressions)
+        lock    = threading.Lock()
+        log     = self._log
+        verb    = "rendered" if dry else "sent"
+        lf = lw = None
+
+        # parsed once, before anything is opened, so a bad value can't
+        # resurface later in the finally block
+        try:
+            delay       = float(self.delay or 0)
+            domain_rate = float(cfg.get("domain_rate") or 0)
+        except (TypeError, ValueError) as e:
+            self.error = e
+            log(f"Invalid delay or per-domain rate: {e}", "err")
+            return counts
+
+        if self.track and not dry:
+            self.log_path = Path.home() / \
+                f"letustech_sent_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            lf = open(self.log_path, "w", newline="", encoding="utf-8")
+            lw = csv.writer(lf)
+            lw.writerow(["email", "status", "timestamp"])
+
+        def record(to_email, status, ref=None, error=None, track=True):
+            """Count one finished contact — called from every pool worker."""
+            if journal is not None and ref is not None:
+                if status == "skipped":
+                    journal.skip(ref)
+                else:
+                    journal.record(to_email, ref,
+                                   "sent" if status == "sent" else
+                                   "retry" if is_transient(error) else "failed")
+            if error is not None:
+                metrics.error(error)
+            if suppressions is not None and not dry and \
+                    (status == "sent" or error is not None):
+                why = suppressions.note(to_email, error)
+                if why:
+                    log(f"Suppressed {to_email} — {SUPPRESS_REASONS[why]}",
+                        "warn")
+            with lock:
+                counts["done"] += 1
+                if status != "skipped":
+                    counts["sent" if status == "sent" else "failed"] += 1
+                if lw and track:
+                    lw.writerow([to_email, status,
+                                 datetime.now().isoformat()])
+                done, sent, failed = (counts["done"], counts["sent"],
+                                      counts["failed"])
+            rate  = pool.throughput() if pool else 0.0
+            built = pipeline.build_rate() if pipeline else 0.0
+            self._progress(
+                done / total if total else 1.0,
+                f"{done} / {total}  |  {sent} {verb}  |  {failed} failed  |  "
+                f"{rate * 60:.0f}/min (built {built * 60:.0f}/min)"
+                + ("" if dry else f"  |  {metrics.live()}"))
+
+        pool = pipeline = None
+        try:
+            limiter = RateLimiter(
+                per_second=1 / delay if delay > 0 else 0,
+                domain_per_minute=domain_rate,
+                overrides=parse_domain_limits(cfg.get("domain_overrides", "")))
+            if dry:
+                pool = DryRunPool(self.dry_run, size=cfg.get("pool_size") or 1,
+                                  stop_flag=self.stop_flag, log=log,
+                                  on_result=record, metrics=metrics)
+            else:
+                transport = TRANSPORTS.get(cfg.get("transport"), SMTPPool)
+                pool = transport(self.host, self.port, self.user, self.pwd,
+                                 self.tls, size=cfg.get("pool_size") or 1,
+                                 limiter=limiter, stop_flag=self.stop_flag,
+                                 log=log, on_result=record,
+                                 lookahead=cfg.get("queue_depth"),
+                                 metrics=metrics)
+            builder = MessageBuilder(
+                self.subject, self.body, contacts.headers, cfg,
+                user=self.user, from_name=self.from_name, html=self.html,
+                attachments=self.attachments, metrics=metrics, log=log)
+
+            def build_failed(to_email, ref, exc):
+                log(f"FAIL  {to_email} — could not build: {exc}", "err")
+                metrics.error(exc)
+                record(to_email, f"failed: {exc}", ref)
+
+            pipeline = BuildPipeline(builder.build, pool.submit,
+                                     stop_flag=self.stop_flag,
+                                     on_error=build_failed)
+            pool.start()
+            pipeline.start()
+            if not dry:
+                log(f"Connected to {self.host}:{self.port}" +
+                    (f" ({pool.size} connections)" if pool.size > 1 else ""),
+                    "ok")
+            elif self.dry_run:
+                log(f"Dry run — writing messages to {self.dry_run}", "info")
+            else:
+                log("Dry run — measuring only, nothing is written or sent.",
+                    "info")
+            if self.resume:
+                log(f"Resuming from contact {self.start + 1} — "
+                    f"{len(skip)} already done.", "info")
+
+            for i, row in enumerate(contacts.iter_rows(self.start), self.start):
+                if self.stop_flag.is_set():
+                    log("Stopped.", "warn")
+                    break
+
+                to_email = (row.get(email_col) or "").strip()
+                if skip and journal.key(to_email) in skip:
+                    record(to_email, "skipped", i, track=False)
+                    continue
+                _, reason = validator.check(to_email)
+                if reason in ("duplicate", "suppressed"):
+                    record(to_email, "skipped", i, track=False)
+                    continue
+                if reason:
+                    log(f"Skip {REJECT_REASONS[reason]}: {to_email}", "warn")
+                    record(to_email, "invalid", i, track=False)
+                    continue
+
+                if not pipeline.feed(to_email, row, ref=i):
+                    log("Stopped.", "warn")
+                    break
+
+            pipeline.close()
+            if pipeline.error:
+                raise pipeline.error
+
+        except Exception as e:
+            self.error = e
+            if dry:
+                log(f"Dry run failed: {e}", "err")
+            else:
+                log(f"SMTP error: {e}", "err")
+                log("Check your host, port, email and password in SMTP "
+                    "settings.", "warn")
+        finally:
+            if pipeline:
+                pipeline.close()
+            if pool:
+                pool.close()
+            if journal is not None:
+                journal.close()
+            if suppressions is not None:
+                suppressions.close()
+            metrics.finished = time.time()
+            if dry:
+                self._dry_run_summary(pool, delay, domain_rate)
+            else:
+                log(f"Timing — {metrics.live()}", "info")
+            if lf:
+                lf.close()
+                log(f"Log saved: {self.log_path}", "ok")
+                try:
+                    report, _ = metrics.write_report(
+                        self.log_path.with_suffix(""),
+                        total=total, sent=counts["sent"],
+                        failed=counts["failed"],
+                        transport=cfg.get("transport", "smtplib"),
+                        pool_size=pool.size if pool else 0,
+                        delay_s=delay,
+                        queue_depth=cfg.get("queue_depth", ""),
+                        domain_rate=cfg.get("domain_rate", ""))
+                    log(f"Report saved: {report} (+ .csv)", "ok")
+                except OSError as e:
+                    log(f"Could not write report: {e}", "warn")
+        return counts
+
+    def _dry_run_summary(self, pool, delay, domain_rate):
+        """Project the real send time, log it and write the dry-run report.
+
+        ``delay`` and ``domain_rate`` are the values run() already parsed.
+        """
+        cfg, metrics, log = self.config, self.metrics, self._log
+        build = sum(metrics.stages[s].total for s in ("render", "mime"))
+        metrics.projection = project_send_time(
+            pool.domains if pool else Counter(),
+            pool_size=pool.size if pool else 1,
+            delay=delay,
+            domain_rate=domain_rate,
+            overrides=parse_domain_limits(cfg.get("domain_overrides", "")),
+            smtp_latency=self.smtp_latency, build_seconds=build)
+        sizes, proj = metrics.sizes, metrics.projection
+        log(f"Dry run — {sizes.count:,} messages, "
+            f"{sizes.total / 1e6:,.1f} MB "
+            f"(median {sizes.percentile(0.5) / 1024:,.1f} KB, "
+            f"p95 {sizes.percentile(0.95) / 1024:,.1f} KB, "
+            f"largest {sizes.max / 1024:,.1f} KB)", "ok")
+        log(f"Projected send time: {proj['estimate']} "
+            f"(limited by {proj['bottleneck']}; {pool.size if pool else 1} "
+            f"connection(s) at {proj['smtp_latency_ms']} ms each)", "ok")
+        base = (Path(self.dry_run).with_suffix("") if self.dry_run else
+                Path.home() / f"letustech_dryrun_{datetime.now():%Y%m%d_%H%M%S}")
+        try:
+            report, _ = metrics.write_report(
+                base, dry_run=True, total=len(self.contacts),
+                rendered=self.counts["sent"], failed=self.counts["failed"],
+                pool_size=pool.size if pool else 0, delay_s=delay,
+                domain_rate=domain_rate)
+            log(f"Report saved: {report} (+ .csv)", "ok")
+        except OSError as e:
+            log(f"Could not write report: {e}", "warn")
+
+# ── Scheduler ───────────────────────────────────────────────────────────────
+SCHEDULE_DIR = Path.home() / ".letustech_schedule"
+
+def parse_hours(text):
+    """``"09:00-17:30"`` -> ``(540, 1050)`` minutes past midnight, or None.
+
+    The end may be earlier than the start for an overnight window.
+    """
+    m = re.fullmatch(r"\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*",
+                     text or "")
+    if not m:
+        return None
+    h1, m1, h2, m2 = map(int, m.groups())
+    if h1 > 24 or h2 > 24 or m1 > 59 or m2 > 59:
+        return None
+    start, end = h1 * 60 + m1, h2 * 60 + m2
+    return None if start == end else (start, end)
+
+def in_hours(hours, when):
+    """True if ``when`` falls inside ``hours`` (from parse_hours; None = always)."""
+    if not hours:
+        return True
+    start, end = hours
+    minute = when.hour * 60 + when.minute
+    return start <= minute < end if start < end else \
+           minute >= start or minute < end
+
+def active_seconds(hours, start, end):
+    """Seconds between two datetimes that fall inside ``hours``."""
+    if end <= start:
+        return 0.0
+    if not hours:
+        return (end - start).total_seconds()
+    h_start, h_end = hours
+    total, day = 0.0, datetime.combine(start.date(), datetime.min.time())
+    day -= timedelta(days=1)   # an overnight window may have opened yesterday
+    while day <= end:
+        open_  = day + timedelta(minutes=h_start)
+        close_ = day + timedelta(minutes=h_end if h_end > h_start
+                                 else h_end + 24 * 60)
+        total += max(0.0, (min(close_, end) - max(open_, start)).total_seconds())
+        day += timedelta(days=1)
+    return total
+
+def parse_when(text, now=None):
+    """``"2025-06-01 09:30"`` or ``"09:30"`` (the next one) -> datetime; "" -> None."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    now = now or datetime.now()
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S",
+                "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    try:
+        t = datetime.strptime(text, "%H:%M").time()
+    except ValueError:
+        raise ValueError(f"can't read {text!r} — use YYYY-MM-DD HH:MM or HH:MM")
+    when = datetime.combine(now.date(), t)
+    if when <= now:
+        when += timedelta(days=1)
+    return when
+
+def _lock_file(path):
+    """Open ``path`` under an exclusive OS lock, or None if someone holds it.
+
+    The OS drops the lock when the holder exits, so a crash can't leave
+    it stuck.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        fh.close()
+        return None
+    return fh
+
+def _unlock_file(fh):
+    if os.name == "nt":
+        import msvcrt
+        fh.seek(0)
+        try:
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+    fh.close()
+
+class Scheduler:
+    """Runs queued campaigns at their set time, inside their sending hours.
+
+    Each job is a JSON file in SCHEDULE_DIR, so the queue survives
+    restarts; passwords are never written there — they come from the
+    saved config, or ``password_env``, when the job starts. A job can
+    start ``at`` a time, be limited to ``hours`` (``"09:00-17:00"``) —
+    it's stopped at closing time and picks up from its send journal at
+    the next opening — and be spread evenly until ``spread_until``.
+
+    Only one process runs jobs at a time (a heartbeat file decides which).
+    Every send — scheduled, from the window or from the command line —
+    claim()s its SMTP account first, so at most one campaign sends from
+    an account at once. start() runs the loop on a daemon thread;
+    run_forever() blocks, for headless use.
+    """
+
+    TICK  = 10    # seconds between checks
+    STALE = 60    # a dispatcher silent this long is presumed dead
+    STATES = ("queued", "running", "done", "failed", "cancelled")
+
+    def __init__(self, directory=None, log=None, on_change=None,
+                 suppressions=None, password_env="LETUSTECH_SMTP_PASS"):
+        self.dir = Path(directory or SCHEDULE_DIR)
+        self._log       = log or (lambda msg, tag="info": None)
+        self._on_change = on_change or (lambda: None)
+        self.suppressions = suppressions
+        self.password_env = password_env
+        self._token   = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+        self._running = {}   # job id -> (thread, stop flag, account)
+        self._held    = {}   # account -> open lock file
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._thread  = None
+        self.owner    = False
+
+    # ── Queue ───────────────────────────────────────────────────────────
+
+    def add(self, csv_path, subject, body, smtp, *, at=None, hours="",
+            spread_until=None, html=False, from_name="", attachments=(),
+            delay=1.0, name=""):
+        """Queue a campaign; ``smtp`` is ``(host, port, user, tls)``."""
+        if hours and not parse_hours(hours):
+            raise ValueError(f"sending hours {hours!r} should look like 09:00-17:00")
+        if spread_until and at and spread_until <= at:
+            raise ValueError("the spread has to end after the start time")
+        host, port, user, tls = smtp
+        job = {
+            "id":      datetime.now().strftime("%Y%m%d%H%M%S-") + os.urandom(3).hex(),
+            "name":    name or subject[:60],
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "csv":     os.path.abspath(csv_path),
+            "subject": subject, "body": body, "html": bool(html),
+            "from_name": from_name, "attachments": list(attachments),
+            "delay":   float(delay),
+            "smtp":    {"host": host, "port": int(port), "user": user, "tls": tls},
+            "at":      at.isoformat(timespec="seconds") if at else None,
+            "hours":   hours or "",
+            "spread_until": (spread_until.isoformat(timespec="seconds")
+                             if spread_until else None),
+            "status":  "queued",
+            "sent": 0, "failed": 0, "total": 0, "error": "",
+        }
+        self._save(job)
+        self._on_change()
+        return job
+
+    def jobs(self):
+        """Every job on disk, soonest first."""
+        out = []
+        if self.dir.exists():
+            for path in self.dir.glob("*.json"):
+                try:
+                    out.append(json.loads(path.read_text(encoding="utf-8")))
+                except (OSError, ValueError):
+                    pass   # half-copied by hand, or not ours
+        return sorted(out, key=lambda j: (j.get("at") or j["created"], j["id"]))
+
+    def cancel(self, job_id):
+        """Stop a job; a running one finishes the message it's on."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        (self.dir / f"{job_id}.cancel").touch()
+        with self._lock:
+            running = self._running.get(job_id)
+        if running:
+            running[1].set()
+        self._on_change()
+
+    def forget(self, job_id):
+        """Delete a finished or cancelled job from the list."""
+        with self._lock:
+            if job_id in self._running:
+                return False
+        for suffix in (".json", ".cancel"):
+            try:
+                (self.dir / f"{job_id}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+        self._on_change()
+        return True
+
+    # ── Accounts ────────────────────────────────────────────────────────
+
+    def claim(self, user, host):
+        """Reserve an SMTP account for one send; False if it's already sending.
+
+        The reservation is a lock file in the schedule folder, so a send
+        in another process (the app, a scheduler, a command-line send)
+        counts too. Hand it back with release().
+        """
+        account = (user.strip().lower(), host.strip().lower())
+        name = hashlib.sha1("\x1f".join(account).encode()).hexdigest()[:16]
+        with self._lock:
+            if account in self._held:
+                return False
+            fh = _lock_file(self.dir / "accounts" / f"{name}.lock")
+            if fh is None:
+                return False
+            self._held[account] = fh
+            return True
+
+    def release(self, user, host):
+        account = (user.strip().lower(), host.strip().lower())
+        with self._lock:
+            fh = self._held.pop(account, None)
+        if fh:
+            _unlock_file(fh)
+
+    def _save(self, job):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        job["updated"] = datetime.now().isoformat(timespec="seconds")
+        atomic_write(self.dir / f"{job['id']}.json",
+                     json.dumps(job, indent=2).encode("utf-8"))
+
+    # ── Dispatcher ──────────────────────────────────────────────────────
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=5.0):
+        """Stop dispatching; running jobs stop and resume on the next start."""
+        self._stop.set()
+        with self._lock:
+            running = list(self._running.values())
+        for _, flag, _ in running:
+            flag.set()
+        for th, _, _ in running:
+            th.join(wait)
+        self._release()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if self._acquire():
+                    self.tick()
+            except Exception as e:
+                self._log(f"Scheduler: {e}", "err")
+            self._stop.wait(self.TICK)
+
+    def _acquire(self):
+        """Claim (or keep) the dispatcher heartbeat; False if someone else has it."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        lock = self.dir / "dispatcher.lock"
+        try:
+            held = json.loads(lock.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            held = {}
+        if held.get("owner") not in (None, self._token) and \
+                time.time() - held.get("beat", 0) < self.STALE:
+            self.owner = False
+            return False
+        atomic_write(lock, json.dumps({"owner": self._token, "beat": time.time(),
+                                       "pid": os.getpid()}).encode())
+        try:   # two claimed it at once — whoever wrote last wins
+            self.owner = json.loads(lock.read_text())["owner"] == self._token
+        except (OSError, ValueError, KeyError):
+            self.owner = False
+        return self.owner
+
+    def _release(self):
+        lock = self.dir / "dispatcher.lock"
+        try:
+            if json.loads(lock.read_text())["owner"] == self._token:
+                lock.unlink()
+        except (OSError, ValueError, KeyError):
+            pass
+        self.owner = False
+
+    def tick(self, now=None):
+        """Start whatever is due and pause whatever is out of hours."""
+        now = now or datetime.now()
+        for job in self.jobs():
+            jid, hours = job["id"], parse_hours(job.get("hours"))
+            with self._lock:
+                running = self._running.get(jid)
+            cancelled = (self.dir / f"{jid}.cancel").exists()
+            if running:
+                if cancelled or not in_hours(hours, now):
+                    running[1].set()
+                continue
+            if job["status"] not in ("queued", "running"):
+                continue   # "running" with no thread = we crashed mid-send
+            if cancelled:
+                job["status"] = "cancelled"
+                self._save(job)
+                self._on_change()
+                continue
+            if job.get("at") and now < datetime.fromisoformat(job["at"]):
+                continue
+            if not in_hours(hours, now):
+                continue
+            account = (job["smtp"]["user"], job["smtp"]["host"])
+            if not self.claim(*account):
+                continue   # something else is sending from this account
+            flag = threading.Event()
+            th = threading.Thread(target=self._run, args=(job, flag, account),
+                                  daemon=True)
+            with self._lock:
+                self._running[jid] = (th, flag, account)
+            th.start()
+
+    def _password(self, smtp):
+        cfg = load_config()
+        if cfg.get("pass") and cfg.get("user", "").lower() == smtp["user"].lower():
+            return cfg["pass"]
+        return os.environ.get(self.password_env, "")
+
+    def _run(self, job, flag, account):
+        name = job["name"]
+        log  = lambda msg, tag="info": self._log(f"[{name}] {msg}", tag)
+        job.update(status="running", error="")
+        self._save(job)
+        self._on_change()
+        try:
+            smtp = job["smtp"]
+            pwd  = self._password(smtp)
+            if not pwd:
+                raise RuntimeError(f"no saved password for {smtp['user']} — "
+                                   f"save it in the app or set {self.password_env}")
+            cfg = load_config()
+            contacts = CSVContactSource(job["csv"])
+            contacts.scan(RecipientValidator(check_mx=check_mx_enabled(cfg),
+                                             suppressions=self.suppressions))
+            if contacts.error:
+                raise contacts.error
+            journal = SendJournal.for_campaign(job["csv"], smtp["user"],
+                                               job["subject"], job["body"])
+            done    = journal.counts()
+            resume  = bool(journal)
+            left    = max(1, len(contacts) - done["sent"] - done["failed"]
+                             - done["skipped"])
+            delay   = job["delay"]
+            if job.get("spread_until"):
+                window = active_seconds(parse_hours(job.get("hours")),
+                                        datetime.now(),
+                                        datetime.fromisoformat(job["spread_until"]))
+                delay = max(delay, window / left)
+            log(("Resuming" if resume else "Starting") +
+                f" — {left:,} to go, one every {delay:.1f}s", "info")
+            campaign = Campaign(
+                contacts, (smtp["host"], smtp["port"], smtp["user"], pwd,
+                           smtp["tls"]),
+                job["subject"], job["body"], cfg,
+                html=job["html"], from_name=job["from_name"],
+                attachments=job["attachments"], delay=delay,
+                journal=journal,
+                start=journal.first_unsent() if resume else 0,
+                resume=resume, stop_flag=flag, log=log,
+                suppressions=self.suppressions)
+            campaign.run()
+            totals = journal.counts()
+            job.update(sent=totals["sent"], failed=totals["failed"],
+                       total=len(contacts))
+            if campaign.error:
+                job.update(status="failed", error=str(campaign.error))
+            elif (self.dir / f"{job['id']}.cancel").exists():
+                job["status"] = "cancelled"
+            elif flag.is_set():
+                job["status"] = "queued"   # out of hours, or shutting down
+                log("Paused — will carry on in the next sending window.", "info")
+            else:
+                job["status"] = "done"
+                log(f"Finished — {job['sent']:,} sent, {job['failed']:,} failed.",
+                    "ok")
+        except Exception as e:
+            job.update(status="failed", error=str(e))
+            log(f"Failed: {e}", "err")
+        finally:
+            self._save(job)
+            with self._lock:
+                self._running.pop(job["id"], None)
+            self.release(*account)
+            self._on_change()
+
+# ── Command line ────────────────────────────────────────────────────────────
+def read_template(path):
+    """Load ``(subject, body)`` from a template file.
+
+    Either JSON with ``subject`` and ``body`` keys, or plain text whose
+    first line is ``Subject: ...`` followed by a blank line and the body.
+    """
+    text = Path(path).read_text(encoding="utf-8-sig")
+    if Path(path).suffix.lower() == ".json":
+        data = json.loads(text)
+        return data.get("subject", ""), data.get("body", "")
+    first, _, rest = text.partition("\n")
+    if first.lower().startswith("subject:"):
+        return first[8:].strip(), rest.lstrip("\r\n")
+    return "", text
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(
+        prog="email_engine",
+        description="Send a Bulk Email Sender campaign without the window. "
+                    "Anything not given on the command line comes from the "
+                    "settings saved in the app.")
+    ap.add_argument("--csv", help="contacts CSV (needs an email column)")
+    ap.add_argument("--template",
+                    help="template file: .json with subject/body, or text "
+                         "starting with a 'Subject:' line")
+    ap.add_argument("--subject", help="subject line (overrides the template)")
+    ap.add_argument("--html", action="store_true", help="send the body as HTML")
+    ap.add_argument("--attach", action="append", default=[], metavar="FILE",
+                    help="attach a file (repeatable)")
+    ap.add_argument("--from-name", help="display name for the From header")
+    ap.add_argument("--host")
+    ap.add_argument("--port", type=int)
+    ap.add_argument("--user", help="SMTP login / sender address")
+    ap.add_argument("--password-env", default="LETUSTECH_SMTP_PASS", metavar="VAR",
+                    help="environment variable holding the SMTP password "
+                         "(default: %(default)s)")
+    ap.add_argument("--tls", choices=["STARTTLS", "SSL/TLS", "None"])
+    ap.add_argument("--transport", choices=list(TRANSPORTS))
+    ap.add_argument("--pool", type=int, metavar="N", help="parallel SMTP connections")
+    ap.add_argument("--delay", type=float, metavar="SECONDS",
+                    help="minimum gap between emails")
+    ap.add_argument("--no-mx-check", action="store_true",
+                    help="don't look up recipient domains before sending")
+    ap.add_argument("--track", action="store_true",
+                    help="write letustech_sent_*.csv and a timing report to your home folder")
+    ap.add_argument("--dry-run", nargs="?", const="", metavar="MBOX",
+                    help="build every message but don't send: write them to "
+                         "MBOX (or just measure them) and report sizes and "
+                         "the projected send time")
+    ap.add_argument("--assume-latency", type=float, default=250, metavar="MS",
+                    help="SMTP round-trip per message used by --dry-run's "
+                         "projection (default: %(default)s)")
+    ap.add_argument("--ignore-suppressions", action="store_true",
+                    help="send to suppressed addresses too, and don't add "
+                         "new bounces to the list")
+    ap.add_argument("--no-saved-config", action="store_true",
+                    help="ignore the settings saved by the app")
+    again = ap.add_mutually_exclusive_group()
+    again.add_argument("--resume", action="store_true",
+                       help="skip contacts this campaign already reached")
+    again.add_argument("--restart", action="store_true",
+                       help="forget earlier progress and send to everyone")
+    when = ap.add_argument_group("scheduling")
+    when.add_argument("--at", metavar="WHEN",
+                      help="queue the campaign to start at 'YYYY-MM-DD HH:MM' "
+                           "(or HH:MM) instead of sending now")
+    when.add_argument("--hours", metavar="HH:MM-HH:MM",
+                      help="queue it, sending only between these times each day")
+    when.add_argument("--spread-until", metavar="WHEN",
+                      help="queue it, pacing the sends to finish around WHEN")
+    when.add_argument("--run-scheduler", action="store_true",
+                      help="run queued campaigns as they come due, until stopped")
+    ap.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    args = ap.parse_args(argv)
+
+    def log(msg, tag="info"):
+        if tag == "err" or not args.quiet:
+            stream = sys.stderr if tag in ("err", "warn") else sys.stdout
+            print(f"[{datetime.now():%H:%M:%S}] {msg}", file=stream, flush=True)
+
+    if args.run_scheduler:
+        import signal
+        scheduler = Scheduler(log=log, suppressions=SUPPRESSIONS,
+                              password_env=args.password_env)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: scheduler._stop.set())
+        log(f"Running scheduled campaigns from {scheduler.dir}", "info")
+        scheduler.run_forever()
+        scheduler.stop()
+        return 0
+    if not (args.csv and args.template):
+        ap.error("--csv and --template are required")
+
+    cfg = {} if args.no_saved_config else load_config()
+    for key, value in (("transport", args.transport), ("pool_size", args.pool)):
+        if value is not None:
+            cfg[key] = value
+    if args.no_mx_check:
+        cfg["check_mx"] = "Off"
+    host = args.host or cfg.get("host", "")
+    port = args.port or int(cfg.get("port") or 587)
+    user = args.user or cfg.get("user", "")
+    pwd  = os.environ.get(args.password_env) or cfg.get("pass", "")
+    tls  = args.tls or cfg.get("tls", "STARTTLS")
+    dry  = args.dry_run is not None
+    queue_it = args.at or args.hours or args.spread_until
+    if queue_it and dry:
+        ap.error("--dry-run can't be scheduled")
+    if queue_it and not all([host, user]):
+        ap.error("SMTP host and user are required — save them in the app "
+                 "or pass --host/--user")
+    if not dry and not queue_it and not all([host, user, pwd]):
+        ap.error(f"SMTP host, user and password are required — save them in "
+                 f"the app or pass --host/--user and set {args.password_env}")
+
+    subject, body = read_template(args.template)
+    subject = args.subject or subject
+    if not subject.strip() or not body.strip():
+        ap.error("the template needs both a subject and a body")
+
+    if queue_it:
+        try:
+            job = Scheduler().add(
+                args.csv, subject, body, (host, port, user, tls),
+                at=parse_when(args.at), hours=args.hours or "",
+                spread_until=parse_when(args.spread_until),
+                html=args.html,
+                from_name=args.from_name or cfg.get("default_from_name", ""),
+                attachments=[os.path.abspath(a) for a in args.attach],
+                delay=args.delay if args.delay is not None
+                      else float(cfg.get("default_delay") or 1))
+        except ValueError as e:
+            ap.error(str(e))
+        log(f"Queued {job['id']} — run 'email_engine.py --run-scheduler' "
+            f"(or keep the app open) to send it.", "ok")
+        return 0
+
+    scheduler = None
+    if not dry:
+        scheduler = Scheduler()
+        if not scheduler.claim(user, host):
+            ap.error(f"something is already sending from {user} — a scheduled "
+                     f"campaign or another send; wait for it to finish")
+
+    suppressions = None if args.ignore_suppressions else SUPPRESSIONS
+    contacts = CSVContactSource(args.csv)
+    contacts.scan(RecipientValidator(check_mx=check_mx_enabled(cfg),
+                                     suppressions=suppressions))
+    if contacts.error:
+        ap.error(f"CSV error: {contacts.error}")
+
+    journal = SendJournal.for_campaign(args.csv, user, subject, body)
+    done = journal.counts()
+    if dry:
+        args.resume = False   # a dry run always builds the whole list
+    elif done["sent"] and not (args.resume or args.restart):
+        ap.error(f"this campaign already reached {done['sent']} contacts — "
+                 f"pass --resume to skip them or --restart to send again")
+    elif not args.resume:
+        journal.reset()
+
+    log(f"{contacts.valid:,} valid / {contacts.total:,} total", "info")
+    if contacts.validator.rejected:
+        log(f"Will skip {contacts.validator.describe()}.", "warn")
+
+    campaign = Campaign(
+        contacts, (host, port, user, pwd, tls), subject, body, cfg,
+        html=args.html,
+        from_name=args.from_name or cfg.get("default_from_name", ""),
+        attachments=args.attach,
+        delay=args.delay if args.delay is not None
+              else float(cfg.get("default_delay") or 1),
+        journal=journal,
+        start=journal.first_unsent() if args.resume else 0,
+        resume=args.resume, track=args.track, log=log,
+        dry_run=args.dry_run, smtp_latency=args.assume_latency / 1000,
+        suppressions=suppressions)
+    import signal
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: campaign.stop_flag.set())
+    try:
+        counts = campaign.run()
+    finally:
+        if scheduler:
+            scheduler.release(user, host)
+    log(f"{'Dry run' if dry else 'Campaign'} complete — {counts['sent']} "
+        f"{'rendered' if dry else 'sent'}, {counts['failed']} failed.", "ok")
+    return 1 if campaign.error or counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,631 @@
+"""
+LetUsTech Email Tools — Automated Test Suite
+============================================
+Tests the headless logic of the CSV Maker and the send engine without
+opening a window.
+
+Run with:  python test_suite.py
+All tests must pass before a release.
+"""
+
+import sys, random, shutil, smtplib, tempfile, time, unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# ── Stub out tkinter before importing the apps (no window opened) ────────────
+for mod in ["tkinter", "tkinter.ttk", "tkinter.messagebox", "tkinter.filedialog"]:
+    sys.modules[mod] = MagicMock()
+
+sys.path.insert(0, str(Path(__file__).parent))
+import email_csv_maker as maker
+import email_engine as engine
+from benchmark import SMTPSink
+
+# ── Shortcuts ─────────────────────────────────────────────────────────────────
+canonical_email  = maker.canonical_email
+name_key         = maker.name_key
+find_duplicates  = maker.find_duplicates
+merge_values     = maker.merge_values
+merge_duplicates = maker.merge_duplicates
+EntryStore       = maker.EntryStore
+FIELDS           = list(maker.CORE_FIELDS)
+personalise      = engine.personalise
+CompiledTemplate = engine.CompiledTemplate
+StubResolver     = engine.StubResolver
+CachedResolver   = engine.CachedResolver
+RecipientValidator = engine.RecipientValidator
+CSVContactSource = engine.CSVContactSource
+SendJournal      = engine.SendJournal
+SuppressionStore = engine.SuppressionStore
+bounce_class     = engine.bounce_class
+parse_hours      = engine.parse_hours
+in_hours         = engine.in_hours
+active_seconds   = engine.active_seconds
+parse_when       = engine.parse_when
+Scheduler        = engine.Scheduler
+AsyncSMTPPool    = engine.AsyncSMTPPool
+RateLimiter      = engine.RateLimiter
+
+DEDUPE_ROWS     = 500_000
+DEDUPE_BUDGET_S = 10.0     # "500k rows in seconds", with headroom for slow CI
+
+
+def _store(rows):
+    store = EntryStore(FIELDS)
+    for r in rows:
+        store.append(dict(zip(FIELDS, r)))
+    return store
+
+
+def _clusters(store, fuzzy=True):
+    return find_duplicates(store.column("email"), store.column("first_name"),
+                           store.column("last_name"), fuzzy)
+
+
+def _contact_list(n, seed=1):
+    """Synthetic list: ~90% distinct people, ~10% re-entered duplicates."""
+    rnd     = random.Random(seed)
+    firsts  = [f"{a}{b}" for a in ("jo", "ma", "al", "sa", "ke", "li", "ra", "de",
+                                   "an", "mi") for b in ("hn", "ria", "ex", "m",
+                                   "vin", "sa", "j", "nise", "na", "ke",
+                                   "ra", "ssa", "ther", "ly", "ndy", "rk",
+                                   "lia", "tt", "ela", "mon")]
+    lasts   = ["".join(rnd.choice("bcdfghklmnprstvz") + rnd.choice("aeiou")
+                       for _ in range(3)) for _ in range(3000)]
+    free    = ["gmail.com", "outlook.com", "yahoo.com", "hotmail.com", "icloud.com"]
+    domains = [f"company{i}.com" for i in range(20000)]
+    emails, fn, ln = [], [], []
+    for i in range(n):
+        if i > 1000 and rnd.random() < 0.10:
+            j = rnd.randrange(i)
+            e, f, l = emails[j], fn[j], ln[j]
+            local, domain = e.split("@")
+            v = rnd.random()
+            if v < 0.3:
+                e = e.upper()
+            elif v < 0.6 and domain == "gmail.com":
+                e = local.replace(".", "") + "+news@googlemail.com"
+            elif v < 0.8:
+                e = f"{f}.{l}@{domain}"
+            emails.append(e); fn.append(f.title()); ln.append(l.title())
+            continue
+        f, l = rnd.choice(firsts), rnd.choice(lasts)
+        domain = rnd.choice(free) if rnd.random() < 0.4 else rnd.choice(domains)
+        local = rnd.choice([f"{f}.{l}", f"{f[0]}{l}", f"{f}{l}{rnd.randrange(100)}"])
+        emails.append(f"{local}@{domain}"); fn.append(f.title()); ln.append(l.title())
+    return emails, fn, ln
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+class TestCanonicalEmail(unittest.TestCase):
+
+    def test_case_and_whitespace(self):
+        self.assertEqual(canonical_email("  Bob@Example.COM "), "bob@example.com")
+
+    def test_gmail_dots_and_tags(self):
+        self.assertEqual(canonical_email("John.Smith+news@gmail.com"), "johnsmith@gmail.com")
+        self.assertEqual(canonical_email("j.o.h.n.smith@gmail.com"), "johnsmith@gmail.com")
+
+    def test_googlemail_alias(self):
+        self.assertEqual(canonical_email("johnsmith@googlemail.com"), "johnsmith@gmail.com")
+
+    def test_plus_tags_on_other_providers(self):
+        self.assertEqual(canonical_email("a.b+x@outlook.com"), "a.b@outlook.com")
+        self.assertEqual(canonical_email("a+promo@icloud.com"), "a@icloud.com")
+
+    def test_company_domains_untouched(self):
+        self.assertEqual(canonical_email("a.b+x@acme.com"), "a.b+x@acme.com")
+
+    def test_not_an_address(self):
+        self.assertEqual(canonical_email("nobody"), "nobody")
+
+
+class TestNameKey(unittest.TestCase):
+
+    def test_order_insensitive(self):
+        self.assertEqual(name_key("John", "Smith"), name_key("Smith", "John"))
+
+    def test_accents_and_punctuation(self):
+        self.assertEqual(name_key("Zoë", "O'Neil"), name_key("zoe", "ONeil"))
+
+    def test_needs_both_parts(self):
+        self.assertEqual(name_key("John", ""), "")
+        self.assertEqual(name_key("", ""), "")
+
+
+class TestFindDuplicates(unittest.TestCase):
+
+    def test_canonical_matches_grouped(self):
+        store = _store([("John.Smith+news@gmail.com", "John", "Smith", ""),
+                        ("jane@acme.com", "Jane", "Doe", ""),
+                        ("JOHNSMITH@googlemail.com", "", "", "")])
+        self.assertEqual(_clusters(store), [[0, 2]])
+
+    def test_same_name_same_domain_is_fuzzy(self):
+        store = _store([("j.smith@acme.com", "John", "Smith", ""),
+                        ("john.smith@acme.com", "Smith", "John", "")])
+        self.assertEqual(_clusters(store), [[0, 1]])
+        self.assertEqual(_clusters(store, fuzzy=False), [])
+
+    def test_same_name_different_domain_kept(self):
+        store = _store([("john.smith@acme.com", "John", "Smith", ""),
+                        ("john.smith@other.com", "John", "Smith", "")])
+        self.assertEqual(_clusters(store), [])
+
+    def test_role_address_not_merged(self):
+        store = _store([("john.smith@acme.com", "John", "Smith", ""),
+                        ("support@acme.com", "John", "Smith", "")])
+        self.assertEqual(_clusters(store), [])
+
+    def test_different_digits_not_merged(self):
+        store = _store([("jsmith1@acme.com", "John", "Smith", ""),
+                        ("jsmith2@acme.com", "John", "Smith", "")])
+        self.assertEqual(_clusters(store), [])
+
+    def test_no_name_no_fuzzy(self):
+        store = _store([("bob@x.com", "Bob", "", ""), ("bob1@x.com", "Bob", "", "")])
+        self.assertEqual(_clusters(store), [])
+
+    def test_clusters_are_sorted_positions(self):
+        store = _store([("a@x.com", "", "", ""), ("b@x.com", "", "", ""),
+                        ("B@x.com", "", "", ""), ("A@X.com", "", "", ""),
+                        ("a@x.com", "", "", "")])
+        self.assertEqual(_clusters(store), [[0, 3, 4], [1, 2]])
+
+
+class TestMerge(unittest.TestCase):
+
+    def test_rules(self):
+        vals = ["", "Acme Inc", "ACME, inc.", "Other Ltd"]
+        self.assertEqual(merge_values(vals, "first"), "Acme Inc")
+        self.assertEqual(merge_values(vals, "last"), "Other Ltd")
+        self.assertEqual(merge_values(vals, "longest"), "ACME, inc.")
+        self.assertEqual(merge_values(vals, "most_common"), "Acme Inc")
+        self.assertEqual(merge_values(["", " "], "first"), "")
+
+    def test_merge_keeps_first_row(self):
+        store = _store([("John.Smith+news@gmail.com", "John", "Smith", "Acme Inc"),
+                        ("jane@acme.com", "Jane", "Doe", ""),
+                        ("johnsmith@gmail.com", "", "Smith", "ACME, Inc."),
+                        ("johnsmith@googlemail.com", "Johnny", "Smith", "Other")])
+        removed = merge_duplicates(store, FIELDS, _clusters(store),
+                                   {"first_name": "longest"})
+        self.assertEqual(removed, 2)
+        self.assertEqual(list(store.rows(FIELDS)), [
+            ["John.Smith+news@gmail.com", "Johnny", "Smith", "Acme Inc"],
+            ["jane@acme.com", "Jane", "Doe", ""],
+        ])
+
+
+class TestDedupeScale(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.emails, cls.firsts, cls.lasts = _contact_list(DEDUPE_ROWS)
+
+    def test_500k_rows_within_budget(self):
+        start    = time.perf_counter()
+        clusters = find_duplicates(self.emails, self.firsts, self.lasts)
+        elapsed  = time.perf_counter() - start
+        removed  = sum(len(c) - 1 for c in clusters)
+        print(f"\n  dedupe {DEDUPE_ROWS:,} rows: {elapsed:.2f}s, "
+              f"{len(clusters):,} groups, {removed:,} duplicates")
+        self.assertLess(elapsed, DEDUPE_BUDGET_S)
+        # roughly 10% of rows were planted as re-entries
+        self.assertGreater(removed, DEDUPE_ROWS * 0.06)
+
+    def test_dense_name_blocks_stay_linear(self):
+        # worst case for the fuzzy pass: every block is full of near-identical
+        # local parts for the same name at the same domain
+        rnd = random.Random(7)
+        emails, firsts, lasts = [], [], []
+        for i in range(DEDUPE_ROWS // 5):
+            local = rnd.choice(["john.smith", "jsmith", "johnsmith", "smith.john"])
+            local += "".join(rnd.choice("abcdefghij") for _ in range(rnd.randint(1, 4)))
+            emails.append(f"{local}@co{i // maker.MAX_BLOCK}.com")
+            firsts.append("John"); lasts.append("Smith")
+        start = time.perf_counter()
+        find_duplicates(emails, firsts, lasts)
+        self.assertLess(time.perf_counter() - start, DEDUPE_BUDGET_S / 2)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+class TestSendJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="letustech_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _journal(self, cid="campaign"):
+        return SendJournal(cid, directory=self.dir)
+
+    def test_resume_skips_finished_rows(self):
+        j = self._journal()
+        j.record("a@x.com", 0, "sent")
+        j.record("b@x.com", 1, "failed")
+        j.record("c@x.com", 2, "retry")
+        j.record("d@x.com", 3, "sent")
+        j.close()
+
+        again = self._journal()
+        self.assertTrue(again)
+        self.assertEqual(again.counts(),
+                         {"sent": 2, "failed": 1, "retry": 1, "skipped": 0})
+        self.assertEqual(again.first_unsent(), 2)   # row 2 only got a retry
+        self.assertEqual(again.done_keys(),
+                         {again.key("A@x.com"), again.key("b@x.com"),
+                          again.key("d@x.com")})
+        self.assertNotIn(again.key("c@x.com"), again.done_keys())
+
+    def test_last_line_wins(self):
+        j = self._journal()
+        j.record("c@x.com", 0, "retry")
+        j.record("c@x.com", 0, "sent")
+        j.close()
+        self.assertEqual(self._journal().counts()["sent"], 1)
+        self.assertEqual(self._journal().first_unsent(), 1)
+
+    def test_torn_tail_ignored(self):
+        j = self._journal()
+        j.record("a@x.com", 0, "sent")
+        j.close()
+        with open(j.path, "a", encoding="utf-8") as f:
+            f.write("deadbeef\t1")            # crash mid-write
+        self.assertEqual(self._journal().counts()["sent"], 1)
+
+    def test_skipped_rows_count_as_done(self):
+        j = self._journal()
+        j.record("a@x.com", 0, "sent")
+        j.skip(1)                               # row 1 repeats a@x.com
+        j.record("b@x.com", 2, "sent")
+        j.close()
+        again = self._journal()
+        self.assertEqual(again.first_unsent(), 3)
+        self.assertIn(again.key("a@x.com"), again.done_keys())
+        self.assertEqual(again.counts()["skipped"], 1)
+
+    def test_campaign_journals_skipped_rows(self):
+        path = Path(self.dir) / "list.csv"
+        path.write_text("email\na@x.com\nA@X.com\nb@x.com\na@x.com\n",
+                        encoding="utf-8")
+        contacts = CSVContactSource(str(path))
+        contacts.scan(RecipientValidator(StubResolver()))
+        sink = SMTPSink().start()
+        self.addCleanup(sink.stop)
+        j = self._journal()
+        engine.Campaign(contacts, ("127.0.0.1", sink.port, "me@x.com", "pw", "None"),
+                        "Hi", "Hello", {"check_mx": "Off"}, delay=0,
+                        journal=j).run()
+        self.assertEqual(sink.messages, 2)
+        again = self._journal()
+        self.assertEqual(again.first_unsent(), 4)
+        self.assertEqual(again.counts()["sent"], 2)
+
+    def test_campaigns_are_separate(self):
+        j = self._journal("one")
+        j.record("a@x.com", 0, "sent")
+        j.close()
+        other = self._journal("two")
+        self.assertFalse(other)
+        self.assertNotEqual(other.key("a@x.com"), j.key("a@x.com"))
+
+    def test_reset(self):
+        j = self._journal()
+        j.record("a@x.com", 0, "sent")
+        j.reset()
+        self.assertFalse(j)
+        self.assertFalse(self._journal())
+
+    def test_campaign_id_is_stable(self):
+        self.assertEqual(SendJournal.campaign_id("list.csv", "me", "Hi"),
+                         SendJournal.campaign_id("list.csv", "me", "Hi"))
+        self.assertNotEqual(SendJournal.campaign_id("list.csv", "me", "Hi"),
+                            SendJournal.campaign_id("list.csv", "me", "Hello"))
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    """CompiledTemplate.render() must match personalise() byte for byte."""
+
+    HEADERS = ["email", "First_Name", "company", "notes", "Company_Name"]
+    CONFIG  = {"sender_name": "Ann", "company_name": "", "email_footer": "Unsubscribe: reply STOP"}
+    ROW     = {"email": "bob@x.com", "First_Name": "Bob", "company": "Acme",
+               "notes": "{{first_name}}", "Company_Name": "Acme Ltd"}
+
+    CASES = [
+        # (what, template, row, config)
+        ("exact header",     "Hi {{First_Name}} at {{ company }}", ROW, None),
+        ("case-insensitive", "Hi {{first_name}} / {{COMPANY}}", ROW, None),
+        ("builtins",         "From {{sender_name}} of {{company_name}}", ROW, CONFIG),
+        ("exact column beats builtin", "{{Company_Name}} {{sender_name}}", ROW, CONFIG),
+        ("builtins without config", "From {{sender_name}}", ROW, None),
+        ("unknown tag",      "Hi {{nickname}}, {{ }} {first_name}", ROW, None),
+        ("value not re-expanded", "Note: {{notes}}", ROW, None),
+        ("short row",        "Hi {{first_name}} at {{company}}!",
+                             {"email": "bob@x.com", "First_Name": "Bob",
+                              "company": None, "notes": None,
+                              "Company_Name": None}, None),
+        ("footer appended",  "Hi {{first_name}}\n\n", ROW, CONFIG),
+        ("footer already there", "Hi\nUnsubscribe: reply STOP\nbye", ROW, CONFIG),
+        ("no tags",          "Plain text", ROW, CONFIG),
+    ]
+
+    def test_matches_personalise(self):
+        for what, template, row, config in self.CASES:
+            with self.subTest(what):
+                compiled = CompiledTemplate(template, self.HEADERS, config)
+                expected = personalise(template, row, config)
+                self.assertEqual(compiled.render(row), expected)
+                values = [row[h] for h in self.HEADERS]
+                while values and values[-1] is None:   # a short CSV line
+                    values.pop()
+                self.assertEqual(compiled.render(values), expected)
+
+    def test_unknown_tags_listed(self):
+        compiled = CompiledTemplate("{{nickname}} {{company_name}} {{email}}",
+                                    self.HEADERS[:4], self.CONFIG)
+        self.assertEqual(compiled.unknown, ["nickname", "company_name"])
+
+
+class TestRecipientValidation(unittest.TestCase):
+
+    def test_cached_resolver_one_lookup_per_domain(self):
+        stub   = StubResolver({"dead.com": False})
+        cached = CachedResolver(stub)
+        for domain in ["x.com", "X.com", "dead.com", "x.com", "DEAD.COM"]:
+            cached.has_mx(domain)
+        self.assertEqual(stub.calls, 2)
+        self.assertFalse(cached.has_mx("dead.com"))
+
+    def test_cached_resolver_ttl(self):
+        stub   = StubResolver({"flaky.com": None})
+        cached = CachedResolver(stub, ttl=0.2, unknown_ttl=0)
+        cached.has_mx("x.com")
+        cached.has_mx("flaky.com")
+        cached.has_mx("flaky.com")             # unknown answers aren't kept
+        self.assertEqual(stub.calls, 3)
+        cached.has_mx("x.com")
+        self.assertEqual(stub.calls, 3)
+        time.sleep(0.25)
+        cached.has_mx("x.com")
+        self.assertEqual(stub.calls, 4)
+
+    def test_duplicates_case_insensitive(self):
+        v = RecipientValidator(StubResolver())
+        self.assertEqual(v.check(" Bob@X.com "), ("bob@x.com", None))
+        self.assertEqual(v.check("bob@x.COM"), ("bob@x.com", "duplicate"))
+        self.assertEqual(v.check("BOB@X.COM"), ("bob@x.com", "duplicate"))
+        self.assertEqual(v.rejected["duplicate"], 2)
+
+    def test_strict_syntax(self):
+        v = RecipientValidator(StubResolver(), check_mx=False)
+        for bad in ["plainaddress", "a@b", "a..b@x.com", ".a@x.com", "a.@x.com",
+                    "a@-x.com", "a@x-.com", "a b@x.com", "a@x.c", "a@@x.com",
+                    "a@x.com.", ("x" * 65) + "@x.com"]:
+            self.assertEqual(v.check(bad)[1], "syntax", bad)
+        for good in ["a+tag@x.co.uk", "o'neil@x.com", "a@xn--bcher-kva.example"]:
+            self.assertIsNone(v.check(good)[1], good)
+
+    def test_no_mx_rejected(self):
+        stub = StubResolver({"dead.com": False, "flaky.com": None})
+        v = RecipientValidator(stub)
+        self.assertEqual(v.check("a@dead.com")[1], "no-mx")
+        self.assertIsNone(v.check("a@flaky.com")[1])   # DNS couldn't say
+
+    def test_scan_subtracts_no_mx_rows(self):
+        tmp = tempfile.mkdtemp(prefix="letustech_test_")
+        self.addCleanup(shutil.rmtree, tmp, True)
+        path = Path(tmp) / "list.csv"
+        path.write_text("email,name\n"
+                        "a@ok.com,A\nb@dead.com,B\nc@DEAD.com,C\n"
+                        "A@ok.com,dup\nnot-an-email,X\nd@ok.com,D\n",
+                        encoding="utf-8")
+        stub = StubResolver({"dead.com": False})
+        src  = CSVContactSource(str(path))
+        src.scan(RecipientValidator(stub))
+        self.assertIsNone(src.error)
+        self.assertEqual((src.total, src.valid), (6, 2))
+        self.assertEqual(stub.calls, 2)                 # ok.com, dead.com
+        self.assertEqual(src.validator.rejected,
+                         {"no-mx": 2, "duplicate": 1, "syntax": 1})
+
+
+def _refused(code, msg, addr="a@x.com"):
+    return smtplib.SMTPRecipientsRefused({addr: (code, msg)})
+
+
+class TestBounceClass(unittest.TestCase):
+
+    def test_hard(self):
+        self.assertEqual(bounce_class(_refused(550, b"5.1.1 user unknown")), ("hard", 550))
+        self.assertEqual(bounce_class(_refused(554, b"5.2.1 mailbox disabled")), ("hard", 554))
+        self.assertEqual(bounce_class(_refused(550, b"no such user")), ("hard", 550))
+
+    def test_soft(self):
+        self.assertEqual(bounce_class(_refused(451, b"4.7.1 try later")), ("soft", 451))
+        self.assertEqual(bounce_class(_refused(552, b"5.2.2 mailbox full")), ("soft", 552))
+
+    def test_policy_rejection_blames_nobody(self):
+        self.assertEqual(bounce_class(_refused(550, b"5.7.1 spam detected")), (None, 550))
+        self.assertEqual(bounce_class(_refused(554, b"rejected")), (None, 554))
+
+    def test_other_errors_ignored(self):
+        self.assertEqual(bounce_class(smtplib.SMTPServerDisconnected()), (None, None))
+        self.assertEqual(bounce_class(OSError("timed out")), (None, None))
+
+
+class TestSuppressionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir  = tempfile.mkdtemp(prefix="letustech_test_")
+        self.path = Path(self.dir) / "suppressed.tsv"
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _reload(self, store):
+        store.close()
+        return SuppressionStore(self.path)
+
+    def test_hard_bounce_suppresses_and_persists(self):
+        store = SuppressionStore(self.path)
+        reason = store.note("A@X.com", _refused(550, b"5.1.1 user unknown"))
+        self.assertEqual(reason, "hard-bounce")
+        self.assertIn("a@x.com", store)
+        store = self._reload(store)
+        self.assertIn(" a@X.COM", store)
+        self.assertEqual(store.reason("a@x.com"), "hard-bounce")
+
+    def test_policy_rejection_not_suppressed(self):
+        store = SuppressionStore(self.path)
+        self.assertIsNone(store.note("a@x.com", _refused(550, b"5.7.1 blocked")))
+        self.assertNotIn("a@x.com", store)
+
+    def test_soft_bounces_need_a_streak(self):
+        store = SuppressionStore(self.path)
+        soft  = _refused(451, b"4.2.0 try again")
+        for _ in range(SuppressionStore.SOFT_LIMIT - 1):
+            self.assertIsNone(store.note("a@x.com", soft))
+        store.note("a@x.com")                    # delivered — streak resets
+        for _ in range(SuppressionStore.SOFT_LIMIT - 1):
+            self.assertIsNone(store.note("a@x.com", soft))
+        store = self._reload(store)              # the count survives a restart
+        self.assertEqual(store.note("a@x.com", soft), "soft-bounce")
+        self.assertIn("a@x.com", store)
+
+    def test_remove_lifts_suppression(self):
+        store = SuppressionStore(self.path)
+        store.add("a@x.com", "unsubscribed")
+        store.add("b@x.com")
+        store.remove("a@x.com")
+        store = self._reload(store)
+        self.assertNotIn("a@x.com", store)
+        self.assertEqual(store.reason("b@x.com"), "manual")
+        self.assertEqual(len(store), 1)
+
+    def test_torn_tail_ignored(self):
+        store = SuppressionStore(self.path)
+        store.add("a@x.com", "unsubscribed")
+        store.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("b@x.com\thard-bou")        # crash mid-write
+        store = SuppressionStore(self.path)
+        self.assertEqual(dict(store.counts()), {"unsubscribed": 1})
+        self.assertNotIn("b@x.com", store)
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_parse_hours(self):
+        self.assertEqual(parse_hours("09:00-17:30"), (540, 1050))
+        self.assertEqual(parse_hours(" 22:00 - 06:00 "), (1320, 360))
+        for bad in ("", "9-5", "09:00-09:00", "25:00-26:00", "09:60-10:00"):
+            self.assertIsNone(parse_hours(bad), bad)
+
+    def test_in_hours(self):
+        day, night = parse_hours("09:00-17:00"), parse_hours("22:00-06:00")
+        self.assertTrue(in_hours(day, datetime(2025, 6, 2, 9, 0)))
+        self.assertFalse(in_hours(day, datetime(2025, 6, 2, 17, 0)))
+        self.assertTrue(in_hours(night, datetime(2025, 6, 2, 23, 30)))
+        self.assertTrue(in_hours(night, datetime(2025, 6, 2, 5, 59)))
+        self.assertFalse(in_hours(night, datetime(2025, 6, 2, 12, 0)))
+        self.assertTrue(in_hours(None, datetime(2025, 6, 2, 3, 0)))
+
+    def test_active_seconds(self):
+        day = parse_hours("09:00-17:00")
+        start, end = datetime(2025, 6, 2, 16, 0), datetime(2025, 6, 3, 10, 0)
+        self.assertEqual(active_seconds(day, start, end), 2 * 3600)
+        self.assertEqual(active_seconds(None, start, end), 18 * 3600)
+        self.assertEqual(active_seconds(parse_hours("22:00-06:00"),
+                                        datetime(2025, 6, 2, 23, 0),
+                                        datetime(2025, 6, 3, 7, 0)), 7 * 3600)
+        self.assertEqual(active_seconds(day, end, start), 0.0)
+
+    def test_parse_when(self):
+        now = datetime(2025, 6, 2, 12, 0)
+        self.assertIsNone(parse_when("  ", now))
+        self.assertEqual(parse_when("2025-06-01 09:30", now), datetime(2025, 6, 1, 9, 30))
+        self.assertEqual(parse_when("13:15", now), datetime(2025, 6, 2, 13, 15))
+        self.assertEqual(parse_when("08:00", now), datetime(2025, 6, 3, 8, 0))
+        with self.assertRaises(ValueError):
+            parse_when("tomorrow", now)
+
+    def test_busy_account_holds_back_due_job(self):
+        tmp = tempfile.mkdtemp(prefix="letustech_test_")
+        self.addCleanup(shutil.rmtree, tmp, True)
+        sched, started = Scheduler(tmp), []
+        sched._run = lambda job, flag, account: started.append(account)
+        job = sched.add("list.csv", "Hi", "Body",
+                        ("smtp.x.com", 587, "Me@x.com", "STARTTLS"))
+
+        other = Scheduler(tmp)             # a send from the app or the CLI
+        self.assertTrue(other.claim("me@x.com", "SMTP.x.com"))
+        self.assertFalse(sched.claim("me@x.com", "smtp.x.com"))
+        sched.tick()
+        self.assertEqual(started, [])
+        self.assertNotIn(job["id"], sched._running)
+
+        other.release("me@x.com", "smtp.x.com")
+        sched.tick()
+        self.assertEqual(started, [("Me@x.com", "smtp.x.com")])
+        self.assertFalse(other.claim("me@x.com", "smtp.x.com"))   # job holds it now
+
+
+class TestAsyncSMTPPool(unittest.TestCase):
+
+    def _send(self, n=20, size=2, limiter=None, **sink_opts):
+        """Send n messages through the pool to a local sink; returns (sink, results, commands)."""
+        sink = SMTPSink(**sink_opts).start()
+        self.addCleanup(sink.stop)
+        results, commands = [], []
+        command = engine.AsyncSMTP.command
+
+        async def spy(client, line):
+            commands.append(line.split(":")[0].split()[0].upper())
+            return await command(client, line)
+
+        with patch.object(engine.AsyncSMTP, "command", spy):
+            pool = AsyncSMTPPool("127.0.0.1", sink.port, "me@x.com", "pw", "None",
+                                 size=size, limiter=limiter,
+                                 on_result=lambda to, st, ref, err:
+                                     results.append((ref, st, err)))
+            pool.start()
+            for i in range(n):
+                self.assertTrue(pool.submit(f"user{i}@example.com",
+                                            f"Subject: {i}\r\n\r\nHello {i}\r\n", ref=i))
+            pool.close()
+        return sink, results, commands
+
+    def test_pipelined(self):
+        sink, results, commands = self._send(pipelining=True)
+        self.assertEqual(sorted(r for r, st, _ in results if st == "sent"), list(range(20)))
+        self.assertEqual(sink.messages, 20)
+        self.assertNotIn("MAIL", commands)   # envelope went out in one write
+
+    def test_without_pipelining(self):
+        sink, results, commands = self._send(pipelining=False)
+        self.assertEqual(sorted(r for r, st, _ in results if st == "sent"), list(range(20)))
+        self.assertEqual(sink.messages, 20)
+        self.assertEqual(commands.count("MAIL"), 20)
+
+    def test_refused_recipients_reported(self):
+        for pipelining in (True, False):
+            sink, results, _ = self._send(n=40, fail_rate=0.3, pipelining=pipelining)
+            refused = [err for _, st, err in results if st != "sent"]
+            self.assertEqual(len(results), 40)
+            self.assertEqual(len(refused), sink.refused)
+            self.assertEqual(40 - len(refused), sink.messages)
+            for err in refused:
+                self.assertEqual(bounce_class(err), ("hard", 550))
+
+    def test_rate_limit_paces_sessions(self):
+        start = time.monotonic()
+        _, results, _ = self._send(n=10, size=3, limiter=RateLimiter(per_second=50))
+        self.assertEqual(len(results), 10)
+        self.assertGreaterEqual(time.monotonic() - start, 9 / 50 * 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)